@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+
+import os
+import re
+import sys
+import sqlite3
+import argparse
+
+################################################################################
+# ACTIVITY REPORT
+#
+# Early energy estimate of the SRAMs of a design from an RTL simulation. The
+# design is simulated with the instrumented models of the macros (the "act"
+# view, e.g. run.py --views lib,lef,v,bb,act, compiling <name>.act.v instead
+# of <name>.v), which print the reads, writes, bits written and idle cycles
+# of every instance at the end of the simulation (see
+# utils/generate_verilog.py). The ACTIVITY lines of the simulation logs are
+# combined with the Cacti numbers of every macro from the catalog written by
+# run.py:
+#
+#   read energy    = reads * read energy per access
+#   write energy   = write energy per access * bits written / word width
+#   leakage energy = leakage * cycles * clock period
+#
+# The clock period is the macro's min_period unless --clock_period_ns is
+# given. The energy of every instance and the total is printed and written to
+# --output (activity.csv by default).
+################################################################################
+
+RE_ACTIVITY = re.compile(r'^ACTIVITY (\S+) (\S+) cycles=(\d+) reads=(\d+) writes=(\d+) write_bits=(\d+) idle=(\d+)', re.MULTILINE)
+
+def get_args() -> argparse.Namespace:
+    """
+    Get command line arguments
+    """
+    parser = argparse.ArgumentParser(
+        description="""
+    BSG Black-box SRAM Generator --
+    Report the SRAM energy of a simulation of the instrumented models. """
+    )
+
+    parser.add_argument("catalog", help="SQLite catalog written by run.py")
+
+    parser.add_argument("logs", nargs="+", help="Simulation logs with the ACTIVITY lines")
+
+    parser.add_argument(
+        "--process", action="store", help="Process of the macros (when the catalog has several) ", required=False, default=None
+    )
+
+    parser.add_argument(
+        "--clock_period_ns", action="store", type=float, help="Clock period (default: the min_period of every macro) ", required=False, default=None
+    )
+
+    parser.add_argument(
+        "--output", action="store", help="CSV report (default: activity.csv) ", required=False, default='activity.csv'
+    )
+
+    return parser.parse_args()
+
+
+def main ( args : argparse.Namespace):
+
+  if not os.path.exists(args.catalog):
+    print(f'ERROR: catalog {args.catalog} not found')
+    return 1
+
+  db = sqlite3.connect(args.catalog)
+  db.row_factory = sqlite3.Row
+
+  # Activity of every instance (the last line wins when an instance shows up
+  # more than once)
+  instances = {}
+  for log in args.logs:
+    if not os.path.exists(log):
+      print(f'ERROR: log {log} not found')
+      return 1
+    with open(log, 'r') as fid:
+      for m in RE_ACTIVITY.finditer(fid.read()):
+        instances[m.group(2)] = (m.group(1), [int(v) for v in m.groups()[2:]])
+  if not instances:
+    print('ERROR: no ACTIVITY lines found (simulate with the <name>.act.v models)')
+    return 1
+
+  macros = {}
+  rows = []
+  for inst in sorted(instances):
+    name, (cycles, reads, writes, write_bits, idle) = instances[inst]
+    if name not in macros:
+      query, params = 'SELECT * FROM macros WHERE name = ?', [name]
+      if args.process:
+        query += ' AND process = ?'
+        params.append(args.process)
+      found = db.execute(query, params).fetchall()
+      if len(found) != 1:
+        print(f'ERROR: {"no" if not found else "more than one"} macro {name} in {args.catalog}' + ('' if not found else ' (pick one with --process)'))
+        return 1
+      macros[name] = found[0]
+    macro = macros[name]
+
+    period_ns  = args.clock_period_ns if args.clock_period_ns else macro['min_period_ns']
+    read_nj    = reads * macro['read_energy_nj']
+    write_nj   = macro['write_energy_nj'] * write_bits / macro['width']
+    leakage_nj = macro['leakage_mW'] * cycles * period_ns / 1e3
+    total_nj   = read_nj + write_nj + leakage_nj
+    power_mW   = total_nj * 1e3 / (cycles * period_ns) if cycles else 0.0
+    rows.append((inst, name, cycles, reads, writes, write_bits, idle, read_nj, write_nj, leakage_nj, total_nj, power_mW))
+
+  print('%-40s %-24s %10s %10s %10s %10s %12s %12s %12s %12s %10s' % ('instance', 'macro', 'cycles', 'reads', 'writes', 'idle',
+    'read_nj', 'write_nj', 'leakage_nj', 'total_nj', 'power_mW'))
+  with open(args.output, 'w') as fid:
+    fid.write('instance, macro, cycles, reads, writes, write_bits, idle, read_nj, write_nj, leakage_nj, total_nj, power_mW\n')
+    for inst, name, cycles, reads, writes, write_bits, idle, read_nj, write_nj, leakage_nj, total_nj, power_mW in rows:
+      print('%-40s %-24s %10d %10d %10d %10d %12.3f %12.3f %12.3f %12.3f %10.3f' % (inst, name, cycles, reads, writes, idle,
+        read_nj, write_nj, leakage_nj, total_nj, power_mW))
+      fid.write('%s, %s, %d, %d, %d, %d, %d, %.6f, %.6f, %.6f, %.6f, %.6f\n' % (inst, name, cycles, reads, writes, write_bits, idle,
+        read_nj, write_nj, leakage_nj, total_nj, power_mW))
+
+  totals = [sum(r[k] for r in rows) for k in (7, 8, 9, 10)]
+  print('%-40s %-24s %10s %10s %10s %10s %12.3f %12.3f %12.3f %12.3f' % ('total', '', '', '', '', '', *totals))
+  print(f'Reported {len(rows)} instances of {len(macros)} macros ({totals[3]:.3f} nJ)')
+  return 0
+
+### Entry point
+if __name__ == '__main__':
+  args = get_args()
+  sys.exit(main( args ))
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.read_config import read_config, split_processes
+from utils.check_views import check_macro, tiled_leaf, CHECKED_VIEWS
+
+################################################################################
+# CHECK GENERATED VIEWS
+#
+# Reads the same JSON configuration file used to generate the SRAMs and checks
+# that the views found in the output directory are consistent with each other
+# (see utils/check_views.py for the list of checks).
+################################################################################
+
+def get_args() -> argparse.Namespace:
+    """
+    Get command line arguments
+    """
+    parser = argparse.ArgumentParser(
+        description="""
+    BSG Black-box SRAM Generator --
+    Check the generated LEF, Liberty and Verilog views for consistency. """
+    )
+
+    parser.add_argument("config", help="JSON configuration file")
+
+    parser.add_argument(
+        "--output_dir", action="store", help="Output directory ", required=False, default=None
+    )
+
+    parser.add_argument(
+        "--views", action="store", help="Comma separated list of views to check (default: %s) " % ','.join(CHECKED_VIEWS), required=False, default=','.join(CHECKED_VIEWS)
+    )
+
+    parser.add_argument(
+        "--jobs", "-j", action="store", type=int, help="Number of parallel workers ", required=False, default=os.cpu_count()
+    )
+
+    return parser.parse_args()
+
+
+def main ( args : argparse.Namespace):
+
+  json_data = read_config(args.config)
+
+  if args.output_dir:
+    base_dir = os.path.abspath(os.path.expanduser(args.output_dir))
+  else:
+    base_dir = os.sep.join([os.getcwd(), 'results'])
+
+  # Views other than the ones known to the checker (e.g. gds) are ignored
+  checked_views = [v for v in args.views.split(',') if v in CHECKED_VIEWS]
+
+  # Macros of every process (each process of a multi-process configuration
+  # has its own output subdirectory)
+  names, dirs, lefs, pitches, corner_lists = [], [], [], [], []
+  for subdir, process_data in split_processes(json_data):
+    output_dir = os.sep.join([base_dir, subdir]) if subdir else base_dir
+    pin_pitch_nm = int(process_data['pinPitch_nm'])
+    corners = [str(corner['name']) for corner in process_data['corners']] if 'corners' in process_data else []
+    for sram in process_data['srams']:
+      name = str(sram['name'])
+      d = os.sep.join([output_dir, name])
+      leaf = tiled_leaf(d)
+
+      # Tiled srams have no LEF, their leaf macro is checked as well
+      names.append(name)
+      dirs.append(d)
+      lefs.append(leaf is None)
+      pitches.append(pin_pitch_nm)
+      corner_lists.append(corners)
+      if leaf:
+        names.append(leaf)
+        dirs.append(os.sep.join([d, leaf]))
+        lefs.append(True)
+        pitches.append(pin_pitch_nm)
+        corner_lists.append(corners)
+
+  # Small batches are faster without the worker start-up cost
+  n = len(names)
+  if args.jobs > 1 and n > 64:
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+      results = list(pool.map(check_macro, dirs, names, pitches, corner_lists, lefs, [checked_views]*n, chunksize=32))
+  else:
+    results = [check_macro(*m, checked_views) for m in zip(dirs, names, pitches, corner_lists, lefs)]
+
+  num_errors = 0
+  for errors in results:
+    for e in errors:
+      print(f'ERROR: {e}')
+    num_errors += len(errors)
+
+  num_bad = sum(1 for errors in results if errors)
+  print(f'Checked {len(names)} macros: {len(names)-num_bad} clean, {num_bad} with errors ({num_errors} errors)')
+  return 1 if num_errors else 0
+
+### Entry point
+if __name__ == '__main__':
+  args = get_args()
+  sys.exit(main( args ))
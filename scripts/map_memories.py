@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import json
+import argparse
+
+from utils.read_config import read_config
+from utils.class_process import Process
+from utils.mapper import Requirement, OBJECTIVES, map_memories
+from utils.generate_verilog import generate_verilog_wrapper, generate_verilog_bb
+
+################################################################################
+# MAP MEMORIES
+#
+# Map the logical memories of a design onto a small set of fakeram macros (see
+# utils/mapper.py). The input is a process configuration (the same keys as a
+# run.py configuration) with a "memories" list instead of "srams":
+#
+#   "memories": [
+#     {"name": "icache_data", "width": 64, "depth": 4096, "write_mask": "byte"},
+#     {"name": "regfile", "width": 32, "depth": 32, "ports": "1r1w"}
+#   ]
+#
+# Every memory takes "ports", "write_mask" and "read_latency" like an SRAM.
+# The mapper writes into <output_dir>:
+#
+#   srams.cfg          - the run.py configuration of the picked macros
+#   mapping.csv        - the macro grid, area and clk->rd_out of every memory
+#   wrappers/<name>.v  - the wrapper of every memory (and a .bb.v black box)
+#
+# Running run.py on srams.cfg then generates the views of the macros.
+################################################################################
+
+def get_args() -> argparse.Namespace:
+    """
+    Get command line arguments
+    """
+    parser = argparse.ArgumentParser(
+        description="""
+    BSG Black-box SRAM Generator --
+    Map logical memories onto generated SRAM macros. """
+    )
+
+    parser.add_argument("config", help="JSON configuration file with a memories list")
+
+    parser.add_argument(
+        "--output_dir", action="store", help="Output directory ", required=False, default=None
+    )
+
+    parser.add_argument(
+        "--cacti_dir", action="store", help="CACTI installation directory ", required=False, default=None
+    )
+
+    parser.add_argument(
+        "--objective", action="store", choices=OBJECTIVES, help="Minimize the total macro area or the clk->rd_out latency (default: area) ", required=False, default='area'
+    )
+
+    parser.add_argument(
+        "--max_tiles", action="store", type=int, help="Most macros per memory (default: 16) ", required=False, default=16
+    )
+
+    parser.add_argument(
+        "--reuse_tolerance", action="store", type=float, help="Cost increase accepted to share a macro type (default: 0.1) ", required=False, default=0.1
+    )
+
+    parser.add_argument(
+        "--prefix", action="store", help="Name prefix of the macros (default: fakeram) ", required=False, default='fakeram'
+    )
+
+    parser.add_argument(
+        "--jobs", "-j", action="store", type=int, help="Number of macros modeled in parallel ", required=False, default=os.cpu_count()
+    )
+
+    return parser.parse_args()
+
+
+def main ( args : argparse.Namespace):
+
+  json_data = read_config(args.config)
+  if 'processes' in json_data:
+    print('ERROR: the mapper takes a single process configuration')
+    return 1
+  if 'memories' not in json_data:
+    print(f'ERROR: {args.config} has no memories list')
+    return 1
+
+  if args.output_dir:
+    output_dir = os.path.abspath(os.path.expanduser(args.output_dir))
+  else:
+    output_dir = os.sep.join([os.getcwd(), 'mapped'])
+  wrapper_dir = os.sep.join([output_dir, 'wrappers'])
+  os.makedirs(wrapper_dir, exist_ok=True)
+
+  process = Process(json_data)
+  reqs = [Requirement(m) for m in json_data['memories']]
+  mappings = map_memories(process, reqs, output_dir, wrapper_dir, objective=args.objective,
+    max_tiles=args.max_tiles, reuse_tolerance=args.reuse_tolerance, prefix=args.prefix,
+    jobs=args.jobs, cacti_dir=args.cacti_dir)
+
+  # Wrappers of the memories
+  for m in mappings:
+    generate_verilog_wrapper(m.tiled)
+    generate_verilog_bb(m.tiled)
+
+  # Configuration of the macros for run.py
+  macros = {}
+  for m in mappings:
+    macros.setdefault(m.leaf.name, m.leaf.sram_data)
+  srams_cfg = {k: v for k, v in json_data.items() if k != 'memories'}
+  srams_cfg['srams'] = [macros[name] for name in sorted(macros)]
+  with open(os.sep.join([output_dir, 'srams.cfg']), 'w') as fid:
+    fid.write('# Macros picked by map_memories.py for %s (objective: %s)\n' % (os.path.basename(args.config), args.objective))
+    fid.write(json.dumps(srams_cfg, indent=2) + '\n')
+
+  print('%-24s %-32s %5s %5s %12s %12s' % ('memory', 'macro', 'rows', 'cols', 'area_um2', 'clk_to_q_ns'))
+  with open(os.sep.join([output_dir, 'mapping.csv']), 'w') as fid:
+    fid.write('memory, width, depth, ports, write_mask, macro, rows, cols, area_um2, clk_to_q_ns, fmax_mhz\n')
+    for m in mappings:
+      r = m.rollup
+      print('%-24s %-32s %5d %5d %12.3f %12.3f' % (m.req.name, m.leaf.name, m.tiled.rows, m.tiled.cols, r.area_um2, r.t_clk_to_q_ns))
+      fid.write('%s, %d, %d, %s, %s, %s, %d, %d, %.3f, %.3f, %.1f\n' % (m.req.name, m.req.width, m.req.depth, m.req.ports,
+        m.req.write_mask, m.leaf.name, m.tiled.rows, m.tiled.cols, r.area_um2, r.t_clk_to_q_ns, 1e3 / r.min_period_ns))
+
+  total = sum(m.rollup.area_um2 for m in mappings)
+  print(f'Mapped {len(mappings)} memories onto {len(macros)} macro types ({total:.3f} um^2)')
+  return 0
+
+### Entry point
+if __name__ == '__main__':
+  args = get_args()
+  sys.exit(main( args ))
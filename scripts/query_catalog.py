@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import json
+import sqlite3
+import argparse
+
+################################################################################
+# QUERY CATALOG
+#
+# Look up macros in the SQLite catalog written by run.py (see utils/catalog.py)
+# without touching the generated views. For example the smallest macro that is
+# at least 64 bits wide, 2048 words deep and runs at 1.5GHz:
+#
+#   ./query_catalog.py results/catalog.db --min_width 64 --min_depth 2048 --min_fmax_mhz 1500 --limit 1
+################################################################################
+
+# Columns printed for every macro (all columns with --json)
+COLUMNS = ('process', 'name', 'tech_nm', 'width', 'depth', 'ports', 'read_latency', 'tiled', 'fmax_mhz', 'clk_to_q_ns', 'area_um2', 'width_um', 'height_um', 'leakage_mW')
+
+ORDER = { 'area'    : 'area_um2 ASC'
+        , 'fmax'    : 'fmax_mhz DESC'
+        , 'leakage' : 'leakage_mW ASC'
+        , 'name'    : 'name ASC'
+        }
+
+def get_args() -> argparse.Namespace:
+    """
+    Get command line arguments
+    """
+    parser = argparse.ArgumentParser(
+        description="""
+    BSG Black-box SRAM Generator --
+    Query the catalog of generated SRAMs. """
+    )
+
+    parser.add_argument("catalog", help="SQLite catalog written by run.py")
+
+    parser.add_argument("--name", action="store", help="Macro name (SQL LIKE pattern) ", required=False, default=None)
+    parser.add_argument("--process", action="store", help="Process name ", required=False, default=None)
+    parser.add_argument("--tech_nm", action="store", type=int, help="Technology node ", required=False, default=None)
+    parser.add_argument("--ports", action="store", help="Port configuration (1rw, 1r1w, ...) ", required=False, default=None)
+    parser.add_argument("--write_mask", action="store", choices=('bit', 'byte', 'none'), help="Write mask granularity ", required=False, default=None)
+    parser.add_argument("--min_width", action="store", type=int, help="Minimum word width in bits ", required=False, default=None)
+    parser.add_argument("--min_depth", action="store", type=int, help="Minimum number of words ", required=False, default=None)
+    parser.add_argument("--min_fmax_mhz", action="store", type=float, help="Minimum clock frequency ", required=False, default=None)
+    parser.add_argument("--max_area_um2", action="store", type=float, help="Maximum macro area ", required=False, default=None)
+    parser.add_argument("--order", action="store", choices=sorted(ORDER), help="Sort order (default: area) ", required=False, default='area')
+    parser.add_argument("--limit", action="store", type=int, help="Maximum number of macros to list ", required=False, default=None)
+    parser.add_argument("--views", action="store_true", help="Also list the view files of every macro ", required=False, default=False)
+    parser.add_argument("--json", action="store_true", help="Print every column as JSON ", required=False, default=False)
+
+    return parser.parse_args()
+
+
+def main ( args : argparse.Namespace):
+
+  if not os.path.exists(args.catalog):
+    print(f'ERROR: catalog {args.catalog} not found')
+    return 1
+
+  db = sqlite3.connect(args.catalog)
+  db.row_factory = sqlite3.Row
+
+  where, params = [], []
+  for column, op, value in ( ('name', 'LIKE', args.name)
+                           , ('process', '=', args.process)
+                           , ('tech_nm', '=', args.tech_nm)
+                           , ('ports', '=', args.ports)
+                           , ('write_mask', '=', args.write_mask)
+                           , ('width', '>=', args.min_width)
+                           , ('depth', '>=', args.min_depth)
+                           , ('fmax_mhz', '>=', args.min_fmax_mhz)
+                           , ('area_um2', '<=', args.max_area_um2)
+                           ):
+    if value is not None:
+      where.append('%s %s ?' % (column, op))
+      params.append(value)
+
+  query = 'SELECT * FROM macros'
+  if where:
+    query += ' WHERE ' + ' AND '.join(where)
+  query += ' ORDER BY ' + ORDER[args.order]
+  if args.limit is not None:
+    query += ' LIMIT %d' % args.limit
+  rows = db.execute(query, params).fetchall()
+
+  if args.json:
+    macros = [dict(row) for row in rows]
+    if args.views:
+      for m in macros:
+        m['views'] = {v['view']: {'path': v['path'], 'sha256': v['sha256']} for v in db.execute('SELECT * FROM views WHERE process = ? AND name = ?', (m['process'], m['name']))}
+    print(json.dumps(macros, indent=2))
+    return 0
+
+  print(' '.join('%-12s' % c for c in COLUMNS))
+  for row in rows:
+    print(' '.join(('%-12.3f' % row[c]) if isinstance(row[c], float) else ('%-12s' % row[c]) for c in COLUMNS))
+    if args.views:
+      for v in db.execute('SELECT view, path FROM views WHERE process = ? AND name = ? ORDER BY view', (row['process'], row['name'])):
+        print('    %-20s %s' % (v['view'], v['path']))
+  return 0
+
+### Entry point
+if __name__ == '__main__':
+  args = get_args()
+  sys.exit(main( args ))
@@ -1,16 +1,17 @@
 #!/usr/bin/env python3
 
+import os
 import sys
-import json
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 
+from utils.read_config import read_config, split_processes
 from utils.class_process import Process
-from utils.class_memory import Memory
+from utils.class_tiled_memory import TiledMemory, make_memory
 
-from utils.generate_lib import generate_lib
-from utils.generate_lef import generate_lef
-from utils.generate_verilog import generate_verilog
-from utils.generate_verilog import generate_verilog_bb
+from utils.views import DEFAULT_VIEWS, select_views, load_view_plugins
+from utils.generate_gds import generate_gds, GdsWriter
+from utils.catalog import Catalog
 
 ################################################################################
 # RUN GENERATOR
@@ -18,7 +19,9 @@ from utils.generate_verilog import generate_verilog_bb
 # This is the main part of the script. It will read in the JSON configuration
 # file, create a Cacti configuration file, run Cacti, extract the data from
 # Cacti, and then generate the timing, physical and logical views for each SRAM
-# found in the JSON configuration file.
+# found in the JSON configuration file. A configuration with several processes
+# (see utils/read_config.py) is run in one go, with the views of every process
+# in <output_dir>/<process name> and one summary.csv for all of them.
 ################################################################################
 
 def get_args() -> argparse.Namespace:
@@ -43,26 +46,124 @@ def get_args() -> argparse.Namespace:
         "--cacti_dir", action="store", help="CACTI installation directory ", required=False, default=None
     )
 
+    parser.add_argument(
+        "--views", action="store", help="Comma separated list of views to generate (default: %s) " % ','.join(DEFAULT_VIEWS), required=False, default=','.join(DEFAULT_VIEWS)
+    )
+
+    parser.add_argument(
+        "--view_plugins", action="store", help="Comma separated list of python modules (or files) that register extra views ", required=False, default=''
+    )
+
+    parser.add_argument(
+        "--gds", action="store_true", help="Also generate a GDSII abstract for each SRAM (same as adding gds to --views) ", required=False, default=False
+    )
+
+    parser.add_argument(
+        "--gds_lib", action="store", help="Write the GDSII abstracts of all SRAMs into this library ", required=False, default=None
+    )
+
+    parser.add_argument(
+        "--jobs", "-j", action="store", type=int, help="Number of srams modeled in parallel ", required=False, default=os.cpu_count()
+    )
+
+    parser.add_argument(
+        "--catalog", action="store", help="SQLite catalog of the generated SRAMs (default: <output_dir>/catalog.db) ", required=False, default=None
+    )
+
     return parser.parse_args()
 
 
 def main ( args : argparse.Namespace):
 
   # Load the JSON configuration file
-  with open(args.config, 'r') as fid:
-    raw = [line.strip() for line in fid if not line.strip().startswith('#')]
-  json_data = json.loads('\n'.join(raw))
-
-  # Create a process object (shared by all srams)
-  process = Process(json_data)
-
-  # Go through each sram and generate the lib, lef and v files
-  for sram_data in json_data['srams']:
-    memory = Memory(process, sram_data, args.output_dir, args.cacti_dir)
-    generate_lib(memory)
-    generate_lef(memory)
-    generate_verilog(memory, tmChkExpand=process.vlogTimingCheckSignalExpansion)
-    generate_verilog_bb(memory)
+  json_data = read_config(args.config)
+
+  # Views to generate for each sram
+  load_view_plugins([p for p in args.view_plugins.split(',') if p])
+  views = select_views(args.views + (',gds' if args.gds else ''))
+
+  # Cacti only runs (in the pool below) when one of the views needs its
+  # results, otherwise the srams are modeled on demand (e.g. to check the
+  # tiling limits)
+  need_model = bool(args.gds_lib) or any(view.needs_model for view in views)
+
+  # Top of the output tree (every process of a multi-process configuration
+  # gets its own subdirectory)
+  if args.output_dir:
+    base_dir = os.path.expanduser(args.output_dir)
+  else:
+    base_dir = os.sep.join([os.getcwd(), 'results'])
+
+  # Create a process object for every process (shared by all of its srams)
+  # and list the srams of all of the processes
+  jobs = []
+  gds_libs = {}
+  for subdir, process_data in split_processes(json_data):
+    process = Process(process_data)
+    output_dir = os.sep.join([base_dir, subdir]) if subdir else args.output_dir
+    for sram_data in process_data['srams']:
+      jobs.append((process, sram_data, output_dir))
+
+    # Combined GDSII library (optional, one per process)
+    if args.gds_lib:
+      path = args.gds_lib if not subdir else '%s_%s%s' % (os.path.splitext(args.gds_lib)[0], subdir, os.path.splitext(args.gds_lib)[1])
+      gds_libs[process] = GdsWriter(path, 'fakeram')
+
+  # Catalog of the generated srams
+  catalog = Catalog(args.catalog if args.catalog else os.sep.join([base_dir, 'catalog.db']))
+
+  # The srams of all of the processes are modeled (Cacti runs) in one pool,
+  # while the views are generated in order as the srams become ready
+  summary = []
+  pool = ThreadPoolExecutor(max_workers=max(1, args.jobs))
+  try:
+    memories = pool.map(lambda job: make_memory(job[0], job[1], job[2], args.cacti_dir, need_model), jobs)
+    for (process, sram_data, output_dir), memory in zip(jobs, memories):
+
+      # A tiled sram gets a wrapper and a roll-up lib, the views of the sram
+      # itself below are the views of its leaf macro
+      if isinstance(memory, TiledMemory):
+        for view in views:
+          if view.generate_tiled:
+            view.generate_tiled(memory)
+        if memory.leaf.modeled:
+          catalog.add(memory.rollup(), tiled=memory)
+          summary.append(memory.rollup())
+        memory = memory.leaf
+      elif memory.modeled:
+        summary.append(memory)
+
+      for view in views:
+        view.generate(memory)
+      if process in gds_libs:
+        generate_gds(memory, gds_libs[process])
+      if memory.modeled:
+        catalog.add(memory)
+  except SystemExit:
+    pool.shutdown(wait=True, cancel_futures=True)
+    raise
+  pool.shutdown()
+
+  for gds_lib in gds_libs.values():
+    gds_lib.close()
+  catalog.close()
+
+  write_summary(summary, os.sep.join([base_dir, 'summary.csv']))
+
+#
+# Helper function that prints (and writes a csv of) the size and speed of
+# every generated sram
+#
+def write_summary( memories, path ):
+  os.makedirs(os.path.dirname(path), exist_ok=True)
+  print('%-12s %-32s %10s %10s %12s %10s' % ('process', 'sram', 'width_um', 'height_um', 'area_um2', 'fmax_mhz'))
+  with open(path, 'w') as fid:
+    fid.write('process, sram, width, depth, ports, width_um, height_um, area_um2, fmax_mhz, leakage_mW\n')
+    for mem in memories:
+      fmax = 1e3 / mem.min_period_ns
+      print('%-12s %-32s %10.3f %10.3f %12.3f %10.1f' % (mem.process.name, mem.name, mem.width_um, mem.height_um, mem.area_um2, fmax))
+      fid.write('%s, %s, %d, %d, %s, %.3f, %.3f, %.3f, %.1f, %.6f\n' % (mem.process.name, mem.name, mem.width_in_bits, mem.depth,
+        mem.port_type, mem.width_um, mem.height_um, mem.area_um2, fmax, mem.standby_leakage_mW))
 
 ### Entry point
 if __name__ == '__main__':
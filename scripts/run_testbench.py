@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+
+import os
+import re
+import sys
+import time
+import shutil
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.read_config import read_config, split_processes
+from utils.check_views import tiled_leaf
+
+################################################################################
+# RUN TESTBENCHES
+#
+# Reads the same JSON configuration file used to generate the SRAMs (with the
+# "tb" view, e.g. run.py --views lib,lef,v,bb,tb), then compiles and runs the
+# self-checking testbench of every SRAM under each simulator and model flavor.
+# The pass/fail result and the simulation speed in cycles per second (run time
+# only, without the compile) are printed and written to
+# <output_dir>/testbench.csv so that slowdowns of the verilog model show up.
+#
+# Simulators: iverilog (4-state, the X behavior is checked) and verilator
+# (2-state, only the known read data is checked). Flavors: corrupt_x and keep_x
+# (the model's corrupt_mem_on_X_p set to 1 or 0). With --model act the
+# testbenches run on the instrumented models (<name>.act.v, the "act" view),
+# which are SystemVerilog and get the simulator's SystemVerilog option.
+################################################################################
+
+SIMULATORS = ('iverilog', 'verilator')
+
+# Flavor: corrupt_mem_on_X_p of the model
+FLAVORS = { 'corrupt_x' : 1
+          , 'keep_x'    : 0
+          }
+
+# Model: file suffix of the verilog model and whether it is SystemVerilog
+# (iverilog always compiles with -g2012, verilator gets -sv)
+MODELS = { 'v'   : ('.v',     False)
+         , 'act' : ('.act.v', True)
+         }
+
+RE_RESULT = re.compile(r'^(PASS|FAIL) (\d+) cycles (\d+) errors', re.MULTILINE)
+
+def get_args() -> argparse.Namespace:
+    """
+    Get command line arguments
+    """
+    parser = argparse.ArgumentParser(
+        description="""
+    BSG Black-box SRAM Generator --
+    Run the self-checking testbenches of the generated verilog models. """
+    )
+
+    parser.add_argument("config", help="JSON configuration file")
+
+    parser.add_argument(
+        "--output_dir", action="store", help="Output directory ", required=False, default=None
+    )
+
+    parser.add_argument(
+        "--simulators", action="store", help="Comma separated list of simulators (default: the installed ones of %s) " % ','.join(SIMULATORS), required=False, default=None
+    )
+
+    parser.add_argument(
+        "--flavors", action="store", help="Comma separated list of model flavors (default: %s) " % ','.join(FLAVORS), required=False, default=','.join(FLAVORS)
+    )
+
+    parser.add_argument(
+        "--model", action="store", help="Verilog model to simulate: v, or act for the instrumented models (default: v) ", required=False, default='v'
+    )
+
+    parser.add_argument(
+        "--cycles", action="store", type=int, help="Number of random cycles per testbench ", required=False, default=10000
+    )
+
+    parser.add_argument(
+        "--seed", action="store", type=int, help="Random seed ", required=False, default=1
+    )
+
+    parser.add_argument(
+        "--jobs", "-j", action="store", type=int, help="Number of parallel simulations (more than 1 skews the speed numbers) ", required=False, default=1
+    )
+
+    return parser.parse_args()
+
+
+def main ( args : argparse.Namespace):
+
+  json_data = read_config(args.config)
+
+  if args.output_dir:
+    output_dir = os.path.abspath(os.path.expanduser(args.output_dir))
+  else:
+    output_dir = os.sep.join([os.getcwd(), 'results'])
+
+  if args.simulators:
+    simulators = [s for s in args.simulators.split(',') if s]
+  else:
+    simulators = [s for s in SIMULATORS if shutil.which(s)]
+  for sim in simulators:
+    if sim not in SIMULATORS:
+      print(f'ERROR: unknown simulator "{sim}" (expected one of {", ".join(SIMULATORS)})')
+      return 1
+    if not shutil.which(sim):
+      print(f'ERROR: simulator {sim} not found')
+      return 1
+  if not simulators:
+    print(f'ERROR: none of the simulators ({", ".join(SIMULATORS)}) are installed')
+    return 1
+
+  flavors = [f for f in args.flavors.split(',') if f]
+  for flavor in flavors:
+    if flavor not in FLAVORS:
+      print(f'ERROR: unknown flavor "{flavor}" (expected one of {", ".join(FLAVORS)})')
+      return 1
+
+  if args.model not in MODELS:
+    print(f'ERROR: unknown model "{args.model}" (expected one of {", ".join(MODELS)})')
+    return 1
+  suffix = MODELS[args.model][0]
+
+  # Macros and their verilog sources (a tiled sram needs its leaf model and
+  # the leaf macro gets its own run)
+  macros = []
+  for subdir, process_data in split_processes(json_data):
+    process_dir = os.sep.join([output_dir, subdir]) if subdir else output_dir
+    for sram in process_data['srams']:
+      name = str(sram['name'])
+      d = os.sep.join([process_dir, name])
+      leaf = tiled_leaf(d)
+      if leaf:
+        leaf_dir = os.sep.join([d, leaf])
+        macros.append((name, d, [os.sep.join([leaf_dir, leaf + suffix])]))
+        macros.append((leaf, leaf_dir, []))
+      else:
+        macros.append((name, d, []))
+
+  runs = []
+  for name, d, extra_sources in macros:
+    tb = os.sep.join([d, name + '_tb.v'])
+    if not os.path.exists(tb):
+      print(f'ERROR: {tb} not found (generate it with run.py --views ...,tb)')
+      return 1
+    # (the wrapper of a tiled sram is plain verilog, its leaf has the model)
+    model = os.sep.join([d, name + (suffix if not extra_sources else '.v')])
+    if not os.path.exists(model):
+      print(f'ERROR: {model} not found (generate it with run.py --views ...,{args.model})')
+      return 1
+    sources = [tb, model] + extra_sources
+    for sim in simulators:
+      for flavor in flavors:
+        runs.append((name, d, sources, sim, flavor))
+
+  def run( r ):
+    return run_testbench(*r, cycles=args.cycles, seed=args.seed, model=args.model)
+
+  with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+    results = list(pool.map(run, runs))
+
+  num_fail = 0
+  print('%-32s %-10s %-10s %-6s %10s %10s %14s' % ('macro', 'simulator', 'flavor', 'result', 'cycles', 'run_s', 'cycles_per_s'))
+  with open(os.sep.join([output_dir, 'testbench.csv']), 'w') as fid:
+    fid.write('macro, simulator, flavor, result, cycles, errors, run_s, cycles_per_s, log\n')
+    for (name, d, sources, sim, flavor), (result, cycles, errors, run_s, log) in zip(runs, results):
+      speed = cycles / run_s if run_s > 0 else 0.0
+      print('%-32s %-10s %-10s %-6s %10d %10.3f %14.0f' % (name, sim, flavor, result, cycles, run_s, speed))
+      fid.write('%s, %s, %s, %s, %d, %d, %.3f, %.0f, %s\n' % (name, sim, flavor, result, cycles, errors, run_s, speed, log))
+      if result != 'PASS':
+        num_fail += 1
+        print(f'ERROR: {name} failed under {sim} ({flavor}), see {log}')
+
+  print(f'Ran {len(runs)} testbenches: {len(runs)-num_fail} passed, {num_fail} failed')
+  return 1 if num_fail else 0
+
+#
+# Compile and run one testbench. Returns (result, cycles, errors, run
+# seconds, log file).
+#
+def run_testbench( name, results_dir, sources, sim, flavor, cycles, seed, model='v' ):
+  top = name + '_tb'
+  build_dir = os.sep.join([results_dir, 'tb_build', '%s_%s' % (sim, flavor) + ('_%s' % model if model != 'v' else '')])
+  os.makedirs(build_dir, exist_ok=True)
+  log = os.sep.join([build_dir, 'sim.log'])
+  exe = os.sep.join([build_dir, 'sim'])
+  params = { 'CYCLES'       : cycles
+           , 'SEED'         : seed
+           , 'CORRUPT_ON_X' : FLAVORS[flavor]
+           , 'CHECK_X'      : 1 if sim == 'iverilog' else 0
+           }
+
+  if sim == 'iverilog':
+    compile_cmd = ['iverilog', '-g2012', '-s', top, '-o', exe] + ['-P%s.%s=%d' % (top, k, v) for k, v in params.items()] + sources
+    run_cmd = ['vvp', '-n', exe]
+  else:
+    compile_cmd = ['verilator', '--binary', '--timing'] + (['-sv'] if MODELS[model][1] else []) + ['-Wno-fatal', '-Wno-lint', '-Wno-style',
+                   '--top-module', top, '-Mdir', build_dir, '-o', 'sim'] + ['-G%s=%d' % (k, v) for k, v in params.items()] + sources
+    run_cmd = [exe]
+
+  with open(log, 'w') as fid:
+    fid.write(' '.join(compile_cmd) + '\n')
+    fid.flush()
+    if subprocess.run(compile_cmd, stdout=fid, stderr=subprocess.STDOUT).returncode != 0:
+      return ('FAIL', 0, 0, 0.0, log)
+    fid.write(' '.join(run_cmd) + '\n')
+    fid.flush()
+    start = time.perf_counter()
+    out = subprocess.run(run_cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True).stdout
+    run_s = time.perf_counter() - start
+    fid.write(out)
+
+  m = None
+  for m in RE_RESULT.finditer(out):
+    pass
+  if m is None:
+    return ('FAIL', 0, 0, run_s, log)
+  return (m.group(1), int(m.group(2)), int(m.group(3)), run_s, log)
+
+### Entry point
+if __name__ == '__main__':
+  args = get_args()
+  sys.exit(main( args ))
@@ -2,7 +2,9 @@
 # CACTI CONFIG
 #
 # This list is used to write out the Cacti configuration file for the SRAMs we
-# are generating so we can extract the power, timing and area numbers.
+# are generating so we can extract the power, timing and area numbers. The
+# placeholders are filled in by utils/run_cacti.py (see utils/cacti_knobs.py
+# for the modeling parameters that can be changed from the configuration).
 ################################################################################
 
 # This configuration is baed on the cacti/cache.cfg file which is considered
@@ -12,53 +14,53 @@
 # stalls forever...
 
 cacti_config = '''# cacti.cfg
--size (bytes) {0}
--block size (bytes) {1}
--read-write port {2}
--exclusive read port {3}
--exclusive write port {4}
--technology (u) {5}
--output/input bus width {6}
--UCA bank count 1
--Array Power Gating - "false"
--WL Power Gating - "false"
--CL Power Gating - "false"
+-size (bytes) {size}
+-block size (bytes) {block_size}
+-read-write port {rw_ports}
+-exclusive read port {r_ports}
+-exclusive write port {w_ports}
+-technology (u) {tech_um}
+-output/input bus width {bus_width}
+-UCA bank count {banks}
+-Array Power Gating - "{power_gating}"
+-WL Power Gating - "{power_gating}"
+-CL Power Gating - "{power_gating}"
 -Bitline floating - "false"
--Interconnect Power Gating - "false"
+-Interconnect Power Gating - "{power_gating}"
 -Power Gating Performance Loss 0.01
 -associativity 1
 -single ended read ports 0
 -page size (bits) 8192 
 -burst length 8
 -internal prefetch width 8
--Data array cell type - "itrs-lop"
--Data array peripheral type - "itrs-hp"
--Tag array cell type - "itrs-lop"
--Tag array peripheral type - "itrs-hp"
--operating temperature (K) 300
--cache type "{8}"
+-Data array cell type - "{cell_type}"
+-Data array peripheral type - "{peripheral_type}"
+-Tag array cell type - "{cell_type}"
+-Tag array peripheral type - "{peripheral_type}"
+-operating temperature (K) {temperature_K}
+-cache type "{cache_type}"
 -tag size (b) "default"
--access mode (normal, sequential, fast) - "normal"
--design objective (weight delay, dynamic power, leakage power, cycle time, area) 0:0:0:100:0
--deviate (delay, dynamic power, leakage power, cycle time, area) 20:100000:100000:100000:100000
+-access mode (normal, sequential, fast) - "{access_mode}"
+-design objective (weight delay, dynamic power, leakage power, cycle time, area) {design_objective}
+-deviate (delay, dynamic power, leakage power, cycle time, area) {deviate}
 -NUCAdesign objective (weight delay, dynamic power, leakage power, cycle time, area) 100:100:0:0:100
 -NUCAdeviate (delay, dynamic power, leakage power, cycle time, area) 10:10000:10000:10000:10000
--Optimize ED or ED^2 (ED, ED^2, NONE): "NONE"
+-Optimize ED or ED^2 (ED, ED^2, NONE): "{optimize_ed}"
 -Cache model (NUCA, UCA)  - "UCA"
 -NUCA bank count 0
--Wire signaling (fullswing, lowswing, default) - "default"
--Wire inside mat - "default"
--Wire outside mat - "default"
--Interconnect projection - "conservative"
+-Wire signaling (fullswing, lowswing, default) - "{wire_signaling}"
+-Wire inside mat - "{wire_inside_mat}"
+-Wire outside mat - "{wire_outside_mat}"
+-Interconnect projection - "{interconnect_projection}"
 -Core count 8
 -Cache level (L2/L3) - "L3"
--Add ECC - "true"
+-Add ECC - "{ecc}"
 -Print level (DETAILED, CONCISE) - "DETAILED"
 -Print input parameters - "true"
--Force cache config - "false"
--Ndwl 1
--Ndbl 1
--Nspd 0
+-Force cache config - "{force}"
+-Ndwl {Ndwl}
+-Ndbl {Ndbl}
+-Nspd {Nspd}
 -Ndcm 1
 -Ndsam1 0
 -Ndsam2 0
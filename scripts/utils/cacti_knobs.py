@@ -0,0 +1,80 @@
+import re
+import sys
+
+from utils.class_corner import CACTI_DEVICE_TYPES
+
+################################################################################
+# CACTI KNOBS
+#
+# Cacti modeling parameters that can be changed from the json configuration
+# file. The "cacti" section can be set for the process and/or per SRAM (the
+# SRAM entries override the process entries one knob at a time):
+#
+#   "cacti": {
+#     "cell_type": "itrs-hp",                    # itrs-hp | itrs-lstp | itrs-lop | lp-dram | comm-dram
+#     "peripheral_type": "itrs-hp",              # same as cell_type
+#     "access_mode": "fast",                     # normal | sequential | fast
+#     "design_objective": "100:0:0:0:0",         # weights of delay, dynamic power, leakage, cycle time, area
+#     "deviate": "20:100000:100000:100000:100000",
+#     "optimize_ed": "NONE",                     # ED | ED^2 | NONE
+#     "wire_signaling": "default",               # fullswing | lowswing | default
+#     "wire_inside_mat": "default",              # global | semi-global | default
+#     "wire_outside_mat": "default",             # global | semi-global | default
+#     "interconnect_projection": "conservative", # conservative | aggressive
+#     "ecc": true
+#   }
+#
+# The cell and peripheral types of a PVT corner win over the ones set here
+# and a design objective set here wins over the one picked for the optimize
+# target (see utils/optimize_organization.py). Knobs that are not set keep the
+# values of the original Cacti configuration.
+################################################################################
+
+WEIGHTS = re.compile(r'\d+(:\d+){4}')
+
+# Knob: (default, allowed values or a pattern)
+CACTI_KNOBS = { 'cell_type'               : ('itrs-lop', CACTI_DEVICE_TYPES)
+              , 'peripheral_type'         : ('itrs-hp', CACTI_DEVICE_TYPES)
+              , 'access_mode'             : ('normal', ('normal', 'sequential', 'fast'))
+              , 'design_objective'        : (None, WEIGHTS)
+              , 'deviate'                 : ('20:100000:100000:100000:100000', WEIGHTS)
+              , 'optimize_ed'             : ('NONE', ('ED', 'ED^2', 'NONE'))
+              , 'wire_signaling'          : ('default', ('fullswing', 'lowswing', 'default'))
+              , 'wire_inside_mat'         : ('default', ('global', 'semi-global', 'default'))
+              , 'wire_outside_mat'        : ('default', ('global', 'semi-global', 'default'))
+              , 'interconnect_projection' : ('conservative', ('conservative', 'aggressive'))
+              , 'ecc'                     : ('true', ('true', 'false'))
+              }
+
+# cacti_overrides: the validated knobs set for an SRAM (process knobs updated
+# with the SRAM knobs)
+def cacti_overrides( process, sram_data ):
+  name = str(sram_data['name'])
+  knobs = dict(process.cacti)
+  knobs.update(sram_data['cacti'] if 'cacti' in sram_data else {})
+
+  overrides = {}
+  for knob, value in knobs.items():
+    if knob not in CACTI_KNOBS:
+      print(f'ERROR: unknown cacti knob "{knob}" for {name} (expected one of {", ".join(CACTI_KNOBS)})')
+      sys.exit(1)
+    if isinstance(value, bool):
+      value = 'true' if value else 'false'
+    elif isinstance(value, list):
+      value = ':'.join(str(v) for v in value)
+    value = str(value)
+    allowed = CACTI_KNOBS[knob][1]
+    if isinstance(allowed, tuple) and value not in allowed:
+      print(f'ERROR: cacti knob {knob} of {name} must be one of {", ".join(allowed)} (got "{value}")')
+      sys.exit(1)
+    if not isinstance(allowed, tuple) and not allowed.fullmatch(value):
+      print(f'ERROR: cacti knob {knob} of {name} must be 5 integer weights like "0:0:0:100:0" (got "{value}")')
+      sys.exit(1)
+    overrides[knob] = value
+  return overrides
+
+# cacti_knobs: every knob with the overrides applied
+def cacti_knobs( overrides ):
+  knobs = {knob: default for knob, (default, allowed) in CACTI_KNOBS.items()}
+  knobs.update(overrides)
+  return knobs
@@ -0,0 +1,164 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+
+################################################################################
+# CATALOG
+#
+# SQLite catalog of the generated macros. Every macro gets one row in the
+# "macros" table (configuration, Cacti knobs, Cacti and view PPA numbers and
+# the snapped macro size) and one row per generated file in the "views" table
+# (path and sha256 of the contents). Rerunning the generator replaces the rows of the
+# macros it generates, so the catalog can be shared by several configurations.
+# Macros are keyed by the process name and the macro name, so the same SRAM
+# can be in the catalog for several processes.
+# Tiled SRAMs get a row with the roll-up numbers (tiled = 1) next to the row of
+# their leaf macro.
+################################################################################
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS macros (
+  process              TEXT,
+  name                 TEXT,
+  tech_nm              INTEGER,
+  width                INTEGER,
+  depth                INTEGER,
+  banks                INTEGER,
+  ports                TEXT,
+  read_latency         INTEGER,
+  write_mask           TEXT,
+  power_gating         INTEGER,
+  cache_type           TEXT,
+  model                TEXT,
+  tiled                INTEGER,
+  tile_rows            INTEGER,
+  tile_cols            INTEGER,
+  leaf                 TEXT,
+  access_time_ns       REAL,
+  cycle_time_ns        REAL,
+  min_period_ns        REAL,
+  fmax_mhz             REAL,
+  clk_to_q_ns          REAL,
+  setup_ns             REAL,
+  hold_ns              REAL,
+  read_energy_nj       REAL,
+  write_energy_nj      REAL,
+  leakage_mW           REAL,
+  retention_leakage_mW REAL,
+  shutdown_leakage_mW  REAL,
+  wakeup_ns            REAL,
+  fo4_ps               REAL,
+  cacti_area_mm2       REAL,
+  width_um             REAL,
+  height_um            REAL,
+  area_um2             REAL,
+  results_dir          TEXT,
+  config               TEXT,
+  cacti_knobs          TEXT,
+  generated            TEXT,
+  PRIMARY KEY (process, name)
+);
+CREATE INDEX IF NOT EXISTS macros_by_size ON macros (tech_nm, width, depth);
+CREATE INDEX IF NOT EXISTS macros_by_area ON macros (area_um2);
+CREATE TABLE IF NOT EXISTS views (
+  process              TEXT,
+  name                 TEXT,
+  view                 TEXT,
+  path                 TEXT,
+  sha256               TEXT,
+  PRIMARY KEY (process, name, view)
+);
+'''
+
+# Bumped whenever SCHEMA changes (older catalogs are rebuilt)
+SCHEMA_VERSION = 5
+
+# Files of a macro that are views (the part of the file name after the macro
+# name is the view, e.g. ".lib", "_ss_0p9v_125c.lib" or ".bb.v")
+VIEW_EXTENSIONS = ('.lib', '.lef', '.v', '.gds', '.sdf')
+
+class Catalog:
+
+  def __init__( self, path ):
+    self.path = path
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    self.db = sqlite3.connect(path)
+    if self.db.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+      self.db.executescript('DROP TABLE IF EXISTS macros; DROP TABLE IF EXISTS views; PRAGMA user_version = %d;' % SCHEMA_VERSION)
+    self.db.executescript(SCHEMA)
+
+  def close( self ):
+    self.db.commit()
+    self.db.close()
+
+  # add: add (or replace) a generated macro. 'mem' is a Memory (or the
+  # roll-up memory of a TiledMemory, given as 'tiled').
+  def add( self, mem, tiled=None ):
+    name = mem.name
+    process = mem.process.name
+    row = { 'process'         : process
+          , 'name'            : name
+          , 'tech_nm'         : mem.process.tech_nm
+          , 'width'           : mem.width_in_bits
+          , 'depth'           : mem.depth
+          , 'banks'           : mem.num_banks
+          , 'ports'           : mem.port_type
+          , 'read_latency'    : mem.read_latency
+          , 'write_mask'      : mem.write_mask
+          , 'power_gating'    : 1 if mem.power_gating else 0
+          , 'cache_type'      : mem.cache_type
+          , 'model'           : ('regfile_' + mem.regfile_cell) if mem.regfile else 'cacti'
+          , 'tiled'           : 1 if tiled else 0
+          , 'tile_rows'       : tiled.rows if tiled else 1
+          , 'tile_cols'       : tiled.cols if tiled else 1
+          , 'leaf'            : tiled.leaf.name if tiled else None
+          , 'access_time_ns'  : mem.access_time_ns
+          , 'cycle_time_ns'   : mem.cycle_time_ns
+          , 'min_period_ns'   : mem.min_period_ns
+          , 'fmax_mhz'        : 1e3 / mem.min_period_ns
+          , 'clk_to_q_ns'     : mem.t_clk_to_q_ns
+          , 'setup_ns'        : mem.t_setup_ns
+          , 'hold_ns'         : mem.t_hold_ns
+          , 'read_energy_nj'  : mem.dyn_read_energy_nj
+          , 'write_energy_nj' : mem.dyn_write_energy_nj
+          , 'leakage_mW'      : mem.standby_leakage_mW
+          , 'retention_leakage_mW' : mem.retention_leakage_mW
+          , 'shutdown_leakage_mW'  : mem.shutdown_leakage_mW
+          , 'wakeup_ns'       : mem.wakeup_ns
+          , 'fo4_ps'          : mem.fo4_ps
+          , 'cacti_area_mm2'  : mem.area_mm2
+          , 'width_um'        : mem.width_um
+          , 'height_um'       : mem.height_um
+          , 'area_um2'        : mem.area_um2
+          , 'results_dir'     : mem.results_dir
+          , 'config'          : json.dumps(mem.sram_data, sort_keys=True)
+          , 'cacti_knobs'     : json.dumps(mem.cacti_overrides, sort_keys=True)
+          , 'generated'       : time.strftime("%Y-%m-%d %H:%M:%SZ", time.gmtime())
+          }
+    columns = ', '.join(row)
+    marks   = ', '.join('?' for _ in row)
+    self.db.execute('INSERT OR REPLACE INTO macros (%s) VALUES (%s)' % (columns, marks), list(row.values()))
+
+    self.db.execute('DELETE FROM views WHERE process = ? AND name = ?', (process, name))
+    for view, path in macro_views(mem.results_dir, name):
+      self.db.execute('INSERT INTO views (process, name, view, path, sha256) VALUES (?, ?, ?, ?, ?)', (process, name, view, path, file_sha256(path)))
+
+#
+# Helper functions for the views of a macro
+#
+def macro_views( results_dir, name ):
+  views = []
+  for f in sorted(os.listdir(results_dir)):
+    path = os.sep.join([results_dir, f])
+    if f.startswith(name) and f.endswith(VIEW_EXTENSIONS) and os.path.isfile(path):
+      views.append((f[len(name):], path))
+  return views
+
+def file_sha256( path ):
+  h = hashlib.sha256()
+  with open(path, 'rb') as fid:
+    for chunk in iter(lambda: fid.read(1 << 20), b''):
+      h.update(chunk)
+  return h.hexdigest()
@@ -0,0 +1,306 @@
+import os
+import re
+
+################################################################################
+# CHECK VIEWS
+#
+# Fast consistency checks for the views generated for a single SRAM. The .lef,
+# .lib, .v and .bb.v files are parsed with a handful of regular expressions
+# (no external tools) and the following is checked:
+#
+#   - every view has the same set of signal pins and bus widths
+#   - every LEF pin is inside the SIZE box and sits on the pin pitch grid
+#   - no LEF pin overlaps an obstruction or a supply strap on its layer
+#   - every Liberty table has the shape its index vectors ask for
+#
+# The .lib of every PVT corner (<name>_<corner>.lib) is checked like the
+# nominal one. A tiled SRAM (see TiledMemory) has no LEF of its own, so only
+# its wrapper views are checked (lef=False) and its leaf macro is checked as a
+# regular macro. Only the given views are looked for when the SRAMs were
+# generated with a subset of the views (run.py --views).
+#
+# check_macro() returns a list of error strings (empty if the macro is clean).
+################################################################################
+
+CHECKED_VIEWS = ('lib', 'lef', 'v', 'bb')
+
+def check_macro( results_dir, name, pin_pitch_nm, corners=(), lef=True, checked_views=CHECKED_VIEWS ):
+  errors = []
+  base = os.sep.join([results_dir, name])
+
+  views = {}
+  view_parsers = [('.lef', parse_lef)] if lef and 'lef' in checked_views else []
+  view_parsers += [('.lib', parse_lib)] if 'lib' in checked_views else []
+  view_parsers += [('.v', parse_verilog)] if 'v' in checked_views else []
+  view_parsers += [('.bb.v', parse_verilog)] if 'bb' in checked_views else []
+  view_parsers += [('_%s.lib' % corner, parse_lib) for corner in corners] if 'lib' in checked_views else []
+  for ext, parser in view_parsers:
+    path = base + ext
+    if not os.path.exists(path):
+      errors.append(f'{name}: missing view {os.path.basename(path)}')
+      continue
+    with open(path, 'r') as fid:
+      views[ext] = parser(fid.read())
+
+  # Pin sets and bus widths must match between all of the views
+  ports = {ext: view['ports'] for ext, view in views.items()}
+  if ports:
+    ref_ext, ref = next(iter(ports.items()))
+    for ext, other in ports.items():
+      for pin in sorted(set(ref) | set(other)):
+        if pin not in other:
+          errors.append(f'{name}: pin {pin} is in {ref_ext} but not in {ext}')
+        elif pin not in ref:
+          errors.append(f'{name}: pin {pin} is in {ext} but not in {ref_ext}')
+        elif ref[pin] != other[pin]:
+          errors.append(f'{name}: pin {pin} is {ref[pin]} bits in {ref_ext} but {other[pin]} bits in {ext}')
+
+  if '.lef' in views:
+    errors += check_lef_geometry( name, views['.lef'], pin_pitch_nm )
+  for ext, view in views.items():
+    if ext.endswith('.lib'):
+      errors += [f'{name}{ext[:-4]}: {e}' for e in view['errors']]
+
+  return errors
+
+#
+# LEF geometry checks
+#
+def check_lef_geometry( name, lef, pin_pitch_nm ):
+  errors = []
+  W, H = lef['size']
+
+  # Index the obstructions and supply straps of every layer by x and by y
+  # interval. Pins on the left/right edges are looked up by y and pins on the
+  # bottom/top edges by x so each lookup only returns nearby shapes. The trees
+  # are only built the first time they are needed.
+  shapes = {}
+  for layer, rect in lef['obs'] + lef['supply']:
+    shapes.setdefault(layer, []).append(rect)
+  trees = {}
+  def lookup( layer, axis, lo, hi ):
+    if (layer, axis) not in trees:
+      trees[(layer, axis)] = IntervalTree([(r[axis], r[axis+2], r) for r in shapes.get(layer, [])])
+    return trees[(layer, axis)].query(lo, hi)
+
+  for pin, layer, r in lef['signal']:
+    llx, lly, urx, ury = r
+    if llx < 0 or lly < 0 or urx > W or ury > H:
+      errors.append(f'{name}: pin {pin} is outside of the macro')
+    # Pins on the left/right edges are on a y grid, bottom/top on an x grid
+    side = llx == 0 or urx == W
+    center = (lly + ury) if side else (llx + urx)
+    if center % (2*pin_pitch_nm) != 0:
+      errors.append(f'{name}: pin {pin} is off the {pin_pitch_nm}nm pin grid')
+    lo, hi = (lly, ury) if side else (llx, urx)
+    for other in lookup(layer, 1 if side else 0, lo, hi):
+      if overlaps(r, other):
+        errors.append(f'{name}: pin {pin} overlaps an obstruction or strap on {layer}')
+        break
+
+  return errors
+
+def nm( um ):
+  return int(round(um * 1000))
+
+def overlaps( a, b ):
+  return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+#
+# Static centered interval tree. Items are (lo, hi, payload) tuples and
+# query(lo, hi) returns the payload of every item whose interval intersects
+# [lo, hi].
+#
+class IntervalTree:
+
+  def __init__( self, items ):
+    self.center = None
+    if not items:
+      return
+    mids = sorted(lo + hi for lo, hi, _ in items)
+    self.center = mids[len(mids)//2] / 2
+    left  = [i for i in items if i[1] < self.center]
+    right = [i for i in items if i[0] > self.center]
+    here  = [i for i in items if i[0] <= self.center <= i[1]]
+    self.by_lo = sorted(here, key=lambda i: i[0])
+    self.by_hi = sorted(here, key=lambda i: i[1], reverse=True)
+    self.left  = IntervalTree(left) if left else None
+    self.right = IntervalTree(right) if right else None
+
+  def query( self, lo, hi ):
+    found = []
+    node = [self]
+    while node:
+      n = node.pop()
+      if n is None or n.center is None:
+        continue
+      if hi < n.center:
+        found += [i[2] for i in _take_while(n.by_lo, lambda i: i[0] <= hi)]
+        node.append(n.left)
+      elif lo > n.center:
+        found += [i[2] for i in _take_while(n.by_hi, lambda i: i[1] >= lo)]
+        node.append(n.right)
+      else:
+        found += [i[2] for i in n.by_lo]
+        node.append(n.left)
+        node.append(n.right)
+    return found
+
+def _take_while( items, cond ):
+  for i in items:
+    if not cond(i):
+      break
+    yield i
+
+#
+# LEF parser: signal pin bus widths, pin shapes, supply shapes and obstructions.
+# A single pass over the statements that matter, all coordinates are in nm.
+#
+RE_LEF_STMT = re.compile(r'^[ \t]*(SIZE|PIN|END|USE|LAYER|RECT|OBS)\b[ \t]*([^;\n]*)', re.M)
+RE_BIT      = re.compile(r'^(\w+)\[(\d+)\]$')
+
+def parse_lef( text ):
+  size = (0, 0)
+  signal, supply, obs, bits = [], [], [], {}
+  pin, shapes, layer = None, None, None
+  for kw, arg in RE_LEF_STMT.findall(text):
+    if kw == 'RECT':
+      if shapes is not None:
+        shapes.append((layer, tuple(nm(float(v)) for v in arg.split())))
+    elif kw == 'LAYER':
+      layer = arg.strip()
+    elif kw == 'PIN':
+      pin, shapes = arg.strip(), []
+      signal_pin = True
+    elif kw == 'USE' and pin is not None:
+      signal_pin = arg.strip() not in ('POWER', 'GROUND')
+    elif kw == 'OBS':
+      pin, shapes = None, obs
+    elif kw == 'END':
+      if pin is not None and arg.strip() == pin:
+        if signal_pin:
+          signal += [(pin, l, r) for l, r in shapes]
+          b = RE_BIT.match(pin)
+          if b:
+            bits.setdefault(b.group(1), set()).add(int(b.group(2)))
+          else:
+            bits[pin] = None
+        else:
+          supply += shapes
+        pin, shapes = None, None
+      elif pin is None and shapes is obs and not arg.strip():
+        shapes = None
+    elif kw == 'SIZE':
+      v = arg.split()
+      size = (nm(float(v[0])), nm(float(v[2])))
+  ports = {p: (1 if b is None else max(b)+1) for p, b in bits.items()}
+  obs = [(l, r) for l, r in obs if l != 'OVERLAP']
+  return {'size': size, 'ports': ports, 'signal': signal, 'supply': supply, 'obs': obs}
+
+#
+# Liberty parser: pin/bus widths and lookup table shapes
+#
+RE_LIB_TYPE   = re.compile(r'type\s*\(\s*(\w+)\s*\)\s*\{[^}]*?bit_width\s*:\s*(\d+)', re.S)
+RE_LIB_PIN    = re.compile(r'^\s*(pin|bus)\s*\(\s*(\w+)\s*\)\s*\{', re.M)
+RE_LIB_BTYPE  = re.compile(r'bus_type\s*:\s*(\w+)')
+RE_LIB_LEAF   = re.compile(r'(\w+)\s*\(\s*(\w*)\s*\)\s*\{([^{}]*)\}')
+RE_LIB_INDEX  = re.compile(r'index_(\d)\s*\(\s*"([^"]*)"\s*\)')
+RE_LIB_VALUES = re.compile(r'values\s*\((.*?)\)', re.S)
+RE_LIB_VAR    = re.compile(r'variable_(\d)\s*:')
+
+def parse_lib( text ):
+  errors = []
+  types = {t: int(w) for t, w in RE_LIB_TYPE.findall(text)}
+
+  ports = {}
+  pins = list(RE_LIB_PIN.finditer(text))
+  for i, m in enumerate(pins):
+    kind, pin = m.group(1), m.group(2)
+    if kind == 'pin':
+      ports[pin] = 1
+      continue
+    end = pins[i+1].start() if i+1 < len(pins) else len(text)
+    t = RE_LIB_BTYPE.search(text, m.end(), end)
+    if not t or t.group(1) not in types:
+      errors.append(f'bus {pin} has no known bus_type')
+      ports[pin] = 0
+    else:
+      ports[pin] = types[t.group(1)]
+
+  templates = {}
+  for m in RE_LIB_LEAF.finditer(text):
+    kind, arg, body = m.groups()
+    if kind in ('lu_table_template', 'power_lut_template'):
+      templates[arg] = len(set(RE_LIB_VAR.findall(body)))
+      continue
+    values = RE_LIB_VALUES.search(body)
+    if not values:
+      continue
+    index = {int(k): v for k, v in RE_LIB_INDEX.findall(body)}
+    rows = re.findall(r'"([^"]*)"', values.group(1))
+    table = f'{kind}({arg})'
+    try:
+      rows = [[float(v) for v in r.split(',')] for r in rows]
+      index = {k: [float(v) for v in s.split(',')] for k, s in index.items()}
+    except ValueError:
+      errors.append(f'{table} has a non-numeric index or value')
+      continue
+    if arg in templates and templates[arg] != len(index):
+      errors.append(f'{table} has {len(index)} indices but its template has {templates[arg]}')
+    elif arg and arg not in templates:
+      errors.append(f'{table} uses undefined template {arg}')
+    for k, vec in index.items():
+      if any(b <= a for a, b in zip(vec, vec[1:])):
+        errors.append(f'{table} index_{k} is not strictly increasing')
+    if 2 in index:
+      shape_ok = len(rows) == len(index[1]) and all(len(r) == len(index[2]) for r in rows)
+      want = f'{len(index[1])}x{len(index[2])}'
+    else:
+      shape_ok = len(rows) == 1 and len(rows[0]) == len(index.get(1, []))
+      want = f'1x{len(index.get(1, []))}'
+    if not shape_ok:
+      errors.append(f'{table} values are not {want}')
+
+  return {'ports': ports, 'errors': errors}
+
+#
+# Verilog parser: port widths (parameters are substituted into the ranges)
+#
+RE_V_COMMENT = re.compile(r'//[^\n]*|/\*.*?\*/', re.S)
+RE_V_PARAM   = re.compile(r'parameter\s+(\w+)\s*=\s*([^;]+);')
+RE_V_PORT    = re.compile(r'^\s*(input|output|inout)\s+(?:reg\s+|wire\s+)?(?:\[([^\]]+):([^\]]+)\]\s*)?(\w+)\s*;', re.M)
+RE_V_IDENT   = re.compile(r'[A-Za-z_]\w*')
+
+def parse_verilog( text ):
+  text = RE_V_COMMENT.sub('', text)
+  params = {}
+  for p, v in RE_V_PARAM.findall(text):
+    params[p] = _vlog_eval(v, params)
+  ports = {}
+  for _, msb, lsb, port in RE_V_PORT.findall(text):
+    if msb:
+      ports[port] = abs(_vlog_eval(msb, params) - _vlog_eval(lsb, params)) + 1
+    else:
+      ports[port] = 1
+  return {'ports': ports}
+
+def _vlog_eval( expr, params ):
+  expr = RE_V_IDENT.sub(lambda m: str(params.get(m.group(0), 0)), expr)
+  if not re.fullmatch(r'[\d\s+\-*/()]*', expr):
+    return 0
+  return int(eval(expr.replace('/', '//')))
+
+#
+# Tiling of an SRAM
+#
+def tiled_leaf( results_dir ):
+  """Name of the leaf macro of a tiled SRAM (None if it is not tiled)"""
+  path = os.sep.join([results_dir, 'tiling.csv'])
+  if not os.path.exists(path):
+    return None
+  with open(path, 'r') as fid:
+    for line in fid.readlines()[1:]:
+      fields = [f.strip() for f in line.split(',')]
+      if fields[0] == '1':
+        return fields[1]
+  return None
@@ -0,0 +1,47 @@
+import sys
+
+################################################################################
+# CORNER CLASS
+#
+# This class stores one process/voltage/temperature corner from the "corners"
+# list of the json configuration file. Every corner gets its own Cacti run and
+# its own .lib file (<sram>_<corner>.lib) while the LEF and verilog views are
+# shared by all of the corners. A corner looks like:
+#
+#   {"name": "ss_0p90v_125c", "process": 1.2, "voltage": 0.9, "temperature_C": 125,
+#    "cell_type": "itrs-lop", "peripheral_type": "itrs-hp"}
+#
+# Cacti only models temperatures from 300K to 400K in 10K steps, so the Cacti
+# run uses the closest temperature in that range while the .lib keeps the
+# requested one. A corner without a cell or peripheral type uses the one of
+# the SRAM (see utils/cacti_knobs.py).
+################################################################################
+
+CACTI_DEVICE_TYPES = ('itrs-hp', 'itrs-lstp', 'itrs-lop', 'lp-dram', 'comm-dram')
+
+class Corner:
+
+  def __init__( self, corner_data, process ):
+
+    self.name            = str(corner_data['name'])
+    self.process_factor  = float(corner_data['process']) if 'process' in corner_data else 1.0
+    self.voltage         = float(corner_data['voltage']) if 'voltage' in corner_data else float(process.voltage)
+    self.temperature_C   = float(corner_data['temperature_C']) if 'temperature_C' in corner_data else 25.0
+    self.cell_type       = str(corner_data['cell_type']) if 'cell_type' in corner_data else None
+    self.peripheral_type = str(corner_data['peripheral_type']) if 'peripheral_type' in corner_data else None
+
+    for device_type in (self.cell_type, self.peripheral_type):
+      if device_type is not None and device_type not in CACTI_DEVICE_TYPES:
+        print(f'ERROR: unknown device type "{device_type}" in corner {self.name} (expected one of {", ".join(CACTI_DEVICE_TYPES)})')
+        sys.exit(1)
+
+    # Temperature handed to Cacti (in K)
+    temperature_K = int(round((self.temperature_C + 273.15) / 10.0)) * 10
+    self.cacti_temperature_K = min(400, max(300, temperature_K))
+    if self.cacti_temperature_K != temperature_K:
+      print(f'WARNING: corner {self.name} temperature {self.temperature_C}C is outside of the Cacti range, using {self.cacti_temperature_K}K')
+
+  # scale_energy: dynamic energy from the nominal process voltage to the
+  # voltage of this corner (E = CV^2).
+  def scale_energy( self, nominal_voltage ):
+    return (self.voltage / float(nominal_voltage))**2
@@ -0,0 +1,367 @@
+import math
+import re
+import sys
+
+################################################################################
+# LAYOUT CLASS
+#
+# This class computes the physical geometry of a memory macro: the location of
+# every signal pin on the macro boundary, the VDD/VSS supply straps and the
+# obstructions that surround them. Views that need the abstract geometry (such
+# as the LEF) simply write out what this class computes.
+#
+# Pins are grouped and the groups are spread over the edges listed in the
+# process "pinEdges" option. The grouping comes from the "pinOrder" option (set
+# for the process or per SRAM):
+#
+#   grouped     - w_mask_in, rd_out, wd_in, addr_in and control blocks for
+#                 every port (default)
+#   interleaved - one block with wd_in[i], w_mask_in[i] and rd_out[i] of
+#                 every port next to each other for every bit i (a byte mask
+#                 bit goes with the first bit of its byte), followed by the
+#                 addr_in and control blocks
+#   centered    - like interleaved with the addr_in and control blocks in the
+#                 middle of the data bits
+#
+# Pins on the left/right edges use the horizontal routing layer while pins on
+# the bottom/top edges use the vertical routing layer. The fewest edges that
+# fit all of the pins are used so the macro never has to grow to fit its pins.
+# The obstructions are cut around the pins wherever they end up.
+#
+# The VDD/VSS straps come from the process "straps" option so that they can
+# line up with the power grid of the top level:
+#
+#   "straps": {
+#     "layer": "metal4",            # strap layer (default metal 4)
+#     "direction": "horizontal",    # default horizontal (vertical with flipPins)
+#     "width_nm": 280,              # default 4 pin widths
+#     "pitch_nm": 1120,             # distance between neighbouring VSS and VDD
+#                                   # straps (default 8 pin pitches)
+#     "offset_nm": 0,               # first grid line from the grid origin
+#                                   # (default 10 pin pitches)
+#     "grid_origin_nm": [0, 0]      # origin of the top level grid in macro
+#                                   # coordinates (default the macro origin)
+#   }
+#
+# The obstructions come from the "obstructions" option (set for the process
+# or per SRAM). Layers up to "full_up_to" are blocked over the whole macro,
+# the layers above it up to "core_up_to" only over the array core (the Cacti
+# footprint, above the output registers, shrunk by "core_margin_nm") so that
+# routes can use the channels around it, and the layers above both are left
+# free. Pins and straps are always cut out of the obstructions.
+#
+#   "obstructions": {
+#     "full_up_to": "metal2",       # default metal 4 (or the strap layer
+#                                   # if higher)
+#     "core_up_to": "metal4",       # default no core-only layers
+#     "core_margin_nm": 1400        # default 10 pin pitches
+#   }
+################################################################################
+
+EDGES = ('left', 'right', 'bottom', 'top')
+
+PIN_ORDERS = ('grouped', 'interleaved', 'centered')
+
+class Layout:
+
+  def __init__( self, mem ):
+
+    self.mem  = mem
+    self.name = mem.name
+    self.w    = mem.width_um
+    self.h    = mem.height_um
+
+    process = mem.process
+    self.metalPrefix = process.metalPrefix
+    self.flip        = process.flipPins.lower() == 'true'
+    self.pin_width   = process.pinWidth_um
+    self.pin_height  = process.pinHeight_um
+    self.pin_pitch   = process.pinPitch_um
+
+    # Metal 1 vertical (not flipped) means metal 3 is vertical and metal 4 is
+    # horizontal, flipped is the other way around.
+    self.h_layer = self.metalPrefix + ('3' if self.flip else '4')
+    self.v_layer = self.metalPrefix + ('4' if self.flip else '3')
+
+    # Offset from the macro edges to the first pin / strap
+    self.x_offset = 10 * self.pin_pitch   ;# arbitrary offset (looks decent)
+    self.y_offset = 10 * self.pin_pitch   ;# arbitrary offset (looks decent)
+
+    # Each pin is (name, direction, layer, (llx, lly, urx, ury)), each strap
+    # is (layer, (llx, lly, urx, ury)) and obstructions are a list of rects
+    # for each layer.
+    self.pins   = []
+    self.straps = {'VSS': [], 'VDD': []}
+    self.obs    = {}
+
+    self.__place_pins()
+    self.__place_straps()
+    self.__place_obs()
+
+  # pin_groups: the signal pins of the macro as an ordered list of groups
+  # (see "pinOrder" above). Each group is a list of (pin name, direction)
+  # tuples and the clock (and the sleep_in/ret_in pins of a power-gated
+  # macro) goes in with the control pins of the last port.
+  def pin_groups( self ):
+    bits       = int(self.mem.width_in_bits)
+    mask_bits  = int(self.mem.mask_bits)
+    addr_width = math.ceil(math.log2(self.mem.depth))
+
+    addr_ctrl = []
+    for port in self.mem.ports:
+      addr_ctrl.append([('%s[%d]'%(port.addr_in, i), 'INPUT') for i in range(addr_width)])
+      control = [(port.we_in, 'INPUT')] if port.we_in else []
+      if self.mem.ce_bits > 1:
+        control += [('%s[%d]'%(port.ce_in, b), 'INPUT') for b in range(self.mem.ce_bits)]
+      else:
+        control.append((port.ce_in, 'INPUT'))
+      addr_ctrl.append(control)
+    addr_ctrl[-1].append(('clk', 'INPUT'))
+    if self.mem.power_gating:
+      addr_ctrl[-1] += [('sleep_in', 'INPUT'), ('ret_in', 'INPUT')]
+
+    if self.mem.pin_order == 'grouped':
+      groups = []
+      for port, addr, ctrl in zip(self.mem.ports, addr_ctrl[0::2], addr_ctrl[1::2]):
+        if port.w_mask_in:
+          groups.append([('%s[%d]'%(port.w_mask_in, i), 'INPUT') for i in range(mask_bits)])
+        if port.read:
+          groups.append([('%s[%d]'%(port.rd_out, i), 'OUTPUT') for i in range(bits)])
+        if port.write:
+          groups.append([('%s[%d]'%(port.wd_in, i), 'INPUT') for i in range(bits)])
+        groups += [addr, ctrl]
+      return groups
+
+    # Bit slices of every port's data pins
+    slices = []
+    mask_step = 8 if self.mem.write_mask == 'byte' else 1
+    for i in range(bits):
+      if i == bits // 2:
+        half = len(slices)
+      for port in self.mem.ports:
+        if port.write:
+          slices.append(('%s[%d]'%(port.wd_in, i), 'INPUT'))
+          if port.w_mask_in and i % mask_step == 0:
+            slices.append(('%s[%d]'%(port.w_mask_in, i // mask_step), 'INPUT'))
+        if port.read:
+          slices.append(('%s[%d]'%(port.rd_out, i), 'OUTPUT'))
+    if self.mem.pin_order == 'interleaved':
+      return [slices] + addr_ctrl
+    return [slices[:half]] + addr_ctrl + [slices[half:]]
+
+  # edge_tracks: number of pin tracks available along the given edge
+  def edge_tracks( self, edge ):
+    if edge in ('left', 'right'):
+      span = self.h - 2*self.y_offset
+    else:
+      span = self.w - 2*self.x_offset
+    return max(0, math.floor(span / self.pin_pitch))
+
+  # __assign_edges: distribute the pin groups over the first few edges that
+  # fit them all. Groups are kept whole whenever the next edge can take them
+  # and are only split across edges when they have to be. When keeping groups
+  # whole leaves tracks unused, the edges are filled in order instead.
+  def __assign_edges( self, groups ):
+    allowed = self.mem.process.pinEdges
+    total   = sum(len(g) for g in groups)
+    for count in range(1, len(allowed)+1):
+      edges = allowed[:count]
+      caps  = [self.edge_tracks(e) for e in edges]
+      if sum(caps) < total:
+        continue
+      # Try a balanced fill first, then fall back to filling each edge
+      balanced = [min(c, math.ceil(total * c / sum(caps))) for c in caps]
+      for limits, whole in ((balanced, True), (caps, True), (caps, False)):
+        assignment = self.__pack_groups( groups, limits, whole )
+        if assignment:
+          return edges, caps, assignment
+    return None, None, None
+
+  @staticmethod
+  def __pack_groups( groups, limits, whole=True ):
+    assignment = [[] for _ in limits]
+    used = [0 for _ in limits]
+    e = 0
+    for group in groups:
+      pins = list(group)
+      while pins:
+        if e >= len(limits):
+          return None
+        free = limits[e] - used[e]
+        if free <= 0:
+          e += 1
+          continue
+        if whole and len(pins) > free and used[e] > 0 and e+1 < len(limits) and len(pins) <= limits[e+1]:
+          e += 1
+          continue
+        take, pins = pins[:free], pins[free:]
+        assignment[e].append(take)
+        used[e] += len(take)
+    return assignment
+
+  # __pin_rect: rectangle of a pin centered at 'pos' along the given edge
+  def __pin_rect( self, edge, pos ):
+    hpw = self.pin_width / 2.0
+    ph  = self.pin_height
+    if edge == 'left':   return (0, pos-hpw, ph, pos+hpw)
+    if edge == 'right':  return (self.w-ph, pos-hpw, self.w, pos+hpw)
+    if edge == 'bottom': return (pos-hpw, 0, pos+hpw, ph)
+    return (pos-hpw, self.h-ph, pos+hpw, self.h)
+
+  def __place_pins( self ):
+    groups = self.pin_groups()
+    number_of_pins = sum(len(g) for g in groups)
+    edges, caps, assignment = self.__assign_edges( groups )
+
+    print(f'Final {self.name} size = {self.w} x {self.h}')
+    if edges is None:
+      available = sum(self.edge_tracks(e) for e in self.mem.process.pinEdges)
+      print(f'num pins: {number_of_pins}, available tracks: {available}')
+      print("ERROR: not enough tracks!")
+      sys.exit(1)
+    print(f'num pins: {number_of_pins}, available tracks: {sum(caps)} ({", ".join(edges)})')
+
+    self.pin_edges = {}
+    for edge, cap, edge_groups in zip(edges, caps, assignment):
+      if not edge_groups:
+        continue
+      n = sum(len(g) for g in edge_groups)
+      # Spread the pins over the edge using a multiple of the min pitch, the
+      # spare tracks are used to separate the pin groups.
+      track_count = max(1, (cap-1) // n)
+      pin_pitch   = self.pin_pitch * track_count
+      group_pitch = math.floor((cap - n*track_count) / max(1, len(edge_groups)-1)) * self.pin_pitch
+      group_pitch = max(group_pitch, self.pin_pitch)
+      layer = self.h_layer if edge in ('left', 'right') else self.v_layer
+      pos = self.y_offset if edge in ('left', 'right') else self.x_offset
+      for i, group in enumerate(edge_groups):
+        if i > 0:
+          pos += group_pitch - pin_pitch
+        for pin_name, direction in group:
+          self.pins.append((pin_name, direction, layer, self.__pin_rect(edge, pos)))
+          self.pin_edges[pin_name] = edge
+          pos += pin_pitch
+
+  # __place_straps: alternating VSS/VDD straps on the grid set by the process
+  # "straps" option. Straps sit at grid origin + offset + k*pitch (VSS for even
+  # k and VDD for odd k, so neighbouring macros placed on the grid agree) and
+  # only the grid lines at least x/y_offset away from the macro edges are used.
+  def __place_straps( self ):
+    straps = self.mem.process.straps
+    self.strap_layer = str(straps['layer']) if 'layer' in straps else '%s4' % self.metalPrefix
+    width     = float(straps['width_nm'])/1000.0 if 'width_nm' in straps else self.pin_width*4
+    pitch     = float(straps['pitch_nm'])/1000.0 if 'pitch_nm' in straps else self.pin_pitch*8
+    direction = str(straps['direction']) if 'direction' in straps else ('vertical' if self.flip else 'horizontal')
+    origin    = [float(v)/1000.0 for v in straps['grid_origin_nm']] if 'grid_origin_nm' in straps else [0.0, 0.0]
+    if width >= pitch:
+      print(f'ERROR: strap width ({width}um) must be smaller than the strap pitch ({pitch}um)')
+      sys.exit(1)
+    half_width = width/2
+    w, h = self.w, self.h
+
+    # Vertical straps
+    if direction == 'vertical':
+      offset = float(straps['offset_nm'])/1000.0 if 'offset_nm' in straps else self.x_offset
+      for k, x in strap_positions(origin[0] + offset, pitch, self.x_offset, w - self.x_offset):
+        rect = (x-half_width, self.y_offset, x+half_width, h-self.y_offset)
+        self.straps['VSS' if k%2 == 0 else 'VDD'].append((self.strap_layer, rect))
+
+    # Horizontal straps
+    else:
+      offset = float(straps['offset_nm'])/1000.0 if 'offset_nm' in straps else self.y_offset
+      for k, y in strap_positions(origin[1] + offset, pitch, self.y_offset, h - self.y_offset):
+        rect = (self.x_offset, y-half_width, w-self.x_offset, y+half_width)
+        self.straps['VSS' if k%2 == 0 else 'VDD'].append((self.strap_layer, rect))
+
+  # __place_obs: block the layers up to full_up_to everywhere and the layers
+  # up to core_up_to over the array core (see "obstructions" above), except
+  # for the pins and straps on each layer.
+  def __place_obs( self ):
+    sram_data = self.mem.sram_data
+    policy = sram_data['obstructions'] if 'obstructions' in sram_data else self.mem.process.obstructions
+    full_n = self.__layer_number(policy['full_up_to'], 'full_up_to') if 'full_up_to' in policy else max(4, self.__layer_number(self.strap_layer, 'strap layer'))
+    core_n = self.__layer_number(policy['core_up_to'], 'core_up_to') if 'core_up_to' in policy else 0
+    margin = float(policy['core_margin_nm'])/1000.0 if 'core_margin_nm' in policy else None
+    box = (0, 0, self.w, self.h)
+    core = self.core_box(margin)
+    for n in range(1, max(full_n, core_n)+1):
+      layer = '%s%d' % (self.metalPrefix, n)
+      region = box if n <= full_n else core
+      if region is None:
+        continue
+      holes = [r for (_, _, l, r) in self.pins if l == layer]
+      holes += [r for s in self.straps.values() for (l, r) in s if l == layer]
+      rects = subtract_rects( region, holes )
+      if rects:
+        self.obs[layer] = rects
+
+  # core_box: the Cacti array footprint inside the macro (centered across the
+  # macro and above the output registers) shrunk by the margin (default
+  # x/y_offset), or None if nothing is left of it
+  def core_box( self, margin=None ):
+    mx = self.x_offset if margin is None else margin
+    my = self.y_offset if margin is None else margin
+    x0 = (self.w - self.mem.array_width_um) / 2
+    y0 = self.mem.out_reg_height_um
+    box = (max(0, x0 + mx), max(0, y0 + my), min(self.w, x0 + self.mem.array_width_um - mx), min(self.h, y0 + self.mem.array_height_um - my))
+    if box[0] >= box[2] or box[1] >= box[3]:
+      return None
+    return box
+
+  # __layer_number: the number of a metal layer name (metalPrefix<n>)
+  def __layer_number( self, layer, what ):
+    m = re.fullmatch(re.escape(self.metalPrefix) + r'(\d+)', str(layer))
+    if m is None:
+      print(f'ERROR: {what} {layer} is not a {self.metalPrefix}<n> layer')
+      sys.exit(1)
+    return int(m.group(1))
+
+#
+# Helper function that lists the (grid index, position) of the strap grid
+# lines start + k*pitch between lo and hi
+#
+def strap_positions( start, pitch, lo, hi ):
+  k = math.ceil(round((lo - start) / pitch, 6))
+  positions = []
+  while round(start + k*pitch, 6) <= round(hi, 6):
+    positions.append((k, start + k*pitch))
+    k += 1
+  return positions
+
+#
+# Helper function that covers 'box' minus the 'holes' with rectangles. The box
+# is cut into vertical slabs at every hole edge and identical neighbouring
+# slabs are merged together.
+#
+def subtract_rects( box, holes ):
+
+  def q( v ):
+    return round(v, 6)
+
+  x0, y0, x1, y1 = [q(v) for v in box]
+  holes = [(max(q(a), x0), max(q(b), y0), min(q(c), x1), min(q(d), y1)) for (a, b, c, d) in holes]
+  holes = [r for r in holes if r[0] < r[2] and r[1] < r[3]]
+
+  xs = sorted(set([x0, x1] + [r[0] for r in holes] + [r[2] for r in holes]))
+  rects  = []
+  active = {}
+  for xa, xb in zip(xs, xs[1:]):
+    cuts = sorted((r[1], r[3]) for r in holes if r[0] <= xa and r[2] >= xb)
+    free = []
+    y = y0
+    for lo, hi in cuts:
+      if lo > y:
+        free.append((y, lo))
+      y = max(y, hi)
+    if y < y1:
+      free.append((y, y1))
+    for span in list(active):
+      if span not in free:
+        rects.append((active.pop(span), span[0], xa, span[1]))
+    for span in free:
+      if span not in active:
+        active[span] = xa
+  for span, xa in active.items():
+    rects.append((xa, span[0], x1, span[1]))
+
+  return sorted(rects)
@@ -1,8 +1,15 @@
+import copy
 import math
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from utils.cacti_config import cacti_config
+from utils.run_cacti import write_cacti_config, run_cacti, read_cacti_results
+from utils.optimize_organization import optimize_organization
+from utils.class_layout import Layout, PIN_ORDERS
+from utils.class_port import make_ports
+from utils.cacti_knobs import cacti_overrides, cacti_knobs
+from utils.regfile_model import regfile_selected, regfile_cell, regfile_results
 
 ################################################################################
 # MEMORY CLASS
@@ -10,82 +17,261 @@ from utils.cacti_config import cacti_config
 # This class stores the infromation about a specific memory that is being
 # generated. This class takes in a process object, the infromation in one of
 # the items in the "sram" list section of the json configuration file, and
-# finally runs cacti to generate the rest of the data.
+# finally runs cacti to generate the rest of the data (see model()).
 ################################################################################
 
+# Leakage of a power-gated macro while it sleeps as a fraction of its awake
+# leakage (Cacti only reports the awake leakage) and its wake-up time on top
+# of a cycle (see "power_gating" below)
+RETENTION_LEAKAGE = 0.5   ;# arbitrary (the array stays powered, the periphery is off)
+SHUTDOWN_LEAKAGE  = 0.05  ;# arbitrary (only the sleep transistors leak)
+WAKEUP_FO4        = 20    ;# arbitrary (ramping the virtual supply back up)
+
 class Memory:
 
-  def __init__( self, process, sram_data , output_dir = None, cacti_dir = None):
+  def __init__( self, process, sram_data , output_dir = None, cacti_dir = None, model = True):
 
     self.process        = process
+    self.sram_data      = sram_data
     self.name           = str(sram_data['name'])
     self.width_in_bits  = int(sram_data['width'])
     self.depth          = int(sram_data['depth'])
     self.num_banks      = int(sram_data['banks'])
     self.cache_type     = str(sram_data['type']) if 'type' in sram_data else 'cache'
-    self.rw_ports       = 1
+    self.port_type      = str(sram_data['ports']) if 'ports' in sram_data else '1rw'
+    self.write_mask     = str(sram_data['write_mask']) if 'write_mask' in sram_data else 'bit'
+    self.ports          = make_ports(self.port_type, self.write_mask)
+    self.rw_ports       = sum(1 for p in self.ports if p.kind == 'rw')
+    self.r_ports        = sum(1 for p in self.ports if p.kind == 'r')
+    self.w_ports        = sum(1 for p in self.ports if p.kind == 'w')
+    self.read_latency   = int(sram_data['read_latency']) if 'read_latency' in sram_data else 1
+    self.power_gating   = bool(sram_data['power_gating']) if 'power_gating' in sram_data else False
+    self.power_gating_options = sram_data['power_gating'] if self.power_gating and isinstance(sram_data['power_gating'], dict) else {}
+    self.optimize       = sram_data['optimize'] if 'optimize' in sram_data else process.optimize
+    self.cacti_overrides = cacti_overrides(process, sram_data)
+    self.cacti_knobs    = cacti_knobs(self.cacti_overrides)
+    self.pin_order      = str(sram_data['pinOrder']) if 'pinOrder' in sram_data else process.pinOrder
+    if self.pin_order not in PIN_ORDERS:
+      print(f'ERROR: unknown pinOrder "{self.pin_order}" for {self.name} (expected one of {", ".join(PIN_ORDERS)})')
+      sys.exit(1)
+    if self.read_latency not in (1, 2):
+      print(f'ERROR: read_latency of {self.name} must be 1 or 2 (got {self.read_latency})')
+      sys.exit(1)
+    for key in ('retention_leakage', 'shutdown_leakage'):
+      if key in self.power_gating_options and not 0 <= float(self.power_gating_options[key]) <= 1:
+        print(f'ERROR: power_gating {key} of {self.name} must be a fraction between 0 and 1')
+        sys.exit(1)
     self.width_in_bytes = math.ceil(self.width_in_bits / 8.0)
+    self.mask_bits      = {'bit': self.width_in_bits, 'byte': self.width_in_bytes, 'none': 0}[self.write_mask]
     self.total_size     = self.width_in_bytes * self.depth
-    if output_dir: # Output dir was set by command line option
-      p = str(Path(output_dir).expanduser().resolve(strict=False))
-      self.results_dir = os.sep.join([p, self.name])
-    else:
-      self.results_dir = os.sep.join([os.getcwd(), 'results', self.name])
-    if not os.path.exists( self.results_dir ):
-      os.makedirs( self.results_dir )
+    self.results_dir    = Memory.results_dir_for(self.name, output_dir)
     if cacti_dir:
       self.cacti_dir = cacti_dir
     else:
       self.cacti_dir = os.environ['CACTI_BUILD_DIR']
-    self.__run_cacti()
-    with open( os.sep.join([self.results_dir, 'cacti.cfg.out']), 'r' ) as fid:
-      lines = [line for line in fid]
-      cacti_data = lines[-1].split(',')
-
-    self.tech_node_nm                = int(cacti_data[0])
-    self.capacity_bytes              = int(cacti_data[1])
-    self.associativity               = int(cacti_data[2])
-    self.output_width_bits           = int(cacti_data[3])
-    self.access_time_ns              = float(cacti_data[4])
-    self.cycle_time_ns               = float(cacti_data[5])
-    #self.dyn_search_energy_nj        = float(cacti_data[6])
-    self.dyn_read_energy_nj          = float(cacti_data[7])
-    self.dyn_write_energy_nj         = float(cacti_data[8])
-    self.standby_leakage_per_bank_mW = float(cacti_data[9])
-    self.area_mm2                    = float(cacti_data[10])
-    self.fo4_ps                      = float(cacti_data[11])
-    self.width_um                    = float(cacti_data[12])
-    self.height_um                   = float(cacti_data[13])
+
+    # Small memories use the register file model (see utils/regfile_model.py),
+    # the others either search for the best organization or let cacti pick one
+    self.regfile = regfile_selected(process, sram_data, self.width_in_bits, self.depth)
+    if self.regfile:
+      self.regfile_cell = regfile_cell(process, sram_data)
+    self.organization = {'banks': self.num_banks}
+
+    # Per-bank chip enables: ce_in is one bit per bank and bank b holds the
+    # words b*bank_depth up to (b+1)*bank_depth-1
+    self.bank_enables = bool(sram_data['bank_enables']) if 'bank_enables' in sram_data else False
 
     self.cap_input_pf = 0.005
 
+    self.t_setup_ns = 0.050  ;# arbitrary 50ps setup
+    self.t_hold_ns  = 0.050  ;# arbitrary 50ps hold
+
+    # Cacti results for every PVT corner (the nominal results are used for
+    # the shared physical views)
+    self.corner = None
+    self.__corner_data = None
+
+    self.__layout = None
+
+    # The Cacti (or register file model) results and everything sized from
+    # them, see model(). The bank count an optimized memory with per-bank
+    # enables picks changes its pins, so it is always modeled right away.
+    self.modeled = False
+    if model or (self.bank_enables and self.optimize):
+      self.model()
+    else:
+      self.__set_banks()
+
+  # model: the Cacti (or register file model) results of this memory and the
+  # macro size, timing and power from them. A memory created with model=False
+  # only does this the first time it is asked for, so views that only need
+  # the pins (verilog, black-box, testbench) never pay for a Cacti run.
+  def model( self ):
+    if self.modeled:
+      return self
+    self.modeled = True
+
+    if self.regfile:
+      cacti_data = regfile_results(self)
+      print(f'{self.name} uses the {self.regfile_cell} register file model')
+    elif self.optimize:
+      self.organization, cacti_data = optimize_organization(self)
+    else:
+      cacti_data = self.__run_cacti()
+    self.num_banks = self.organization['banks']
+    self.__set_banks()
+
+    self.cacti_results               = cacti_data
+    self.tech_node_nm                = cacti_data.tech_node_nm
+    self.capacity_bytes              = cacti_data.capacity_bytes
+    self.associativity               = cacti_data.associativity
+    self.output_width_bits           = cacti_data.output_width_bits
+    self.area_mm2                    = cacti_data.area_mm2
+    self.width_um                    = cacti_data.width_um
+    self.height_um                   = cacti_data.height_um
+    self.__set_electrical(cacti_data)
+
     self.tech_node_um = self.tech_node_nm / 1000.0
 
     print(f'Original {self.name} size = {self.width_um} x {self.height_um}')
+
+    # Footprint of the Cacti array (the core of the macro, see Layout)
+    self.array_width_um  = self.width_um
+    self.array_height_um = self.height_um
+
+    # Output register stage (read_latency 2): one flop per read data bit. The
+    # flops are placed in a strip along the bottom of the array so they only
+    # make the macro taller.
+    self.num_out_regs = (self.read_latency - 1) * self.width_in_bits * (self.rw_ports + self.r_ports)
+    self.out_reg_area_um2 = self.num_out_regs * 2000 * (self.tech_node_um**2)  ;# arbitrary ~2000 F^2 per flop
+    self.out_reg_height_um = self.out_reg_area_um2 / self.width_um
+    self.height_um += self.out_reg_height_um
+
     # Adjust to snap
     self.width_um = (math.ceil((self.width_um*1000.0)/self.process.snapWidth_nm)*self.process.snapWidth_nm)/1000.0
     self.height_um = (math.ceil((self.height_um*1000.0)/self.process.snapHeight_nm)*self.process.snapHeight_nm)/1000.0
     self.area_um2 = self.width_um * self.height_um
+    return self
+
+  # __set_banks: the chip enable bits and words per bank for the bank count
+  def __set_banks( self ):
+    self.ce_bits    = self.num_banks if self.bank_enables else 1
+    self.bank_depth = self.depth // self.num_banks
+    if self.bank_enables and self.depth % self.num_banks != 0:
+      print(f'ERROR: depth of {self.name} ({self.depth}) must be a multiple of its {self.num_banks} banks for bank_enables')
+      sys.exit(1)
+
+  # results_dir_for: the (created if needed) directory for the views of the
+  # named memory.
+  @staticmethod
+  def results_dir_for( name, output_dir = None ):
+    if output_dir: # Output dir was set by command line option
+      p = str(Path(output_dir).expanduser().resolve(strict=False))
+      results_dir = os.sep.join([p, name])
+    else:
+      results_dir = os.sep.join([os.getcwd(), 'results', name])
+    if not os.path.exists( results_dir ):
+      os.makedirs( results_dir )
+    return results_dir
+
+  # layout: the pin, strap and obstruction geometry of this memory. This is
+  # computed the first time it is asked for and shared by all of the views.
+  def layout( self ):
+    if self.__layout is None:
+      self.__layout = Layout(self.model())
+    return self.__layout
+
+  # corner_data: the Cacti (or register file model) results of every corner
+  # of the process. The corner runs are only done the first time they are
+  # asked for, so views that don't need them (everything but the .lib and
+  # .sdf) never pay for them.
+  def corner_data( self ):
+    if self.__corner_data is None:
+      self.model()
+      if self.regfile:
+        self.__corner_data = {corner.name: regfile_results(self, corner) for corner in self.process.corners}
+      else:
+        self.__corner_data = self.__run_corner_cacti() if self.process.corners else {}
+    return self.__corner_data
+
+  # at_corner: a copy of this memory with the timing and power of the given
+  # corner. The geometry of the copy is the same as the nominal memory.
+  def at_corner( self, corner ):
+    mem = copy.copy(self)
+    mem.corner = corner
+    mem.__set_electrical(self.corner_data()[corner.name], corner.scale_energy(self.process.voltage))
+    return mem
+
+  # __set_electrical: timing and power numbers from the Cacti results,
+  # with the dynamic energy scaled by the given factor.
+  def __set_electrical( self, cacti_data, energy_scale=1.0 ):
+    self.access_time_ns              = cacti_data.access_time_ns
+    self.cycle_time_ns               = cacti_data.cycle_time_ns
+    #self.dyn_search_energy_nj        = cacti_data.dyn_search_energy_nj
+    self.dyn_read_energy_nj          = cacti_data.dyn_read_energy_nj * energy_scale
+    self.dyn_write_energy_nj         = cacti_data.dyn_write_energy_nj * energy_scale
+    self.standby_leakage_per_bank_mW = cacti_data.standby_leakage_per_bank_mW
+    self.standby_leakage_mW          = self.standby_leakage_per_bank_mW * self.num_banks
+    self.fo4_ps                      = cacti_data.fo4_ps
+
+    # Power gating: sleep_in high gates the macro off, keeping the array
+    # powered (retention) while ret_in is high. The first clock edge after
+    # sleep_in falls has to be wakeup_ns later.
+    if self.power_gating:
+      opts = self.power_gating_options
+      self.retention_leakage_mW = self.standby_leakage_mW * (float(opts['retention_leakage']) if 'retention_leakage' in opts else RETENTION_LEAKAGE)
+      self.shutdown_leakage_mW  = self.standby_leakage_mW * (float(opts['shutdown_leakage']) if 'shutdown_leakage' in opts else SHUTDOWN_LEAKAGE)
+      self.wakeup_ns            = float(opts['wakeup_ns']) if 'wakeup_ns' in opts else self.cycle_time_ns + WAKEUP_FO4 * self.fo4_ps / 1e3
+    else:
+      self.retention_leakage_mW = self.standby_leakage_mW
+      self.shutdown_leakage_mW  = self.standby_leakage_mW
+      self.wakeup_ns            = 0.0
 
     #self.pin_dynamic_power_mW = (0.5 * self.cap_input_pf * (float(self.process.voltage)**2))*1e9 ;# P = 0.5*CV^2
     self.pin_dynamic_power_mW = self.dyn_write_energy_nj
 
-    self.t_setup_ns = 0.050  ;# arbitrary 50ps setup
-    self.t_hold_ns  = 0.050  ;# arbitrary 50ps hold
+    # With an output register the read data comes from a flop (clk->Q of
+    # about 3 FO4) one cycle later, and the array read has to make it through
+    # the flop setup (about 2 FO4) within a single cycle.
+    if self.read_latency == 1:
+      self.t_clk_to_q_ns = self.access_time_ns
+      self.min_period_ns = self.cycle_time_ns
+    else:
+      self.t_clk_to_q_ns = 3 * self.fo4_ps / 1e3
+      self.min_period_ns = max(self.cycle_time_ns, self.access_time_ns + 2 * self.fo4_ps / 1e3)
+
+  # __run_corner_cacti: run cacti for every corner of the process (in
+  # parallel, each in its own directory under <results_dir>/corners) using the
+  # same organization as the nominal run.
+  def __run_corner_cacti( self ):
+    def evaluate( corner ):
+      run_dir = os.sep.join([self.results_dir, 'corners', corner.name])
+      os.makedirs(run_dir, exist_ok=True)
+      cfg_path = os.sep.join([run_dir, 'cacti.cfg'])
+      write_cacti_config(self, cfg_path, self.organization, corner)
+      run_cacti(cfg_path, self.cacti_dir, log=os.sep.join([run_dir, 'cacti.log']))
+      return read_cacti_results(cfg_path, self)
+
+    with ThreadPoolExecutor(max_workers=len(self.process.corners)) as pool:
+      results = list(pool.map(evaluate, self.process.corners))
+
+    corner_data = {}
+    for corner, data in zip(self.process.corners, results):
+      if data is None:
+        print(f'ERROR: cacti failed for {self.name} at corner {corner.name}')
+        sys.exit(1)
+      corner_data[corner.name] = data
+    return corner_data
 
   # __run_cacti: shell out to cacti to generate a csv file with more data
   # regarding this memory based on the input parameters from the json
   # configuration file.
   def __run_cacti( self ):
-    fid = open(os.sep.join([self.results_dir,'cacti.cfg']), 'w')
-    fid.write( cacti_config.format( self.total_size
-             , self.width_in_bytes, self.rw_ports, 0, 0
-             , self.process.tech_um, self.width_in_bytes*8, self.num_banks
-             , self.cache_type ))
-    fid.close()
-    odir = os.getcwd()
-    os.chdir(self.cacti_dir )
-    cmd = os.sep.join(['.','cacti -infile ']) + os.sep.join([self.results_dir,'cacti.cfg'])
-    os.system( cmd)
-    os.chdir(odir)
-
+    cfg_path = os.sep.join([self.results_dir, 'cacti.cfg'])
+    write_cacti_config(self, cfg_path, self.organization)
+    run_cacti(cfg_path, self.cacti_dir)
+    cacti_data = read_cacti_results(cfg_path, self)
+    if cacti_data is None:
+      print(f'ERROR: cacti did not produce any results for {self.name} (see {cfg_path})')
+      sys.exit(1)
+    return cacti_data
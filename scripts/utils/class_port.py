@@ -0,0 +1,58 @@
+import sys
+
+################################################################################
+# PORT CLASS
+#
+# This class stores the names of the pins that make up one port of a memory.
+# A port is either read/write ('rw'), read only ('r') or write only ('w'). The
+# pins of a single port memory keep their plain names (addr_in, rd_out, ...)
+# while the pins of a multi-port memory get the port number as a suffix
+# (addr_in_0, rd_out_0, addr_in_1, ...). All ports share the same clock.
+#
+# The write mask of the write ports comes from the "write_mask" option of the
+# SRAM: one w_mask_in bit per data bit ('bit', default), one per byte of data
+# ('byte') or no w_mask_in pins at all ('none', every write is a full word).
+################################################################################
+
+# Supported port configurations and the kind of each of their ports
+PORT_TYPES = { '1rw'   : ['rw']
+             , '1r1w'  : ['r', 'w']
+             , '1rw1r' : ['rw', 'r']
+             , '2rw'   : ['rw', 'rw']
+             }
+
+# Supported write masks
+WRITE_MASKS = ('bit', 'byte', 'none')
+
+class Port:
+
+  def __init__( self, kind, index, suffix, write_mask='bit' ):
+
+    self.kind   = kind
+    self.index  = index
+    self.suffix = suffix
+    self.read   = kind in ('rw', 'r')
+    self.write  = kind in ('rw', 'w')
+
+    # Pin names (None if the port doesn't have the pin)
+    self.addr_in   = 'addr_in' + suffix
+    self.ce_in     = 'ce_in' + suffix
+    self.we_in     = ('we_in' + suffix) if kind == 'rw' else None
+    self.wd_in     = ('wd_in' + suffix) if self.write else None
+    self.w_mask_in = ('w_mask_in' + suffix) if self.write and write_mask != 'none' else None
+    self.rd_out    = ('rd_out' + suffix) if self.read else None
+
+#
+# Helper function that creates the ports for one of the PORT_TYPES
+#
+def make_ports( port_type, write_mask='bit' ):
+  if port_type not in PORT_TYPES:
+    print(f'ERROR: unknown port type "{port_type}" (expected one of {", ".join(PORT_TYPES)})')
+    sys.exit(1)
+  if write_mask not in WRITE_MASKS:
+    print(f'ERROR: unknown write_mask "{write_mask}" (expected one of {", ".join(WRITE_MASKS)})')
+    sys.exit(1)
+  kinds = PORT_TYPES[port_type]
+  if len(kinds) == 1:
+    return [Port(kinds[0], 0, '', write_mask)]
+  return [Port(kind, i, '_%d' % i, write_mask) for i, kind in enumerate(kinds)]
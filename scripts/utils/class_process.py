@@ -1,3 +1,7 @@
+import sys
+
+from utils.class_corner import Corner
+
 ################################################################################
 # PROCESS CLASS
 #
@@ -19,12 +23,38 @@ class Process:
     self.voltage        = str(json_data['voltage'])
 
     # Optional keys
+    self.name           = str(json_data['name']) if 'name' in json_data else '%dnm' % self.tech_nm
     self.snapWidth_nm   = int(json_data['snapWidth_nm']) if 'snapWidth_nm' in json_data else 1
     self.snapHeight_nm  = int(json_data['snapHeight_nm']) if 'snapHeight_nm' in json_data else 1
     self.flipPins       = str(json_data['flipPins']) if 'flipPins' in json_data else 'false'
     self.pinHeight_nm   = int(json_data['pinHeight_nm']) if 'pinHeight_nm' in json_data else (self.pinWidth_nm) # Default to square pins
+    self.pinEdges       = [str(e).lower() for e in json_data['pinEdges']] if 'pinEdges' in json_data else ['left', 'right', 'bottom', 'top']
+    self.pinOrder       = str(json_data['pinOrder']) if 'pinOrder' in json_data else 'grouped'
+    self.straps         = dict(json_data['straps']) if 'straps' in json_data else {}
+    self.obstructions   = dict(json_data['obstructions']) if 'obstructions' in json_data else {}
+    self.gdsLayerMap    = dict(json_data['gdsLayerMap']) if 'gdsLayerMap' in json_data else {}
+    self.optimize       = json_data['optimize'] if 'optimize' in json_data else None
+    self.nldm           = json_data['nldm'] if 'nldm' in json_data else None
+    self.tiling         = json_data['tiling'] if 'tiling' in json_data else None
+    self.regfile        = json_data['regfile'] if 'regfile' in json_data else None
+    self.cacti          = dict(json_data['cacti']) if 'cacti' in json_data else {}
+    self.corners        = [Corner(c, self) for c in json_data['corners']] if 'corners' in json_data else []
     self.vlogTimingCheckSignalExpansion = bool(json_data['vlogTimingCheckSignalExpansion']) if 'vlogTimingCheckSignalExpansion' in json_data else False
 
+    for edge in self.pinEdges:
+      if edge not in ('left', 'right', 'bottom', 'top'):
+        print(f'ERROR: unknown pin edge "{edge}" in pinEdges')
+        sys.exit(1)
+
+    if 'direction' in self.straps and self.straps['direction'] not in ('horizontal', 'vertical'):
+      print(f'ERROR: strap direction must be horizontal or vertical (got "{self.straps["direction"]}")')
+      sys.exit(1)
+
+    corner_names = [c.name for c in self.corners]
+    if len(set(corner_names)) != len(corner_names):
+      print(f'ERROR: corner names must be unique ({", ".join(corner_names)})')
+      sys.exit(1)
+
     # Converted values
     self.tech_um     = self.tech_nm / 1000.0
     self.pinWidth_um = self.pinWidth_nm / 1000.0
@@ -0,0 +1,193 @@
+import copy
+import math
+import os
+import sys
+
+from utils.class_memory import Memory
+
+################################################################################
+# TILED MEMORY CLASS
+#
+# A logical memory built from a grid of identical physical (leaf) macros. The
+# words are split over ROWS leaf macros (picked by the top address bits) and
+# the bits over COLS leaf macros (the last one padded when the width does not
+# divide evenly). The leaf macro is a regular Memory with all of its views in
+# <results_dir>/<leaf name>, while the logical memory gets a wrapper verilog,
+# a black box and a roll-up .lib in <results_dir>.
+#
+# Tiling is either asked for explicitly with a "tile" entry in the SRAM
+# ({"width": 64, "depth": 1024} sets the leaf size) or picked automatically
+# when the single macro would break the "tiling" limits of the process (or the
+# SRAM, which overrides the process):
+#
+#   "tiling": {
+#     "max_width_um": 400,       # optional leaf macro width limit
+#     "max_height_um": 400,      # optional leaf macro height limit
+#     "max_aspect_ratio": 4,     # optional limit of the longer/shorter side
+#     "max_tiles": 64            # most leaf macros to consider (default 64)
+#   }
+#
+# Candidate tilings are tried from the fewest tiles up (squarest leaf first)
+# and the first leaf that meets the limits is used. All of the candidates are
+# written to <results_dir>/tiling.csv. With a byte write mask the leaf width
+# of a split word has to be a multiple of 8 so that no byte straddles two
+# leaf macros.
+################################################################################
+
+class TiledMemory:
+
+  def __init__( self, process, sram_data, leaf, rows, cols, results_dir ):
+
+    self.process       = process
+    self.sram_data     = sram_data
+    self.name          = str(sram_data['name'])
+    self.width_in_bits = int(sram_data['width'])
+    self.depth         = int(sram_data['depth'])
+    self.leaf          = leaf
+    self.rows          = rows
+    self.cols          = cols
+    self.results_dir   = results_dir
+    self.ports         = leaf.ports
+    self.port_type     = leaf.port_type
+    self.read_latency  = leaf.read_latency
+    self.write_mask    = leaf.write_mask
+    self.ce_bits       = 1
+    self.power_gating  = leaf.power_gating
+    self.mask_bits     = {'bit': self.width_in_bits, 'byte': math.ceil(self.width_in_bits / 8.0), 'none': 0}[self.write_mask]
+
+  # rollup: a memory with the pins of the logical memory and the timing,
+  # power and area of the whole grid of leaf macros (for the .lib). Only one
+  # row of leaf macros is active per access, so the access energy is that of
+  # one row (cols leaf macros). The row decode in front of the chip enables
+  # and the row mux behind the read data each add about one FO4 per level.
+  def rollup( self, corner=None ):
+    leaf = self.leaf.at_corner(corner) if corner else self.leaf.model()
+    mem = copy.copy(leaf)
+    levels = math.ceil(math.log2(self.rows))
+    mem.sram_data                   = self.sram_data
+    mem.name                        = self.name
+    mem.width_in_bits               = self.width_in_bits
+    mem.depth                       = self.depth
+    mem.mask_bits                   = self.mask_bits
+    mem.results_dir                 = self.results_dir
+    mem.width_um                    = leaf.width_um * self.cols
+    mem.height_um                   = leaf.height_um * self.rows
+    mem.area_um2                    = leaf.area_um2 * self.rows * self.cols
+    mem.standby_leakage_per_bank_mW = leaf.standby_leakage_per_bank_mW * self.rows * self.cols
+    mem.standby_leakage_mW          = leaf.standby_leakage_mW * self.rows * self.cols
+    mem.retention_leakage_mW        = leaf.retention_leakage_mW * self.rows * self.cols
+    mem.shutdown_leakage_mW         = leaf.shutdown_leakage_mW * self.rows * self.cols
+    mem.dyn_read_energy_nj          = leaf.dyn_read_energy_nj * self.cols
+    mem.dyn_write_energy_nj         = leaf.dyn_write_energy_nj * self.cols
+    mem.pin_dynamic_power_mW        = leaf.pin_dynamic_power_mW * self.cols
+    mem.t_setup_ns                  = leaf.t_setup_ns + levels * leaf.fo4_ps / 1e3
+    mem.t_clk_to_q_ns               = leaf.t_clk_to_q_ns + levels * leaf.fo4_ps / 1e3
+    return mem
+
+#
+# Helper function that creates the Memory (or TiledMemory) for an SRAM. With
+# model=False the Cacti runs are left for the views that need them, unless
+# the tiling limits have to be checked.
+#
+def make_memory( process, sram_data, output_dir=None, cacti_dir=None, model=True ):
+
+  name   = str(sram_data['name'])
+  limits = sram_data['tiling'] if 'tiling' in sram_data else process.tiling
+  limits = limits if isinstance(limits, dict) else {}
+
+  if 'tile' not in sram_data:
+    mem = Memory(process, sram_data, output_dir, cacti_dir, model)
+    if not limits or meets_limits(mem, limits):
+      return mem
+    if mem.bank_enables:
+      print(f'WARNING: {name} breaks the tiling limits but is not tiled (bank_enables)')
+      return mem
+    print(f'{name} breaks the tiling limits, tiling it')
+    results_dir = mem.results_dir
+  elif 'bank_enables' in sram_data and sram_data['bank_enables']:
+    print(f'ERROR: {name} can not be tiled with bank_enables')
+    sys.exit(1)
+  else:
+    results_dir = Memory.results_dir_for(name, output_dir)
+
+  width = int(sram_data['width'])
+  depth = int(sram_data['depth'])
+  align = 8 if 'write_mask' in sram_data and sram_data['write_mask'] == 'byte' else 1
+  if 'tile' in sram_data:
+    leaf_width = int(sram_data['tile']['width']) if 'width' in sram_data['tile'] else width
+    leaf_depth = int(sram_data['tile']['depth']) if 'depth' in sram_data['tile'] else depth
+    candidates = [tile_shape(width, depth, leaf_width, leaf_depth, align)]
+    if candidates[0] is None:
+      print(f'ERROR: tile of {name} must be at most {width} bits wide (a multiple of {align} bits when it splits the word) and a power of 2 deep (or the whole depth)')
+      sys.exit(1)
+  else:
+    max_tiles = int(limits['max_tiles']) if 'max_tiles' in limits else 64
+    candidates = candidate_tilings(width, depth, max_tiles, align)
+
+  rows_out = []
+  chosen = None
+  for rows, cols, leaf_width, leaf_depth in candidates:
+    leaf_data = dict(sram_data)
+    leaf_data.pop('tile', None)
+    leaf_data.pop('tiling', None)
+    leaf_data['name']  = '%s_%dx%d' % (name, leaf_width, leaf_depth)
+    leaf_data['width'] = leaf_width
+    leaf_data['depth'] = leaf_depth
+    leaf = Memory(process, leaf_data, results_dir, cacti_dir, model)
+    ok = 'tile' in sram_data or meets_limits(leaf, limits)
+    rows_out.append((leaf, rows, cols, ok))
+    if ok:
+      chosen = (leaf, rows, cols)
+      break
+
+  # (an explicit tile is only sized once a view needs its Cacti results)
+  if all(leaf.modeled for leaf, rows, cols, ok in rows_out):
+    with open(os.sep.join([results_dir, 'tiling.csv']), 'w') as fid:
+      fid.write('chosen, leaf, rows, cols, leaf_width_um, leaf_height_um, total_area_um2, meets_limits\n')
+      for leaf, rows, cols, ok in rows_out:
+        fid.write('%d, %s, %d, %d, %.3f, %.3f, %.3f, %d\n' % (chosen is not None and leaf is chosen[0], leaf.name, rows, cols, leaf.width_um, leaf.height_um, leaf.area_um2*rows*cols, ok))
+
+  if chosen is None:
+    print(f'ERROR: no tiling of {name} meets the tiling limits ({len(candidates)} candidates tried)')
+    sys.exit(1)
+
+  leaf, rows, cols = chosen
+  print(f'Tiled {name} as {rows} x {cols} {leaf.name} macros')
+  return TiledMemory(process, sram_data, leaf, rows, cols, results_dir)
+
+def meets_limits( mem, limits ):
+  mem.model()
+  w, h = mem.width_um, mem.height_um
+  if 'max_width_um' in limits and w > float(limits['max_width_um']):
+    return False
+  if 'max_height_um' in limits and h > float(limits['max_height_um']):
+    return False
+  if 'max_aspect_ratio' in limits and max(w, h) / min(w, h) > float(limits['max_aspect_ratio']):
+    return False
+  return True
+
+# tile_shape: (rows, cols, leaf width, leaf depth) for the given leaf size or
+# None if the leaf doesn't tile the memory. The rows are picked by the top
+# address bits so a split depth has to be a power of 2 and a split width has
+# to be a multiple of align bits.
+def tile_shape( width, depth, leaf_width, leaf_depth, align=1 ):
+  if leaf_width < 1 or leaf_width > width or leaf_depth < 2 or leaf_depth > depth:
+    return None
+  if leaf_width != width and leaf_width % align != 0:
+    return None
+  if leaf_depth != depth and (leaf_depth & (leaf_depth - 1)) != 0:
+    return None
+  return (math.ceil(depth / leaf_depth), math.ceil(width / leaf_width), leaf_width, leaf_depth)
+
+# candidate_tilings: every distinct tiling with at most max_tiles leaf macros,
+# fewest tiles first and then the squarest leaf (in bits) first
+def candidate_tilings( width, depth, max_tiles, align=1 ):
+  candidates = set()
+  leaf_depths = [depth] + [1 << k for k in range(1, math.ceil(math.log2(depth))) if (1 << k) < depth]
+  for leaf_depth in leaf_depths:
+    for cols in range(1, width + 1):
+      leaf_width = math.ceil(width / cols / align) * align
+      shape = tile_shape(width, depth, min(leaf_width, width), leaf_depth, align)
+      if shape and shape[0] * shape[1] <= max_tiles and (shape[0], shape[1]) != (1, 1):
+        candidates.add(shape)
+  return sorted(candidates, key=lambda c: (c[0]*c[1], abs(math.log2(c[2] / c[3])), c[0]))
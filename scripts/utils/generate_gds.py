@@ -0,0 +1,177 @@
+import os
+import re
+import time
+import struct
+
+################################################################################
+# GENERATE GDS VIEW
+#
+# Generate a binary GDSII abstract based on the given SRAM. The abstract holds
+# the same pin, strap and obstruction geometry as the LEF (see Memory.layout)
+# plus a text label for every pin. Records are streamed straight to the file so
+# a single GdsWriter can also collect every SRAM into one combined library.
+#
+# The GDS layer and datatype of each shape comes from the process "gdsLayerMap"
+# option. Keys are either a layer name (e.g. "metal3") or a layer name and a
+# purpose (e.g. "metal3/label"), the purposes being "pin", "label", "blockage"
+# and "boundary" for the macro outline. Layers that are not mapped fall back to
+# the metal number with datatype 0 for pins/labels and 1 for blockages.
+################################################################################
+
+def generate_gds( mem, writer=None ):
+
+    layout = mem.layout()
+
+    # Write to the given (combined) library or to a per-macro file
+    own_writer = writer is None
+    if own_writer:
+        writer = GdsWriter(os.sep.join([mem.results_dir, mem.name + '.gds']), mem.name)
+
+    layer_map = GdsLayerMap(mem.process)
+
+    writer.begin_structure(mem.name)
+
+    # Macro outline
+    writer.boundary(layer_map.get('OVERLAP', 'boundary'), (0, 0, layout.w, layout.h))
+
+    # Signal pins
+    for pin_name, direction, layer, rect in layout.pins:
+        writer.boundary(layer_map.get(layer, 'pin'), rect)
+        writer.text(layer_map.get(layer, 'label'), pin_name, rect)
+
+    # Supply straps
+    for pin_name in ('VSS', 'VDD'):
+        for layer, rect in layout.straps[pin_name]:
+            writer.boundary(layer_map.get(layer, 'pin'), rect)
+            writer.text(layer_map.get(layer, 'label'), pin_name, rect)
+
+    # Obstructions
+    for layer, rects in layout.obs.items():
+        for rect in rects:
+            writer.boundary(layer_map.get(layer, 'blockage'), rect)
+
+    writer.end_structure()
+
+    if own_writer:
+        writer.close()
+
+#
+# Layer/datatype lookup for the shapes of a macro
+#
+class GdsLayerMap:
+
+    DEFAULT_DATATYPE = {'pin': 0, 'label': 0, 'blockage': 1, 'boundary': 0}
+
+    def __init__( self, process ):
+        self.metalPrefix = process.metalPrefix
+        self.layer_map   = process.gdsLayerMap
+
+    def get( self, layer, purpose ):
+        if purpose == 'boundary':
+            layer = 'boundary'
+        for key in ('%s/%s' % (layer, purpose), layer):
+            if key in self.layer_map:
+                return tuple(int(v) for v in self.layer_map[key])
+        m = re.fullmatch(re.escape(self.metalPrefix) + r'(\d+)', layer)
+        return (int(m.group(1)) if m else 0, self.DEFAULT_DATATYPE[purpose])
+
+#
+# Streaming GDSII writer. Coordinates are given in microns and written with a
+# 1nm database unit.
+#
+class GdsWriter:
+
+    HEADER   = 0x0002
+    BGNLIB   = 0x0102
+    LIBNAME  = 0x0206
+    UNITS    = 0x0305
+    ENDLIB   = 0x0400
+    BGNSTR   = 0x0502
+    STRNAME  = 0x0606
+    ENDSTR   = 0x0700
+    BOUNDARY = 0x0800
+    TEXT     = 0x0C00
+    LAYER    = 0x0D02
+    DATATYPE = 0x0E02
+    XY       = 0x1003
+    ENDEL    = 0x1100
+    TEXTTYPE = 0x1602
+    STRING   = 0x1906
+
+    DBU_PER_UM = 1000
+
+    def __init__( self, path, libname ):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.fid = open(path, 'wb')
+        self.__record(self.HEADER, struct.pack('>h', 600))
+        self.__record(self.BGNLIB, self.__timestamp())
+        self.__record(self.LIBNAME, self.__ascii(libname))
+        self.__record(self.UNITS, gds_real8(1.0/self.DBU_PER_UM) + gds_real8(1e-6/self.DBU_PER_UM))
+
+    def close( self ):
+        self.__record(self.ENDLIB)
+        self.fid.close()
+
+    def begin_structure( self, name ):
+        self.__record(self.BGNSTR, self.__timestamp())
+        self.__record(self.STRNAME, self.__ascii(name))
+
+    def end_structure( self ):
+        self.__record(self.ENDSTR)
+
+    def boundary( self, layer_datatype, rect ):
+        llx, lly, urx, ury = [self.__dbu(v) for v in rect]
+        self.__record(self.BOUNDARY)
+        self.__record(self.LAYER, struct.pack('>h', layer_datatype[0]))
+        self.__record(self.DATATYPE, struct.pack('>h', layer_datatype[1]))
+        self.__record(self.XY, struct.pack('>10i', llx, lly, urx, lly, urx, ury, llx, ury, llx, lly))
+        self.__record(self.ENDEL)
+
+    # text: label placed at the center of the given rect
+    def text( self, layer_texttype, string, rect ):
+        x = self.__dbu((rect[0] + rect[2]) / 2.0)
+        y = self.__dbu((rect[1] + rect[3]) / 2.0)
+        self.__record(self.TEXT)
+        self.__record(self.LAYER, struct.pack('>h', layer_texttype[0]))
+        self.__record(self.TEXTTYPE, struct.pack('>h', layer_texttype[1]))
+        self.__record(self.XY, struct.pack('>2i', x, y))
+        self.__record(self.STRING, self.__ascii(string))
+        self.__record(self.ENDEL)
+
+    def __record( self, rtype, data=b'' ):
+        self.fid.write(struct.pack('>HH', 4 + len(data), rtype) + data)
+
+    def __dbu( self, um ):
+        return int(round(um * self.DBU_PER_UM))
+
+    @staticmethod
+    def __ascii( s ):
+        b = s.encode('ascii')
+        return b + (b'\0' if len(b) % 2 else b'')
+
+    @staticmethod
+    def __timestamp():
+        t = time.gmtime()
+        stamp = (t.tm_year, t.tm_mon, t.tm_mday, t.tm_hour, t.tm_min, t.tm_sec)
+        return struct.pack('>12h', *(stamp + stamp))
+
+#
+# Helper function that encodes a GDSII 8-byte real (excess-64, base 16)
+#
+def gds_real8( value ):
+    if value == 0:
+        return b'\0' * 8
+    sign = 0x80 if value < 0 else 0
+    value = abs(value)
+    exponent = 64
+    while value >= 1:
+        value /= 16.0
+        exponent += 1
+    while value < 1/16.0:
+        value *= 16.0
+        exponent -= 1
+    mantissa = int(round(value * (1 << 56)))
+    if mantissa >= (1 << 56):
+        mantissa >>= 4
+        exponent += 1
+    return bytes([sign | exponent]) + mantissa.to_bytes(7, 'big')
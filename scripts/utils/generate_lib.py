@@ -3,6 +3,8 @@ import math
 import time
 import datetime
 
+from utils.nldm import NldmTables
+
 ################################################################################
 # GENERATE LIBERTY VIEW
 #
@@ -18,19 +20,39 @@ def generate_lib( mem ):
     area              = float(mem.area_um2)
     x                 = float(mem.width_um)
     y                 = float(mem.height_um)
-    leakage           = float(mem.standby_leakage_per_bank_mW)*1e3
+    leakage           = float(mem.standby_leakage_mW)*1e3
+    ret_leakage       = float(mem.retention_leakage_mW)*1e3
+    shutdown_leakage  = float(mem.shutdown_leakage_mW)*1e3
+    wakeup            = float(mem.wakeup_ns)
     tsetup            = float(mem.t_setup_ns)
     thold             = float(mem.t_hold_ns)
-    tcq               = float(mem.access_time_ns)
+    tcq               = float(mem.t_clk_to_q_ns)
     clkpindynamic     = float(mem.pin_dynamic_power_mW)*1e3
     pindynamic        = float(mem.pin_dynamic_power_mW)*1e1
     min_driver_in_cap = float(mem.cap_input_pf)
     voltage           = float(mem.process.voltage)
-    min_period        = float(mem.cycle_time_ns)
-    fo4               = float(mem.fo4_ps)/1e3
+    min_period        = float(mem.min_period_ns)
+
+    # Operating conditions (nominal or the PVT corner of the memory)
+    if mem.corner:
+        lib_name    = '%s_%s' % (name, mem.corner.name)
+        op_cond     = mem.corner.name
+        process     = mem.corner.process_factor
+        temperature = mem.corner.temperature_C
+        voltage     = mem.corner.voltage
+    else:
+        lib_name    = name
+        op_cond     = 'tt_1.0_25.0'
+        process     = 1
+        temperature = 25.0
 
-    # Only support 1RW srams. At some point, expose these as well!
-    num_rwport = mem.rw_ports
+    # Cacti knobs that differ from the defaults are recorded in the comment
+    if mem.regfile:
+        comment = 'SRAM (%s register file model)' % mem.regfile_cell
+    elif mem.cacti_overrides:
+        comment = 'SRAM (cacti %s)' % ', '.join('%s=%s' % kv for kv in sorted(mem.cacti_overrides.items()))
+    else:
+        comment = 'SRAM'
 
     # Number of bits for address
     addr_width    = math.ceil(math.log2(mem.depth))
@@ -41,49 +63,37 @@ def generate_lib( mem ):
     date = d.isoformat()
     current_time = time.strftime("%H:%M:%SZ", time.gmtime())
 
-    # TODO: Arbitrary indicies for the NLDM table. This is used for Clk->Q arcs
-    # as well as setup/hold times. We only have a single value for these, there
-    # are two options. 1. adding some sort of static variation of the single
-    # value for each table entry, 2. use the same value so all interpolated
-    # values are the same. The 1st is more realistic but depend on good variation
-    # values which is process sepcific and I don't have a strategy for
-    # determining decent variation values without breaking NDA so right now we
-    # have no variations.
-    #
-    # The table indicies are main min/max values for interpolation. The tools
-    # typically don't like extrapolation so a large range is nice, but makes the
-    # single value strategy described above even more unrealistic.
-    #
-    min_slew = 1   * fo4               ;# arbitrary (1x fo4, fear that 0 would cause issues)
-    max_slew = 25  * fo4               ;# arbitrary (25x fo4 as ~100x fanout ... i know that is not really how it works)
-    min_load = 1   * min_driver_in_cap ;# arbitrary (1x driver, fear that 0 would cause issues)
-    max_load = 100 * min_driver_in_cap ;# arbitrary (100x driver)
-
-    slew_indicies = '%.3f, %.3f' % (min_slew, max_slew) ;# input pin transisiton with between 1xfo4 and 100xfo4
-    load_indicies = '%.3f, %.3f' % (min_load, max_load) ;# output capacitance table between a 1x and 32x inverter
+    # NLDM table indicies and values (see utils/nldm.py). The single Cacti
+    # numbers are either repeated over the whole table or spread over it with
+    # a simple FO4 based slew/load model.
+    tables = NldmTables(mem, tcq, tsetup, thold)
+    max_slew = tables.max_slew
+    max_load = tables.max_load
+    slew_indicies = tables.slew_indicies ;# input pin transisiton with between 1xfo4 and 25xfo4
+    load_indicies = tables.load_indicies ;# output capacitance table between a 1x and 100x driver
 
     # Start generating the LIB file
 
-    LIB_file = open(os.sep.join([mem.results_dir, name + '.lib']), 'w')
+    LIB_file = open(os.sep.join([mem.results_dir, lib_name + '.lib']), 'w')
 
-    LIB_file.write( 'library(%s) {\n' % name)
+    LIB_file.write( 'library(%s) {\n' % lib_name)
     LIB_file.write( '    technology (cmos);\n')
     LIB_file.write( '    delay_model : table_lookup;\n')
     LIB_file.write( '    revision : 1.0;\n')
     LIB_file.write( '    date : "%s %s";\n' % (date, current_time))
-    LIB_file.write( '    comment : "SRAM";\n')
+    LIB_file.write( '    comment : "%s";\n' % comment)
     LIB_file.write( '    time_unit : "1ns";\n')
     LIB_file.write( '    voltage_unit : "1V";\n')
     LIB_file.write( '    current_unit : "1uA";\n')
     LIB_file.write( '    leakage_power_unit : "1uW";\n')
-    LIB_file.write( '    nom_process : 1;\n')
-    LIB_file.write( '    nom_temperature : 25.000;\n')
+    LIB_file.write( '    nom_process : %s;\n' % process)
+    LIB_file.write( '    nom_temperature : %.3f;\n' % temperature)
     LIB_file.write( '    nom_voltage : %s;\n' % voltage)
     LIB_file.write( '    capacitive_load_unit (1,pf);\n\n')
     LIB_file.write( '    pulling_resistance_unit : "1kohm";\n\n')
-    LIB_file.write( '    operating_conditions(tt_1.0_25.0) {\n')
-    LIB_file.write( '        process : 1;\n')
-    LIB_file.write( '        temperature : 25.000;\n')
+    LIB_file.write( '    operating_conditions(%s) {\n' % op_cond)
+    LIB_file.write( '        process : %s;\n' % process)
+    LIB_file.write( '        temperature : %.3f;\n' % temperature)
     LIB_file.write( '        voltage : %s;\n' % voltage)
     LIB_file.write( '        tree_type : balanced_tree;\n')
     LIB_file.write( '    }\n')
@@ -97,7 +107,7 @@ def generate_lib( mem ):
     LIB_file.write( '    default_output_pin_cap : 0.0;\n')
     LIB_file.write( '    default_input_pin_cap : 0.0;\n')
     LIB_file.write( '    default_max_transition : %.3f;\n\n' % max_slew)
-    LIB_file.write( '    default_operating_conditions : tt_1.0_25.0;\n')
+    LIB_file.write( '    default_operating_conditions : %s;\n' % op_cond)
     LIB_file.write( '    default_leakage_power_density : 0.0;\n')
     LIB_file.write( '\n')
 
@@ -163,29 +173,31 @@ def generate_lib( mem ):
     #  LIB_file.write( '    k_volt_setup_rise : 0.000;\n')
     #  LIB_file.write( '\n')
 
+    template_slews = NldmTables.template_indicies(tables.slew_points)
+    template_loads = NldmTables.template_indicies(tables.load_points)
     LIB_file.write( '    lu_table_template(%s_mem_out_delay_template) {\n' % name )
     LIB_file.write( '        variable_1 : input_net_transition;\n')
     LIB_file.write( '        variable_2 : total_output_net_capacitance;\n')
-    LIB_file.write( '            index_1 ("1000, 1001");\n')
-    LIB_file.write( '            index_2 ("1000, 1001");\n')
+    LIB_file.write( '            index_1 ("%s");\n' % template_slews)
+    LIB_file.write( '            index_2 ("%s");\n' % template_loads)
     LIB_file.write( '    }\n')
     LIB_file.write( '    lu_table_template(%s_mem_out_slew_template) {\n' % name )
     LIB_file.write( '        variable_1 : total_output_net_capacitance;\n')
-    LIB_file.write( '            index_1 ("1000, 1001");\n')
+    LIB_file.write( '            index_1 ("%s");\n' % template_loads)
     LIB_file.write( '    }\n')
     LIB_file.write( '    lu_table_template(%s_constraint_template) {\n' % name )
     LIB_file.write( '        variable_1 : related_pin_transition;\n')
     LIB_file.write( '        variable_2 : constrained_pin_transition;\n')
-    LIB_file.write( '            index_1 ("1000, 1001");\n')
-    LIB_file.write( '            index_2 ("1000, 1001");\n')
+    LIB_file.write( '            index_1 ("%s");\n' % template_slews)
+    LIB_file.write( '            index_2 ("%s");\n' % template_slews)
     LIB_file.write( '    }\n')
     LIB_file.write( '    power_lut_template(%s_energy_template_clkslew) {\n' % name )
     LIB_file.write( '        variable_1 : input_transition_time;\n')
-    LIB_file.write( '            index_1 ("1000, 1001");\n')
+    LIB_file.write( '            index_1 ("%s");\n' % template_slews)
     LIB_file.write( '    }\n')
     LIB_file.write( '    power_lut_template(%s_energy_template_sigslew) {\n' % name )
     LIB_file.write( '        variable_1 : input_transition_time;\n')
-    LIB_file.write( '            index_1 ("1000, 1001");\n')
+    LIB_file.write( '            index_1 ("%s");\n' % template_slews)
     LIB_file.write( '    }\n')
     LIB_file.write( '    library_features(report_delay_calculation);\n')
     LIB_file.write( '    type (%s_DATA) {\n' % name )
@@ -196,6 +208,24 @@ def generate_lib( mem ):
     LIB_file.write( '        bit_to : 0 ;\n')
     LIB_file.write( '        downto : true ;\n')
     LIB_file.write( '    }\n')
+    if mem.write_mask == 'byte' :
+      LIB_file.write( '    type (%s_MASK) {\n' % name)
+      LIB_file.write( '        base_type : array ;\n')
+      LIB_file.write( '        data_type : bit ;\n')
+      LIB_file.write( '        bit_width : %d;\n' % mem.mask_bits)
+      LIB_file.write( '        bit_from : %d;\n' % (int(mem.mask_bits)-1))
+      LIB_file.write( '        bit_to : 0 ;\n')
+      LIB_file.write( '        downto : true ;\n')
+      LIB_file.write( '    }\n')
+    if mem.ce_bits > 1 :
+      LIB_file.write( '    type (%s_BANKS) {\n' % name)
+      LIB_file.write( '        base_type : array ;\n')
+      LIB_file.write( '        data_type : bit ;\n')
+      LIB_file.write( '        bit_width : %d;\n' % mem.ce_bits)
+      LIB_file.write( '        bit_from : %d;\n' % (int(mem.ce_bits)-1))
+      LIB_file.write( '        bit_to : 0 ;\n')
+      LIB_file.write( '        downto : true ;\n')
+      LIB_file.write( '    }\n')
     LIB_file.write( '    type (%s_ADDRESS) {\n' % name)
     LIB_file.write( '        base_type : array ;\n')
     LIB_file.write( '        data_type : bit ;\n')
@@ -230,372 +260,134 @@ def generate_lib( mem ):
     #LIB_file.write('            sdf_cond : "1";\n')
     #LIB_file.write('        }\n')
     LIB_file.write('        internal_power(){\n')
+    # With per-bank enables an access (and its energy) only happens on the
+    # clock edges where a bank is enabled, and never while a power-gated
+    # macro sleeps. The energy is that of one access, which only activates
+    # the addressed bank, so it does not depend on how many banks are enabled
+    # (only the leakage is per bank).
+    clk_when = [' | '.join('%s[%d]' % (port.ce_in, b) for port in mem.ports for b in range(mem.ce_bits))] if mem.ce_bits > 1 else []
+    if mem.power_gating :
+      clk_when = ['(%s)' % w for w in clk_when] + ['!sleep_in']
+    if clk_when :
+      LIB_file.write('            when : "%s";\n' % ' & '.join(clk_when))
     LIB_file.write('            rise_power(%s_energy_template_clkslew) {\n' % name)
     LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-    LIB_file.write('                values ("%.3f, %.3f")\n' % (clkpindynamic, clkpindynamic))
+    LIB_file.write('                values ("%s")\n' % tables.flat_vector(clkpindynamic))
     LIB_file.write('            }\n')
     LIB_file.write('            fall_power(%s_energy_template_clkslew) {\n' % name)
     LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-    LIB_file.write('                values ("%.3f, %.3f")\n' % (clkpindynamic, clkpindynamic))
+    LIB_file.write('                values ("%s")\n' % tables.flat_vector(clkpindynamic))
     LIB_file.write('            }\n')
     LIB_file.write('        }\n')
     LIB_file.write('    }\n')
     LIB_file.write('\n')
 
-    for i in range(int(num_rwport)) :
-      LIB_file.write('    bus(rd_out)   {\n')
-      LIB_file.write('        bus_type : %s_DATA;\n' % name)
-      LIB_file.write('        direction : output;\n')
-      LIB_file.write('        max_capacitance : %.3f;\n' % max_load) ;# Based on 32x inverter being a common max (or near max) inverter
-      LIB_file.write('        memory_read() {\n')
-      LIB_file.write('            address : addr_in;\n')
-      LIB_file.write('        }\n')
-      LIB_file.write('        timing() {\n')
-      LIB_file.write('            related_pin : "clk" ;\n')
-      LIB_file.write('            timing_type : rising_edge;\n')
-      LIB_file.write('            timing_sense : non_unate;\n')
-      LIB_file.write('            cell_rise(%s_mem_out_delay_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % load_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (tcq, tcq))
-      LIB_file.write('                  "%.3f, %.3f" \\\n' % (tcq, tcq))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('            cell_fall(%s_mem_out_delay_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % load_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (tcq, tcq))
-      LIB_file.write('                  "%.3f, %.3f" \\\n' % (tcq, tcq))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('            rise_transition(%s_mem_out_slew_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % load_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (min_slew, max_slew))
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_transition(%s_mem_out_slew_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % load_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (min_slew, max_slew))
-      LIB_file.write('            }\n')
-      LIB_file.write('        }\n')
-      LIB_file.write('    }\n')
+    # Power gating pins: sleep_in has to fall wakeup_ns before the next clock
+    # edge (the fall_constraint of its setup check)
+    if mem.power_gating :
+      for pin in ('sleep_in', 'ret_in') :
+        LIB_file.write('    pin(%s){\n' % pin)
+        LIB_file.write('        direction : input;\n')
+        LIB_file.write('        capacitance : %.3f;\n' % (min_driver_in_cap))
+        lib_setup_hold( LIB_file, name, tables, setup_fall=tables.flat_table(wakeup) if pin == 'sleep_in' else None )
+        lib_internal_power( LIB_file, name, tables, pindynamic )
+        LIB_file.write('    }\n')
+      LIB_file.write('\n')
 
-    for i in range(int(num_rwport)) :
-      LIB_file.write('    pin(we_in){\n')
-      LIB_file.write('        direction : input;\n')
-      LIB_file.write('        capacitance : %.3f;\n' % (min_driver_in_cap))
-      LIB_file.write('        timing() {\n')
-      LIB_file.write('            related_pin : clk;\n')
-      LIB_file.write('            timing_type : setup_rising ;\n')
-      LIB_file.write('            rise_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (tsetup, tsetup))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (tsetup, tsetup))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (tsetup, tsetup))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (tsetup, tsetup))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('        } \n')
-      LIB_file.write('        timing() {\n')
-      LIB_file.write('            related_pin : clk;\n')
-      LIB_file.write('            timing_type : hold_rising ;\n')
-      LIB_file.write('            rise_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (thold, thold))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (thold, thold))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (thold, thold))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (thold, thold))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('        }\n')
-      LIB_file.write('        internal_power(){\n')
-      LIB_file.write('            rise_power(%s_energy_template_sigslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_power(%s_energy_template_sigslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('        }\n')
-      LIB_file.write('    }\n')
+    for port in mem.ports :
 
-    LIB_file.write('    pin(ce_in){\n')
-    LIB_file.write('        direction : input;\n')
-    LIB_file.write('        capacitance : %.3f;\n' % (min_driver_in_cap))
-    LIB_file.write('        timing() {\n')
-    LIB_file.write('            related_pin : clk;\n')
-    LIB_file.write('            timing_type : setup_rising ;\n')
-    LIB_file.write('            rise_constraint(%s_constraint_template) {\n' % name)
-    LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-    LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-    LIB_file.write('                values ( \\\n')
-    LIB_file.write('                  "%.3f, %.3f", \\\n' % (tsetup, tsetup))
-    LIB_file.write('                  "%.3f, %.3f" \\\n'  % (tsetup, tsetup))
-    LIB_file.write('                )\n')
-    LIB_file.write('            }\n')
-    LIB_file.write('            fall_constraint(%s_constraint_template) {\n' % name)
-    LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-    LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-    LIB_file.write('                values ( \\\n')
-    LIB_file.write('                  "%.3f, %.3f", \\\n' % (tsetup, tsetup))
-    LIB_file.write('                  "%.3f, %.3f" \\\n'  % (tsetup, tsetup))
-    LIB_file.write('                )\n')
-    LIB_file.write('            }\n')
-    LIB_file.write('        } \n')
-    LIB_file.write('        timing() {\n')
-    LIB_file.write('            related_pin : clk;\n')
-    LIB_file.write('            timing_type : hold_rising ;\n')
-    LIB_file.write('            rise_constraint(%s_constraint_template) {\n' % name)
-    LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-    LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-    LIB_file.write('                values ( \\\n')
-    LIB_file.write('                  "%.3f, %.3f", \\\n' % (thold, thold))
-    LIB_file.write('                  "%.3f, %.3f" \\\n'  % (thold, thold))
-    LIB_file.write('                )\n')
-    LIB_file.write('            }\n')
-    LIB_file.write('            fall_constraint(%s_constraint_template) {\n' % name)
-    LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-    LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-    LIB_file.write('                values ( \\\n')
-    LIB_file.write('                  "%.3f, %.3f", \\\n' % (thold, thold))
-    LIB_file.write('                  "%.3f, %.3f" \\\n'  % (thold, thold))
-    LIB_file.write('                )\n')
-    LIB_file.write('            }\n')
-    LIB_file.write('        }\n')
-    LIB_file.write('        internal_power(){\n')
-    LIB_file.write('            rise_power(%s_energy_template_sigslew) {\n' % name)
-    LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-    LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-    LIB_file.write('            }\n')
-    LIB_file.write('            fall_power(%s_energy_template_sigslew) {\n' % name)
-    LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-    LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-    LIB_file.write('            }\n')
-    LIB_file.write('        }\n')
-    LIB_file.write('    }\n')
+      if port.read :
+        LIB_file.write('    bus(%s)   {\n' % port.rd_out)
+        LIB_file.write('        bus_type : %s_DATA;\n' % name)
+        LIB_file.write('        direction : output;\n')
+        LIB_file.write('        max_capacitance : %.3f;\n' % max_load) ;# Based on 32x inverter being a common max (or near max) inverter
+        LIB_file.write('        memory_read() {\n')
+        LIB_file.write('            address : %s;\n' % port.addr_in)
+        LIB_file.write('        }\n')
+        LIB_file.write('        timing() {\n')
+        LIB_file.write('            related_pin : "clk" ;\n')
+        LIB_file.write('            timing_type : rising_edge;\n')
+        LIB_file.write('            timing_sense : non_unate;\n')
+        LIB_file.write('            cell_rise(%s_mem_out_delay_template) {\n' % name)
+        LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
+        LIB_file.write('                index_2 ("%s");\n' % load_indicies)
+        LIB_file.write('                values ( \\\n')
+        LIB_file.write(tables.delay)
+        LIB_file.write('                )\n')
+        LIB_file.write('            }\n')
+        LIB_file.write('            cell_fall(%s_mem_out_delay_template) {\n' % name)
+        LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
+        LIB_file.write('                index_2 ("%s");\n' % load_indicies)
+        LIB_file.write('                values ( \\\n')
+        LIB_file.write(tables.delay)
+        LIB_file.write('                )\n')
+        LIB_file.write('            }\n')
+        LIB_file.write('            rise_transition(%s_mem_out_slew_template) {\n' % name)
+        LIB_file.write('                index_1 ("%s");\n' % load_indicies)
+        LIB_file.write('                values ("%s")\n' % tables.transition)
+        LIB_file.write('            }\n')
+        LIB_file.write('            fall_transition(%s_mem_out_slew_template) {\n' % name)
+        LIB_file.write('                index_1 ("%s");\n' % load_indicies)
+        LIB_file.write('                values ("%s")\n' % tables.transition)
+        LIB_file.write('            }\n')
+        LIB_file.write('        }\n')
+        LIB_file.write('    }\n')
 
-    for i in range(int(num_rwport)) :
-      LIB_file.write('    bus(addr_in)   {\n')
-      LIB_file.write('        bus_type : %s_ADDRESS;\n' % name)
-      LIB_file.write('        direction : input;\n')
-      LIB_file.write('        capacitance : %.3f;\n' % (min_driver_in_cap))
-      LIB_file.write('        timing() {\n')
-      LIB_file.write('            related_pin : clk;\n')
-      LIB_file.write('            timing_type : setup_rising ;\n')
-      LIB_file.write('            rise_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (tsetup, tsetup))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (tsetup, tsetup))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (tsetup, tsetup))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (tsetup, tsetup))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('        } \n')
-      LIB_file.write('        timing() {\n')
-      LIB_file.write('            related_pin : clk;\n')
-      LIB_file.write('            timing_type : hold_rising ;\n')
-      LIB_file.write('            rise_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (thold, thold))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (thold, thold))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (thold, thold))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (thold, thold))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('        }\n')
-      LIB_file.write('        internal_power(){\n')
-      LIB_file.write('            rise_power(%s_energy_template_sigslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_power(%s_energy_template_sigslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('        }\n')
-      LIB_file.write('    }\n')
+      if port.we_in :
+        LIB_file.write('    pin(%s){\n' % port.we_in)
+        LIB_file.write('        direction : input;\n')
+        LIB_file.write('        capacitance : %.3f;\n' % (min_driver_in_cap))
+        lib_setup_hold( LIB_file, name, tables )
+        lib_internal_power( LIB_file, name, tables, pindynamic )
+        LIB_file.write('    }\n')
 
-    for i in range(int(num_rwport)) :
-      LIB_file.write('    bus(wd_in)   {\n')
-      LIB_file.write('        bus_type : %s_DATA;\n' % name)
-      LIB_file.write('        memory_write() {\n')
-      LIB_file.write('            address : addr_in;\n')
-      LIB_file.write('            clocked_on : "clk";\n')
-      LIB_file.write('        }\n')
+      if mem.ce_bits > 1 :
+        LIB_file.write('    bus(%s)   {\n' % port.ce_in)
+        LIB_file.write('        bus_type : %s_BANKS;\n' % name)
+      else :
+        LIB_file.write('    pin(%s){\n' % port.ce_in)
       LIB_file.write('        direction : input;\n')
       LIB_file.write('        capacitance : %.3f;\n' % (min_driver_in_cap))
-      LIB_file.write('        timing() {\n')
-      LIB_file.write('            related_pin     : clk;\n')
-      LIB_file.write('            timing_type     : setup_rising ;\n')
-      LIB_file.write('            rise_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (tsetup, tsetup))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (tsetup, tsetup))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (tsetup, tsetup))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (tsetup, tsetup))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('        } \n')
-      LIB_file.write('        timing() {\n')
-      LIB_file.write('            related_pin     : clk;\n')
-      LIB_file.write('            timing_type     : hold_rising ;\n')
-      LIB_file.write('            rise_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (thold, thold))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (thold, thold))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (thold, thold))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (thold, thold))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('        }\n')
-      LIB_file.write('        internal_power(){\n')
-      LIB_file.write('            when : "(! (we_in) )";\n')
-      LIB_file.write('            rise_power(%s_energy_template_sigslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_power(%s_energy_template_sigslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('        }\n')
-      LIB_file.write('        internal_power(){\n')
-      LIB_file.write('            when : "(we_in)";\n')
-      LIB_file.write('            rise_power(%s_energy_template_sigslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_power(%s_energy_template_sigslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('        }\n')
+      lib_setup_hold( LIB_file, name, tables )
+      lib_internal_power( LIB_file, name, tables, pindynamic )
       LIB_file.write('    }\n')
 
-    for i in range(int(num_rwport)) :
-      LIB_file.write('    bus(w_mask_in)   {\n')
-      LIB_file.write('        bus_type : %s_DATA;\n' % name)
-      LIB_file.write('        memory_write() {\n')
-      LIB_file.write('            address : addr_in;\n')
-      LIB_file.write('            clocked_on : "clk";\n')
-      LIB_file.write('        }\n')
+      LIB_file.write('    bus(%s)   {\n' % port.addr_in)
+      LIB_file.write('        bus_type : %s_ADDRESS;\n' % name)
       LIB_file.write('        direction : input;\n')
       LIB_file.write('        capacitance : %.3f;\n' % (min_driver_in_cap))
-      LIB_file.write('        timing() {\n')
-      LIB_file.write('            related_pin     : clk;\n')
-      LIB_file.write('            timing_type     : setup_rising ;\n')
-      LIB_file.write('            rise_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (tsetup, tsetup))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (tsetup, tsetup))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (tsetup, tsetup))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (tsetup, tsetup))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('        } \n')
-      LIB_file.write('        timing() {\n')
-      LIB_file.write('            related_pin     : clk;\n')
-      LIB_file.write('            timing_type     : hold_rising ;\n')
-      LIB_file.write('            rise_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (thold, thold))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (thold, thold))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (thold, thold))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (thold, thold))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('        }\n')
-      LIB_file.write('        internal_power(){\n')
-      LIB_file.write('            when : "(! (we_in) )";\n')
-      LIB_file.write('            rise_power(%s_energy_template_sigslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_power(%s_energy_template_sigslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('        }\n')
-      LIB_file.write('        internal_power(){\n')
-      LIB_file.write('            when : "(we_in)";\n')
-      LIB_file.write('            rise_power(%s_energy_template_sigslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_power(%s_energy_template_sigslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('        }\n')
+      lib_setup_hold( LIB_file, name, tables )
+      lib_internal_power( LIB_file, name, tables, pindynamic )
       LIB_file.write('    }\n')
 
+      if port.write :
+        buses = [(port.wd_in, 'DATA')]
+        if port.w_mask_in :
+          buses.append((port.w_mask_in, 'MASK' if mem.write_mask == 'byte' else 'DATA'))
+        for bus, bus_type in buses:
+          LIB_file.write('    bus(%s)   {\n' % bus)
+          LIB_file.write('        bus_type : %s_%s;\n' % (name, bus_type))
+          LIB_file.write('        memory_write() {\n')
+          LIB_file.write('            address : %s;\n' % port.addr_in)
+          LIB_file.write('            clocked_on : "clk";\n')
+          LIB_file.write('        }\n')
+          LIB_file.write('        direction : input;\n')
+          LIB_file.write('        capacitance : %.3f;\n' % (min_driver_in_cap))
+          lib_setup_hold( LIB_file, name, tables )
+          if port.we_in :
+            lib_internal_power( LIB_file, name, tables, pindynamic, when='(! (%s) )' % port.we_in )
+            lib_internal_power( LIB_file, name, tables, pindynamic, when='(%s)' % port.we_in )
+          else :
+            lib_internal_power( LIB_file, name, tables, pindynamic )
+          LIB_file.write('    }\n')
+
     LIB_file.write('    cell_leakage_power : %.3f;\n' % (leakage))
+    if mem.power_gating :
+      for when, value in (('!sleep_in', leakage), ('sleep_in & ret_in', ret_leakage), ('sleep_in & !ret_in', shutdown_leakage)) :
+        LIB_file.write('    leakage_power() {\n')
+        LIB_file.write('        when : "%s";\n' % when)
+        LIB_file.write('        value : %.3f;\n' % value)
+        LIB_file.write('    }\n')
     LIB_file.write('}\n')
 
     LIB_file.write('\n')
@@ -603,3 +395,39 @@ def generate_lib( mem ):
 
     LIB_file.close()
 
+#
+# Helper function that writes the setup and hold checks of an input pin
+# (setup_fall replaces the setup of a falling input)
+#
+def lib_setup_hold( LIB_file, name, tables, setup_fall=None ):
+
+    for timing_type, values in (('setup_rising', tables.setup), ('hold_rising', tables.hold)):
+        LIB_file.write('        timing() {\n')
+        LIB_file.write('            related_pin : clk;\n')
+        LIB_file.write('            timing_type : %s ;\n' % timing_type)
+        for constraint in ('rise_constraint', 'fall_constraint'):
+            if setup_fall and timing_type == 'setup_rising' and constraint == 'fall_constraint':
+                values = setup_fall
+            LIB_file.write('            %s(%s_constraint_template) {\n' % (constraint, name))
+            LIB_file.write('                index_1 ("%s");\n' % tables.slew_indicies)
+            LIB_file.write('                index_2 ("%s");\n' % tables.slew_indicies)
+            LIB_file.write('                values ( \\\n')
+            LIB_file.write(values)
+            LIB_file.write('                )\n')
+            LIB_file.write('            }\n')
+        LIB_file.write('        }\n')
+
+#
+# Helper function that writes the internal power of an input pin
+#
+def lib_internal_power( LIB_file, name, tables, power, when=None ):
+
+    LIB_file.write('        internal_power(){\n')
+    if when:
+        LIB_file.write('            when : "%s";\n' % when)
+    for rise_fall in ('rise_power', 'fall_power'):
+        LIB_file.write('            %s(%s_energy_template_sigslew) {\n' % (rise_fall, name))
+        LIB_file.write('                index_1 ("%s");\n' % tables.slew_indicies)
+        LIB_file.write('                values ("%s")\n' % tables.flat_vector(power))
+        LIB_file.write('            }\n')
+    LIB_file.write('        }\n')
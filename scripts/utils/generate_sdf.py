@@ -0,0 +1,105 @@
+import os
+import time
+import datetime
+
+from utils.generate_verilog import setuphold_signals
+
+################################################################################
+# GENERATE SDF VIEW
+#
+# Generate a .sdf file based on the given SRAM, so the timing of the verilog
+# model can be back-annotated without running STA. The numbers are the ones
+# the .lib is built from (at the smallest input slew and output load of the
+# NLDM tables): clk->rd_out, the setup/hold of every input checked in the
+# specify block of the model, the clk period (min_period) and the clk high and
+# low widths (half of min_period). A power-gated SRAM has the wake-up time as
+# the setup of sleep_in falling.
+#
+# The cell has an empty INSTANCE, so the file is annotated on each instance of
+# the macro, e.g.:
+#
+#   initial $sdf_annotate("sram_32x256_1rw.sdf", tb.dut);
+#
+# Every PVT corner gets its own <name>_<corner>.sdf like the .lib.
+################################################################################
+
+def generate_sdf( mem ):
+  '''Generate an SDF view for the RAM'''
+  name = str(mem.name)
+  tcq        = sdf_value(mem.t_clk_to_q_ns)
+  setup      = sdf_value(mem.t_setup_ns)
+  hold       = sdf_value(mem.t_hold_ns)
+  wakeup     = sdf_value(mem.wakeup_ns)
+  period     = sdf_value(mem.min_period_ns)
+  half       = sdf_value(mem.min_period_ns / 2.0)
+
+  # Operating conditions (nominal or the PVT corner of the memory)
+  if mem.corner:
+    sdf_name    = '%s_%s' % (name, mem.corner.name)
+    process     = mem.corner.name
+    voltage     = mem.corner.voltage
+    temperature = mem.corner.temperature_C
+  else:
+    sdf_name    = name
+    process     = 'typical'
+    voltage     = float(mem.process.voltage)
+    temperature = 25.0
+
+  iopaths = ''
+  for port in mem.ports:
+    if port.read:
+      iopaths += SDF_IOPATH_LINE.format(rd_out=port.rd_out, tcq=tcq)
+
+  checks = ''
+  for sig in setuphold_signals(mem, mem.process.vlogTimingCheckSignalExpansion):
+    checks += SDF_SETUPHOLD_LINE.format(sig='(%s)' % sig if ' ' in sig else sig,
+      setup=wakeup if sig == 'negedge sleep_in' else setup, hold=hold)
+
+  d = datetime.date.today()
+  fout = os.sep.join([mem.results_dir, sdf_name + '.sdf'])
+  with open(fout, 'w') as f:
+    f.write(SDF_TEMPLATE.format(name=name, date='%s %s' % (d.isoformat(), time.strftime("%H:%M:%SZ", time.gmtime())),
+      process=process, voltage=sdf_value(voltage), temperature=sdf_value(temperature),
+      iopaths=iopaths, period=period, half=half, checks=checks))
+
+def sdf_value( v ):
+  '''min:typ:max triple of a single number'''
+  return '%.3f:%.3f:%.3f' % (v, v, v)
+
+# Template line for a clk to read data delay
+SDF_IOPATH_LINE = '        (IOPATH (posedge clk) {rd_out} ({tcq}) ({tcq}))\n'
+
+# Template line for a setup/hold check
+SDF_SETUPHOLD_LINE = '      (SETUPHOLD {sig} (posedge clk) ({setup}) ({hold}))\n'
+
+# Template for an SDF file
+SDF_TEMPLATE = '''\
+(DELAYFILE
+  (SDFVERSION "3.0")
+  (DESIGN "{name}")
+  (DATE "{date}")
+  (VENDOR "bsg_fakeram")
+  (PROGRAM "bsg_fakeram")
+  (VERSION "1.0")
+  (DIVIDER .)
+  (VOLTAGE {voltage})
+  (PROCESS "{process}")
+  (TEMPERATURE {temperature})
+  (TIMESCALE 1ns)
+  (CELL
+    (CELLTYPE "{name}")
+    (INSTANCE)
+    (DELAY
+      (ABSOLUTE
+{iopaths}\
+      )
+    )
+    (TIMINGCHECK
+      (PERIOD (posedge clk) ({period}))
+      (WIDTH (posedge clk) ({half}))
+      (WIDTH (negedge clk) ({half}))
+{checks}\
+    )
+  )
+)
+'''
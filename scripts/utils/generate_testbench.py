@@ -0,0 +1,304 @@
+import os
+import math
+
+################################################################################
+# GENERATE TESTBENCH
+#
+# Generate a self-checking random traffic testbench (<name>_tb.v) for the
+# verilog model of the given SRAM. Every cycle the ports get random chip
+# enables, write enables, addresses (half of them in a small hot range so the
+# reads hit written words), data and masks (all ones, all zeros or random, one
+# mask bit per MASK_STEP data bits). A golden copy of the memory inside the
+# testbench predicts the read data of every read port (including the read
+# latency), which is compared to rd_out with !== so the X of a read with ce_in
+# low is checked too.
+#
+# Writes of two ports to the same address in the same cycle are avoided (the
+# later port drops its write). Near the end the first write port gets an X
+# address, which has to corrupt the whole array (or leave it alone with
+# corrupt_mem_on_X_p = 0), followed by more random traffic. The X test is left
+# out for the wrapper of a tiled SRAM, which does not corrupt on X.
+#
+# A power-gated SRAM sleeps now and then for a few cycles, without retention
+# a quarter of the time (which corrupts the golden copy of the memory).
+#
+# Parameters of the testbench:
+#
+#   CYCLES       - number of random cycles (default 10000)
+#   SEED         - random seed
+#   CHECK_X      - 0 for 2-state simulators (Verilator): read data is only
+#                  compared where the expected value is known and the X test
+#                  is skipped
+#   CORRUPT_ON_X - corrupt_mem_on_X_p of the model
+#
+# The testbench ends with "PASS <cycles> cycles 0 errors" or "FAIL ..." (see
+# run_testbench.py).
+################################################################################
+
+def generate_testbench( mem, tiled=False ):
+  '''Generate a self-checking testbench for the RAM'''
+  name  = str(mem.name)
+  depth = int(mem.depth)
+  bits  = int(mem.width_in_bits)
+  addr_width = math.ceil(math.log2(depth))
+  latency = int(mem.read_latency)
+  write_ports = [port for port in mem.ports if port.write]
+
+  decls = ''
+  connections = []
+  stimulus = ''
+  golden_reads = ''
+  golden_writes = ''
+  checks = ''
+  banked = mem.ce_bits > 1
+  for port in mem.ports:
+    decls += TB_DECL_LINE.format(decl='reg  [ADDR_WIDTH-1:0]', sig=port.addr_in)
+    if banked:
+      decls += TB_DECL_LINE.format(decl='reg  [BANKS-1:0]', sig=port.ce_in)
+      decls += TB_BANK_SELECT_LINE.format(ce=port.ce_in, addr=port.addr_in)
+      stimulus += TB_BANK_CE_ADDR_TEMPLATE.format(ce=port.ce_in, addr=port.addr_in)
+    else:
+      decls += TB_DECL_LINE.format(decl='reg', sig=port.ce_in)
+      stimulus += TB_CE_ADDR_TEMPLATE.format(ce=port.ce_in, addr=port.addr_in)
+    connections += [port.addr_in, port.ce_in]
+    if port.we_in:
+      decls += TB_DECL_LINE.format(decl='reg', sig=port.we_in)
+      stimulus += TB_WE_TEMPLATE.format(we=port.we_in)
+      connections.append(port.we_in)
+    if port.write:
+      decls += TB_DECL_LINE.format(decl='reg  [BITS-1:0]', sig=port.wd_in)
+      stimulus += TB_WRITE_DATA_TEMPLATE.format(wd=port.wd_in)
+      connections.append(port.wd_in)
+      mask = "{BITS{1'b1}}"
+      if port.w_mask_in:
+        decls += TB_DECL_LINE.format(decl='reg  [MASK_BITS-1:0]', sig=port.w_mask_in)
+        stimulus += TB_WRITE_MASK_TEMPLATE.format(mask=port.w_mask_in)
+        connections.append(port.w_mask_in)
+        mask = 'expand_mask(%s)' % port.w_mask_in
+      golden_writes += TB_GOLDEN_WRITE_TEMPLATE.format(write=tb_write_enable(mem, port), addr=port.addr_in, wd=port.wd_in, mask=mask)
+    if port.read:
+      decls += TB_DECL_LINE.format(decl='wire [BITS-1:0]', sig=port.rd_out)
+      decls += TB_DECL_LINE.format(decl='reg  [BITS-1:0]', sig='%s_exp [1:READ_LATENCY]' % port.rd_out)
+      connections.append(port.rd_out)
+      golden_reads += TB_GOLDEN_READ_LINE.format(rd=port.rd_out, ce=tb_ce(mem, port), addr=port.addr_in)
+      for k in range(2, latency+1):
+        golden_reads += TB_GOLDEN_SHIFT_LINE.format(rd=port.rd_out, k=k)
+      checks += TB_CHECK_TEMPLATE.format(rd=port.rd_out)
+  connections.append('clk')
+  if mem.power_gating:
+    decls += TB_DECL_LINE.format(decl='reg', sig='sleep_in')
+    decls += TB_DECL_LINE.format(decl='reg', sig='ret_in')
+    stimulus += TB_SLEEP_TEMPLATE
+    connections += ['sleep_in', 'ret_in']
+
+  # Same address writes of two ports: the later port drops its write
+  for i, a in enumerate(write_ports):
+    for b in write_ports[i+1:]:
+      stimulus += TB_NO_COLLISION_TEMPLATE.format(wa=tb_write_enable(mem, a), wb=tb_write_enable(mem, b),
+        addr_a=a.addr_in, addr_b=b.addr_in, drop=b.we_in if b.we_in else b.ce_in)
+
+  # X address on the first write port (the other ports don't write)
+  x_port = write_ports[0]
+  x_stimulus = TB_X_TEST_TEMPLATE.format(ce=x_port.ce_in, addr=x_port.addr_in,
+    ce_on="{BANKS{1'b1}}" if banked else "1'b1",
+    we=(' %s = 1\'b1;' % x_port.we_in) if x_port.we_in else '',
+    others=''.join(' %s = 1\'b0;' % (p.we_in if p.we_in else p.ce_in) for p in write_ports[1:]) + (" sleep_in = 1'b0;" if mem.power_gating else ''))
+
+  fout = os.sep.join([mem.results_dir, name + '_tb.v'])
+  with open(fout, 'w') as f:
+    f.write(TB_TEMPLATE.format(name=name, data_width=bits, depth=depth, addr_width=addr_width,
+      read_latency=latency, bank_params=TB_BANK_PARAMS.format(banks=mem.ce_bits, bank_depth=mem.bank_depth) if banked else '',
+      mask_bits=max(1, int(mem.mask_bits)), mask_step=8 if mem.write_mask == 'byte' else 1, hot=min(16, depth), x_test='0' if tiled else 'CHECK_X',
+      dut_params='' if tiled else ' #(.corrupt_mem_on_X_p(CORRUPT_ON_X))',
+      sleep_init=TB_SLEEP_INIT if mem.power_gating else '', sleep_golden=TB_GOLDEN_SLEEP if mem.power_gating else '',
+      decls=decls, connections=',\n'.join('      .%s(%s)' % (c, c) for c in connections),
+      stimulus=stimulus, x_stimulus=x_stimulus, golden_reads=golden_reads, golden_writes=golden_writes,
+      checks=checks))
+
+def tb_ce( mem, port ):
+  ce = port.ce_in + '_sel' if mem.ce_bits > 1 else port.ce_in
+  return '%s && !sleep_in' % ce if mem.power_gating else ce
+
+def tb_write_enable( mem, port ):
+  return '%s && %s' % (tb_ce(mem, port), port.we_in) if port.we_in else tb_ce(mem, port)
+
+# Template line for a testbench signal
+TB_DECL_LINE = '   {decl:<25}{sig};\n'
+
+# Templates for the random stimulus of a port
+TB_CE_ADDR_TEMPLATE = '''\
+      {ce} = ($unsigned($random(seed)) % 10) != 0;
+      {addr} = ($random(seed) & 1) ? $unsigned($random(seed)) % HOT : $unsigned($random(seed)) % WORD_DEPTH;
+'''
+
+# Random enables of every bank, with the addressed bank enabled most of the
+# time
+TB_BANK_CE_ADDR_TEMPLATE = '''\
+      {addr} = ($random(seed) & 1) ? $unsigned($random(seed)) % HOT : $unsigned($random(seed)) % WORD_DEPTH;
+      {ce} = $random(seed);
+      {ce}[{addr} / BANK_DEPTH] = ($unsigned($random(seed)) % 10) != 0;
+'''
+
+TB_BANK_SELECT_LINE = "   wire                     {ce}_sel = (^{addr} === 1'bx) ? |{ce} : {ce}[{addr} / BANK_DEPTH];\n"
+
+TB_BANK_PARAMS = '''\
+   parameter BANKS = {banks};
+   parameter BANK_DEPTH = {bank_depth};
+'''
+
+# Sleep for a few cycles now and then, retaining the contents most of the time
+TB_SLEEP_TEMPLATE = '''\
+      if (($unsigned($random(seed)) % (sleep_in ? 4 : 64)) == 0)
+      begin
+         sleep_in = !sleep_in;
+         if (sleep_in) ret_in = ($unsigned($random(seed)) % 4) != 0;
+      end
+'''
+
+TB_SLEEP_INIT = '''\
+      sleep_in = 1'b0;
+      ret_in = 1'b1;
+'''
+
+TB_GOLDEN_SLEEP = '''\
+      if (sleep_in && !ret_in)
+         for (j = 0; j < WORD_DEPTH; j = j + 1)
+            ref_mem[j] = {BITS{1'bx}};
+'''
+
+TB_WE_TEMPLATE = '''\
+      {we} = $random(seed) & 1;
+'''
+
+TB_WRITE_DATA_TEMPLATE = '''\
+      for (k = 0; k < BITS; k = k + 32) rnd = {{rnd, $random(seed)}};
+      {wd} = rnd[BITS-1:0];
+'''
+
+TB_WRITE_MASK_TEMPLATE = '''\
+      for (k = 0; k < BITS; k = k + 32) rnd = {{rnd, $random(seed)}};
+      case ($random(seed) & 3)
+         0: {mask} = {{MASK_BITS{{1'b1}}}};
+         1: {mask} = {{MASK_BITS{{1'b0}}}};
+         default: {mask} = rnd[MASK_BITS-1:0];
+      endcase
+'''
+
+TB_NO_COLLISION_TEMPLATE = '''\
+      if ({wa} && {wb} && ({addr_a} == {addr_b})) {drop} = 1'b0;
+'''
+
+TB_X_TEST_TEMPLATE = '''\
+      if (x_cycle)
+      begin
+         {ce} = {ce_on};{we} {addr} = {{ADDR_WIDTH{{1'bx}}}};{others}
+      end
+'''
+
+# Templates for the golden model
+TB_GOLDEN_READ_LINE = '''\
+      {rd}_exp[1] <= {ce} ? ref_mem[{addr}] : {{BITS{{1'bx}}}};
+'''
+
+TB_GOLDEN_SHIFT_LINE = '''\
+      {rd}_exp[{k}] <= {rd}_exp[{k}-1];
+'''
+
+TB_GOLDEN_WRITE_TEMPLATE = '''\
+      if (({write}) && !x_cycle)
+         ref_mem[{addr}] = ({wd} & {mask}) | (ref_mem[{addr}] & ~{mask});
+'''
+
+TB_CHECK_TEMPLATE = '''\
+      if (CHECK_X ? ({rd} !== {rd}_exp[READ_LATENCY]) : ((^{rd}_exp[READ_LATENCY] !== 1'bx) && ({rd} != {rd}_exp[READ_LATENCY])))
+      begin
+         errors = errors + 1;
+         if (errors <= 10)
+            $display("ERROR: cycle %0d {rd} = %h, expected %h", cycle, {rd}, {rd}_exp[READ_LATENCY]);
+      end
+'''
+
+# Template for a self-checking testbench
+TB_TEMPLATE = '''\
+module {name}_tb;
+   parameter BITS = {data_width};
+   parameter WORD_DEPTH = {depth};
+   parameter ADDR_WIDTH = {addr_width};
+   parameter READ_LATENCY = {read_latency};
+   parameter HOT = {hot};
+{bank_params}\
+   parameter MASK_BITS = {mask_bits};
+   parameter MASK_STEP = {mask_step};
+
+   parameter CYCLES = 10000;
+   parameter SEED = 1;
+   parameter CHECK_X = 1;
+   parameter CORRUPT_ON_X = 1;
+   parameter X_TEST = {x_test};
+
+   reg                      clk;
+{decls}
+   reg    [BITS-1:0]        ref_mem [0:WORD_DEPTH-1];
+   reg    [BITS+31:0]       rnd;
+   integer                  seed;
+   integer                  cycle;
+   integer                  errors;
+   integer                  j, k;
+   reg                      x_cycle;
+
+   {name}{dut_params} dut
+   (
+{connections}
+   );
+
+   initial
+   begin
+      clk = 1'b0;
+      seed = SEED;
+      cycle = 0;
+      errors = 0;
+      x_cycle = 1'b0;
+{sleep_init}\
+      for (j = 0; j < WORD_DEPTH; j = j + 1)
+         ref_mem[j] = {{BITS{{1'bx}}}};
+   end
+
+   always #5 clk = ~clk;
+
+   // Write mask with one bit per data bit (a mask bit covers MASK_STEP bits)
+   function [BITS-1:0] expand_mask;
+      input [MASK_BITS-1:0] m;
+      integer b;
+      for (b = 0; b < BITS; b = b + 1)
+         expand_mask[b] = m[b / MASK_STEP];
+   endfunction
+
+   // Golden model: expected read data (from before this cycle's writes) and
+   // then the writes
+   always @(posedge clk)
+   begin
+{golden_reads}\
+      if (x_cycle && CORRUPT_ON_X)
+         for (j = 0; j < WORD_DEPTH; j = j + 1)
+            ref_mem[j] = {{BITS{{1'bx}}}};
+{sleep_golden}\
+{golden_writes}\
+   end
+
+   // Check the read data and drive the next random cycle
+   always @(negedge clk)
+   begin
+{checks}\
+      if (cycle == CYCLES)
+      begin
+         $display("%s %0d cycles %0d errors", errors ? "FAIL" : "PASS", cycle, errors);
+         $finish;
+      end
+      cycle = cycle + 1;
+      x_cycle = X_TEST && (cycle == CYCLES - 32);
+{stimulus}\
+{x_stimulus}\
+   end
+
+endmodule
+'''
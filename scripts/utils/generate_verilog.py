@@ -5,10 +5,36 @@ import math
 # GENERATE VERILOG VIEW
 #
 # Generate a .v file based on the given SRAM.
+#
+# With a byte write mask (SRAM "write_mask": "byte") w_mask_in is MASK_BITS
+# wide and the model expands it to one bit per data bit ('w_mask_in_bits');
+# without a write mask ("none") every write writes the whole word.
+#
+# With per-bank chip enables (SRAM "bank_enables") ce_in is BANKS wide and an
+# access only happens when the enable of the addressed bank is high
+# ('ce_in_sel'; any enable with an unknown address).
+#
+# A power-gated SRAM (SRAM "power_gating") has sleep_in and ret_in pins. No
+# access happens while sleep_in is high ('ce_in_awake' is low) and the whole
+# array is corrupted when the macro sleeps with ret_in low (or either pin is
+# unknown with corrupt_mem_on_X_p set), on the next clk edge ('mem_lost'). With
+# the clock stopped while asleep that is the first edge after the wake-up, so
+# a read in that cycle still returns the old data.
+#
+# The instrumented model (<name>.act.v, the "act" view) is the same model plus
+# activity counters: clock edges, reads, writes, bits written (per the write
+# mask) and idle edges (no chip enable high). Every instance prints its counts
+# at the end of the simulation as a line
+#
+#   ACTIVITY <name> <instance> cycles=.. reads=.. writes=.. write_bits=.. idle=..
+#
+# which activity_report.py combines with the Cacti energies of the macros.
+# The line is printed from a final block, so unlike the other models the
+# instrumented model is SystemVerilog (iverilog -g2012, verilator -sv).
 ################################################################################
 
-def generate_verilog(mem, tmChkExpand=False):
-  '''Generate a verilog view for the RAM'''
+def generate_verilog(mem, tmChkExpand=False, activity=False):
+  '''Generate a verilog view for the RAM (with activity counters in <name>.act.v)'''
   name  = str(mem.name)
   depth = int(mem.depth)
   bits  = int(mem.width_in_bits)
@@ -16,21 +42,71 @@ def generate_verilog(mem, tmChkExpand=False):
   crpt_on_x = 1
 
   # Generate the 'setuphold' timing checks
-  setuphold_checks  = SH_LINE.format(sig='       we_in')
-  setuphold_checks += SH_LINE.format(sig='       ce_in')
-  if tmChkExpand: # per-bit checks
-    for i in range(addr_width): setuphold_checks += SH_LINE.format(sig=f'  addr_in[{i}]')
-    for i in range(      bits): setuphold_checks += SH_LINE.format(sig=f'    wd_in[{i}]')
-    for i in range(      bits): setuphold_checks += SH_LINE.format(sig=f'w_mask_in[{i}]')
-  else: # per-signal checks
-    setuphold_checks += SH_LINE.format(sig='     addr_in')
-    setuphold_checks += SH_LINE.format(sig='       wd_in')
-    setuphold_checks += SH_LINE.format(sig='   w_mask_in')
-
-  fout = os.sep.join([mem.results_dir, name + '.v'])
+  setuphold_checks = ''
+  for sig in setuphold_signals(mem, tmChkExpand):
+    setuphold_checks += SH_LINE.format(sig='%12s' % sig)
+
+  # Delay from clk to the read data of every read port
+  clk_to_q = ''
+  for port in mem.ports:
+    if port.read:
+      clk_to_q += CLK_TO_Q_LINE.format(rd_out=port.rd_out)
+
+  # Behavior of every port (plus the same address write collisions). With an
+  # output register stage the array read goes to '<rd_out>_r' and rd_out is
+  # registered from it one cycle later.
+  port_logic = ''
+  out_reg_decls = ''
+  wire_decls = ''
+  if mem.write_mask == 'byte':
+    wire_decls += MASK_GENVAR_LINE
+    for port in mem.ports:
+      if port.w_mask_in:
+        wire_decls += MASK_EXPAND_TEMPLATE.format(mask=port.w_mask_in)
+  if mem.ce_bits > 1:
+    for port in mem.ports:
+      wire_decls += BANK_SELECT_LINE.format(ce=port.ce_in, addr=port.addr_in)
+  if mem.power_gating:
+    for port in mem.ports:
+      wire_decls += AWAKE_LINE.format(ce=port.ce_in, sel=port.ce_in + '_sel' if mem.ce_bits > 1 else port.ce_in)
+    wire_decls += SHUTDOWN_TEMPLATE
+    port_logic += SLEEP_TEMPLATE
+  if len(mem.ports) > 1:
+    port_logic += COLLISION_COMMENT
+  for port in mem.ports:
+    port_logic += vlog_port_logic(mem, port)
+  write_ports = [port for port in mem.ports if port.write]
+  for i, a in enumerate(write_ports):
+    for b in write_ports[i+1:]:
+      port_logic += vlog_write_collision(mem, a, b)
+  if mem.read_latency > 1:
+    for port in mem.ports:
+      if port.read:
+        out_reg_decls += OUT_REG_DECL_LINE.format(rd=port.rd_out)
+        port_logic += OUT_REG_LINE.format(rd=port.rd_out)
+
+  # Activity counters of the instrumented model
+  activity_logic = ''
+  if activity:
+    counts = ''
+    for port in mem.ports:
+      ce = vlog_ce(mem, port)
+      if port.read:
+        counts += ACT_READ_LINE.format(read='%s && !%s' % (ce, port.we_in) if port.we_in else ce)
+      if port.write:
+        mask = vlog_mask(mem, port)
+        count_bits = ACT_MASK_BITS_LINE.format(mask=mask) if port.w_mask_in else ACT_ALL_BITS_LINE
+        counts += ACT_WRITE_TEMPLATE.format(write='%s && %s' % (ce, port.we_in) if port.we_in else ce, count_bits=count_bits)
+    activity_logic = ACTIVITY_TEMPLATE.format(name=name, counts=counts,
+      any_ce=' || '.join(vlog_ce(mem, port) for port in mem.ports))
+
+  fout = os.sep.join([mem.results_dir, name + ('.act.v' if activity else '.v')])
   with open(fout, 'w') as f:
-    f.write(VLOG_TEMPLATE.format(name=name, data_width=bits, depth=depth, addr_width=addr_width, 
-      crpt_on_x=crpt_on_x, setuphold_checks=setuphold_checks))
+    f.write(VLOG_TEMPLATE.format(name=name, data_width=bits, depth=depth, addr_width=addr_width,
+      crpt_on_x=crpt_on_x, read_latency=mem.read_latency, extra_params=vlog_extra_params(mem),
+      port_list=vlog_port_list(mem), port_decls=vlog_port_decls(mem), out_reg_decls=out_reg_decls,
+      wire_decls=wire_decls, port_logic=port_logic, activity_logic=activity_logic,
+      clk_to_q=clk_to_q, setuphold_checks=setuphold_checks))
 
 def generate_verilog_bb( mem ):
   '''Generate a verilog black-box view for the RAM'''
@@ -42,75 +118,340 @@ def generate_verilog_bb( mem ):
 
   fout = os.sep.join([mem.results_dir, name + '.bb.v'])
   with open(fout, 'w') as f:
-    f.write(VLOG_BB_TEMPLATE.format(name=name, data_width=bits, depth=depth, addr_width=addr_width, 
-      crpt_on_x=crpt_on_x))
+    f.write(VLOG_BB_TEMPLATE.format(name=name, data_width=bits, depth=depth, addr_width=addr_width,
+      crpt_on_x=crpt_on_x, read_latency=mem.read_latency, extra_params=vlog_extra_params(mem),
+      port_list=vlog_port_list(mem), port_decls=vlog_port_decls(mem)))
+
+def generate_verilog_wrapper( tiled ):
+  '''Generate the verilog wrapper of a tiled RAM (see TiledMemory)'''
+  name  = str(tiled.name)
+  depth = int(tiled.depth)
+  bits  = int(tiled.width_in_bits)
+  addr_width = math.ceil(math.log2(depth))
+  leaf = tiled.leaf
+  leaf_mask_width = 'LEAF_MASK_BITS' if tiled.write_mask == 'byte' else 'LEAF_BITS'
+
+  # Row decode of every port and read data mux of every read port
+  port_logic = ''
+  connections = ['               .clk(clk)']
+  for port in tiled.ports:
+    port_logic += WRAPPER_ROW_DECODE_TEMPLATE.format(ce=port.ce_in, addr=port.addr_in)
+    connections.append('               .%s(%s[LEAF_ADDR_WIDTH-1:0])' % (port.addr_in, port.addr_in))
+    connections.append('               .%s(%s_row[r])' % (port.ce_in, port.ce_in))
+    if port.we_in:
+      connections.append('               .%s(%s)' % (port.we_in, port.we_in))
+    if port.write:
+      mask_pad = WRAPPER_MASK_PAD_LINE.format(mask=port.w_mask_in, width=leaf_mask_width) if port.w_mask_in else ''
+      port_logic += WRAPPER_WRITE_PAD_TEMPLATE.format(wd=port.wd_in, mask_pad=mask_pad)
+      connections.append('               .%s(%s_pad[c*LEAF_BITS +: LEAF_BITS])' % (port.wd_in, port.wd_in))
+      if port.w_mask_in:
+        connections.append('               .%s(%s_pad[c*%s +: %s])' % (port.w_mask_in, port.w_mask_in, leaf_mask_width, leaf_mask_width))
+    if port.read:
+      port_logic += WRAPPER_READ_MUX_TEMPLATE.format(rd=port.rd_out, addr=port.addr_in)
+      connections.append('               .%s(%s_all[(r*COLS+c)*LEAF_BITS +: LEAF_BITS])' % (port.rd_out, port.rd_out))
+  if tiled.power_gating:
+    connections += ['               .sleep_in(sleep_in)', '               .ret_in(ret_in)']
+
+  fout = os.sep.join([tiled.results_dir, name + '.v'])
+  with open(fout, 'w') as f:
+    f.write(VLOG_WRAPPER_TEMPLATE.format(name=name, data_width=bits, depth=depth, addr_width=addr_width,
+      rows=tiled.rows, cols=tiled.cols, leaf_bits=int(leaf.width_in_bits),
+      leaf_mask_param=('\n   parameter LEAF_MASK_BITS = %d;' % leaf.mask_bits) if tiled.write_mask == 'byte' else '',
+      leaf_addr_width=math.ceil(math.log2(leaf.depth)), read_latency=tiled.read_latency,
+      extra_params=vlog_extra_params(tiled),
+      port_list=vlog_port_list(tiled), port_decls=vlog_port_decls(tiled, rd_decl='output'),
+      port_logic=port_logic, leaf=leaf.name, connections=',\n'.join(connections)))
+
+def setuphold_signals( mem, tmChkExpand=False ):
+  '''Data signals of the 'setuphold' timing checks (also used for the SDF).
+  The wake-up of a power-gated RAM is the setup of sleep_in falling.'''
+  addr_width = math.ceil(math.log2(int(mem.depth)))
+  signals = []
+  for port in mem.ports:
+    if port.we_in:
+      signals.append(port.we_in)
+    buses = [(port.addr_in, addr_width), (port.wd_in, int(mem.width_in_bits)), (port.w_mask_in, int(mem.mask_bits))]
+    if mem.ce_bits > 1:
+      buses.insert(0, (port.ce_in, mem.ce_bits))
+    else:
+      signals.append(port.ce_in)
+    for sig, width in buses:
+      if not sig:
+        continue
+      if tmChkExpand: # per-bit checks
+        signals += [f'{sig}[{i}]' for i in range(width)]
+      else: # per-signal checks
+        signals.append(sig)
+  if mem.power_gating:
+    signals += ['posedge sleep_in', 'negedge sleep_in', 'ret_in']
+  return signals
+
+#
+# Helper functions for the module ports
+#
+def vlog_ports( mem, rd_decl='output reg' ):
+  '''List of (declaration, name) for every port of the RAM'''
+  ports = []
+  for port in mem.ports:
+    if port.read:  ports.append((rd_decl + ' [BITS-1:0]', port.rd_out))
+    ports.append(('input  [ADDR_WIDTH-1:0]', port.addr_in))
+    if port.we_in: ports.append(('input', port.we_in))
+    if port.write: ports.append(('input  [BITS-1:0]', port.wd_in))
+    if port.w_mask_in: ports.append(('input  [%s-1:0]' % vlog_mask_width(mem), port.w_mask_in))
+  ports.append(('input', 'clk'))
+  for port in mem.ports:
+    ports.append(('input  [BANKS-1:0]' if mem.ce_bits > 1 else 'input', port.ce_in))
+  if mem.power_gating:
+    ports += [('input', 'sleep_in'), ('input', 'ret_in')]
+  return ports
+
+def vlog_mask_width( mem ):
+  '''Width parameter of the write mask ports'''
+  return 'MASK_BITS' if mem.write_mask == 'byte' else 'BITS'
+
+def vlog_extra_params( mem ):
+  '''MASK_BITS (byte write mask) and BANKS/BANK_DEPTH (per-bank enables) parameter lines'''
+  params = ''
+  if mem.write_mask == 'byte':
+    params += '\n   parameter MASK_BITS = %d;' % mem.mask_bits
+  if mem.ce_bits > 1:
+    params += '\n   parameter BANKS = %d;' % mem.ce_bits
+    params += '\n   parameter BANK_DEPTH = %d;' % mem.bank_depth
+  return params
+
+def vlog_ce( mem, port ):
+  '''Chip enable of the addressed bank of a port (low while asleep)'''
+  if mem.power_gating:
+    return port.ce_in + '_awake'
+  return port.ce_in + '_sel' if mem.ce_bits > 1 else port.ce_in
+
+def vlog_mask( mem, port ):
+  '''Write mask of a port with one bit per data bit'''
+  if not port.w_mask_in:
+    return "{BITS{1'b1}}"
+  if mem.write_mask == 'byte':
+    return port.w_mask_in + '_bits'
+  return port.w_mask_in
+
+def vlog_port_list( mem ):
+  return ',\n'.join('   %s' % n for _, n in vlog_ports(mem))
+
+def vlog_port_decls( mem, rd_decl='output reg' ):
+  return '\n'.join('   %-25s%s;' % (d, n) for d, n in vlog_ports(mem, rd_decl))
+
+def vlog_port_logic( mem, port ):
+  '''Behavior of a single port (inside the clocked always block)'''
+  rd = port.rd_out + '_r' if port.read and mem.read_latency > 1 else port.rd_out
+  s = dict(name=mem.name, ce=vlog_ce(mem, port), we=port.we_in, addr=port.addr_in,
+           wd=port.wd_in, mask=vlog_mask(mem, port) if port.write else None, rd=rd)
+  if port.kind == 'rw':
+    return RW_PORT_TEMPLATE.format(**s)
+  if port.kind == 'r':
+    return R_PORT_TEMPLATE.format(**s)
+  return W_PORT_TEMPLATE.format(**s)
+
+def vlog_write_collision( mem, a, b ):
+  '''Same address write from two ports (after both ports so it takes effect)'''
+  def write_enable( port ):
+    return '%s && %s' % (vlog_ce(mem, port), port.we_in) if port.we_in else vlog_ce(mem, port)
+  return COLLISION_TEMPLATE.format(wa=write_enable(a), wb=write_enable(b),
+    addr_a=a.addr_in, addr_b=b.addr_in, wd_a=a.wd_in, wd_b=b.wd_in,
+    mask_a=vlog_mask(mem, a), mask_b=vlog_mask(mem, b))
 
 # Template line for a 'setuphold' time check
 SH_LINE = '      $setuphold (posedge clk, {sig}, 0, 0, notifier);\n'
 
-# Template for a verilog 1rw RAM model
-VLOG_TEMPLATE = '''\
-module {name}
-(
-   rd_out,
-   addr_in,
-   we_in,
-   wd_in,
-   w_mask_in,
-   clk,
-   ce_in
-);
-   parameter BITS = {data_width};
-   parameter WORD_DEPTH = {depth};
-   parameter ADDR_WIDTH = {addr_width};
-   parameter corrupt_mem_on_X_p = {crpt_on_x};
+# Template line for a clk to read data delay
+CLK_TO_Q_LINE = '      (posedge clk *> {rd_out}) = (0, 0);\n'
 
-   output reg [BITS-1:0]    rd_out;
-   input  [ADDR_WIDTH-1:0]  addr_in;
-   input                    we_in;
-   input  [BITS-1:0]        wd_in;
-   input  [BITS-1:0]        w_mask_in;
-   input                    clk;
-   input                    ce_in;
+# Template lines for the expansion of a byte write mask
+MASK_GENVAR_LINE = '   genvar g;\n'
+MASK_EXPAND_TEMPLATE = '''\
+   wire   [BITS-1:0]        {mask}_bits;
+   generate
+      for (g = 0; g < BITS; g = g + 1) begin : {mask}_expand
+         assign {mask}_bits[g] = {mask}[g/8];
+      end
+   endgenerate
+'''
 
-   reg    [BITS-1:0]        mem [0:WORD_DEPTH-1];
+# Template line for the enable of the addressed bank of a port
+BANK_SELECT_LINE = "   wire                     {ce}_sel = (^{addr} === 1'bx) ? |{ce} : {ce}[{addr} / BANK_DEPTH];\n"
 
-   integer j;
+# Template line for the chip enable of a port of a power-gated RAM
+AWAKE_LINE = '   wire                     {ce}_awake = {sel} & ~sleep_in;\n'
+
+# Template for the shutdown (asleep without retention) of a power-gated RAM.
+# mem_lost is set when shutdown rises (even with the clock stopped) and
+# sampled on every clk edge, so the array is only written in the clocked port
+# block (a single driver of mem).
+SHUTDOWN_TEMPLATE = '''\
+   wire                     shutdown = (sleep_in === 1'b1 && ret_in === 1'b0) ||
+                                       (corrupt_mem_on_X_p && (sleep_in !== 1'b0) && (ret_in !== 1'b1));
+   reg                      mem_lost;
+   always @(posedge clk or posedge shutdown)
+      mem_lost <= shutdown;
+'''
+
+# Template for the contents of a power-gated RAM (first in the clocked port
+# block; no port accesses the array while asleep)
+SLEEP_TEMPLATE = '''\
+      // Power gating: the contents are lost when the RAM sleeps without retention
+      if (mem_lost)
+      begin
+         for (j = 0; j < WORD_DEPTH; j = j + 1)
+            mem[j] <= 'x;
+      end
+'''
+
+# Templates for the activity counters of the instrumented model
+ACT_READ_LINE = '      if ({read}) act_reads = act_reads + 1;\n'
+
+ACT_WRITE_TEMPLATE = '''\
+      if ({write})
+      begin
+         act_writes = act_writes + 1;
+{count_bits}\
+      end
+'''
 
+ACT_ALL_BITS_LINE = '         act_write_bits = act_write_bits + BITS;\n'
+
+ACT_MASK_BITS_LINE = '''\
+         for (act_b = 0; act_b < BITS; act_b = act_b + 1)
+            act_write_bits = act_write_bits + ({mask}[act_b] === 1'b1);
+'''
+
+ACTIVITY_TEMPLATE = '''
+   // Activity counters (printed at the end of the simulation)
+   reg    [63:0]            act_cycles, act_reads, act_writes, act_write_bits, act_idle;
+   integer                  act_b;
+   initial
+   begin
+      act_cycles = 0; act_reads = 0; act_writes = 0; act_write_bits = 0; act_idle = 0;
+   end
    always @(posedge clk)
    begin
-      if (ce_in)
+      act_cycles = act_cycles + 1;
+      if (!({any_ce})) act_idle = act_idle + 1;
+{counts}\
+   end
+   final
+      $display("ACTIVITY {name} %m cycles=%0d reads=%0d writes=%0d write_bits=%0d idle=%0d",
+               act_cycles, act_reads, act_writes, act_write_bits, act_idle);
+'''
+
+# Template lines for the output register stage (read_latency 2)
+OUT_REG_DECL_LINE = '   reg    [BITS-1:0]        {rd}_r;\n'
+OUT_REG_LINE = '      {rd} <= {rd}_r;\n'
+
+# Template for the read/write port behavior
+RW_PORT_TEMPLATE = '''\
+      if ({ce})
       begin
-         //if ((we_in !== 1'b1 && we_in !== 1'b0) && corrupt_mem_on_X_p)
          if (corrupt_mem_on_X_p &&
-             ((^we_in === 1'bx) || (^addr_in === 1'bx))
+             ((^{we} === 1'bx) || (^{addr} === 1'bx))
             )
          begin
             // WEN or ADDR is unknown, so corrupt entire array (using unsynthesizeable for loop)
             for (j = 0; j < WORD_DEPTH; j = j + 1)
                mem[j] <= 'x;
-            $display("warning: ce_in=1, we_in is %b, addr_in = %x in fakeram_d64_w8", we_in, addr_in);
+            $display("warning: {ce}=1, {we} is %b, {addr} = %x in {name}", {we}, {addr});
          end
-         else if (we_in)
+         else if ({we})
          begin
-            mem[addr_in] <= (wd_in & w_mask_in) | (mem[addr_in] & ~w_mask_in);
+            mem[{addr}] <= ({wd} & {mask}) | (mem[{addr}] & ~{mask});
          end
          // read
-         rd_out <= mem[addr_in];
+         {rd} <= mem[{addr}];
       end
       else
       begin
-         // Make sure read fails if ce_in is low
-         rd_out <= 'x;
+         // Make sure read fails if {ce} is low
+         {rd} <= 'x;
       end
-   end
+'''
 
+# Template for the read only port behavior
+R_PORT_TEMPLATE = '''\
+      if ({ce})
+      begin
+         // read
+         {rd} <= mem[{addr}];
+      end
+      else
+      begin
+         // Make sure read fails if {ce} is low
+         {rd} <= 'x;
+      end
+'''
+
+# Template for the write only port behavior
+W_PORT_TEMPLATE = '''\
+      if ({ce})
+      begin
+         if (corrupt_mem_on_X_p && (^{addr} === 1'bx))
+         begin
+            // ADDR is unknown, so corrupt entire array (using unsynthesizeable for loop)
+            for (j = 0; j < WORD_DEPTH; j = j + 1)
+               mem[j] <= 'x;
+            $display("warning: {ce}=1, {addr} = %x in {name}", {addr});
+         end
+         else
+         begin
+            mem[{addr}] <= ({wd} & {mask}) | (mem[{addr}] & ~{mask});
+         end
+      end
+'''
+
+# Same address accesses of a multi-port RAM
+COLLISION_COMMENT = '''\
+      // Same address accesses in one cycle: a read returns the data from
+      // before the cycle (read-before-write) and when two ports write the same
+      // word, bits written by only one port take that port's data while bits
+      // written by both ports with different data become X (or take the data
+      // of the higher numbered port if corrupt_mem_on_X_p is 0).
+'''
+
+# Template for a same address write collision between two ports
+COLLISION_TEMPLATE = '''\
+      if ({wa} && {wb} && ({addr_a} == {addr_b}))
+      begin
+         mem[{addr_a}] <= (mem[{addr_a}] & ~({mask_a} | {mask_b}))
+                       | ({wd_a} & {mask_a} & ~{mask_b})
+                       | ({wd_b} & {mask_b} & ~{mask_a})
+                       | ((({wd_a} & {wd_b}) | ((corrupt_mem_on_X_p ? {{BITS{{1'bx}}}} : {wd_b}) & ({wd_a} ^ {wd_b}))) & {mask_a} & {mask_b});
+      end
+'''
+
+# Template for a verilog RAM model
+VLOG_TEMPLATE = '''\
+module {name}
+(
+{port_list}
+);
+   parameter BITS = {data_width};
+   parameter WORD_DEPTH = {depth};
+   parameter ADDR_WIDTH = {addr_width};
+   parameter corrupt_mem_on_X_p = {crpt_on_x};
+   parameter READ_LATENCY = {read_latency};{extra_params}
+
+{port_decls}
+
+   reg    [BITS-1:0]        mem [0:WORD_DEPTH-1];
+{out_reg_decls}{wire_decls}
+   integer j;
+
+   always @(posedge clk)
+   begin
+{port_logic}\
+   end
+{activity_logic}
    // Timing check placeholders (will be replaced during SDF back-annotation)
    reg notifier;
    specify
       // Delay from clk to rd_out
-      (posedge clk *> rd_out) = (0, 0);
-
+{clk_to_q}
       // Timing checks
       $width     (posedge clk,               0, 0, notifier);
       $width     (negedge clk,               0, 0, notifier);
@@ -121,30 +462,93 @@ module {name}
 endmodule
 '''
 
-# Template for a verilog 1rw RAM interface
+# Template for a verilog RAM interface
 VLOG_BB_TEMPLATE = '''\
 module {name}
 (
-   rd_out,
-   addr_in,
-   we_in,
-   wd_in,
-   w_mask_in,
-   clk,
-   ce_in
+{port_list}
 );
    parameter BITS = {data_width};
    parameter WORD_DEPTH = {depth};
    parameter ADDR_WIDTH = {addr_width};
    parameter corrupt_mem_on_X_p = {crpt_on_x};
+   parameter READ_LATENCY = {read_latency};{extra_params}
+
+{port_decls}
+
+endmodule
+'''
+
+# Template for the row decode of a port of a tiled RAM
+WRAPPER_ROW_DECODE_TEMPLATE = '''\
+   // Row decode of {ce}
+   wire [ROWS-1:0]          {ce}_row;
+   generate
+      for (r = 0; r < ROWS; r = r + 1) begin : {ce}_decode
+         assign {ce}_row[r] = {ce} && (({addr} >> LEAF_ADDR_WIDTH) == r);
+      end
+   endgenerate
+
+'''
+
+# Template for the padded write data and mask of a port of a tiled RAM
+WRAPPER_WRITE_PAD_TEMPLATE = '''\
+   // Write data and mask padded to the width of the leaf macros
+   wire [COLS*LEAF_BITS-1:0] {wd}_pad = {wd};
+{mask_pad}
+'''
+
+WRAPPER_MASK_PAD_LINE = '   wire [COLS*{width}-1:0] {mask}_pad = {mask};\n'
+
+# Template for the read data mux of a port of a tiled RAM. The row of the read
+# is delayed by the read latency to line up with the data of the leaf macros.
+WRAPPER_READ_MUX_TEMPLATE = '''\
+   // Read data of every leaf macro and the row mux
+   wire [ROWS*COLS*LEAF_BITS-1:0] {rd}_all;
+   reg  [ADDR_WIDTH-1:0]    {rd}_row [1:READ_LATENCY];
+   integer                  {rd}_k;
+   always @(posedge clk)
+   begin
+      {rd}_row[1] <= {addr} >> LEAF_ADDR_WIDTH;
+      for ({rd}_k = 2; {rd}_k <= READ_LATENCY; {rd}_k = {rd}_k + 1)
+         {rd}_row[{rd}_k] <= {rd}_row[{rd}_k-1];
+   end
+   assign {rd} = {rd}_all[{rd}_row[READ_LATENCY]*(COLS*LEAF_BITS) +: BITS];
+
+'''
+
+# Template for the verilog wrapper of a tiled RAM
+VLOG_WRAPPER_TEMPLATE = '''\
+module {name}
+(
+{port_list}
+);
+   parameter BITS = {data_width};
+   parameter WORD_DEPTH = {depth};
+   parameter ADDR_WIDTH = {addr_width};
+   parameter READ_LATENCY = {read_latency};{extra_params}
+
+   // Grid of ROWS x COLS {leaf} macros
+   parameter ROWS = {rows};
+   parameter COLS = {cols};
+   parameter LEAF_BITS = {leaf_bits};{leaf_mask_param}
+   parameter LEAF_ADDR_WIDTH = {leaf_addr_width};
 
-   output reg [BITS-1:0]    rd_out;
-   input  [ADDR_WIDTH-1:0]  addr_in;
-   input                    we_in;
-   input  [BITS-1:0]        wd_in;
-   input  [BITS-1:0]        w_mask_in;
-   input                    clk;
-   input                    ce_in;
+{port_decls}
+
+   genvar r, c;
+
+{port_logic}\
+   generate
+      for (r = 0; r < ROWS; r = r + 1) begin : row
+         for (c = 0; c < COLS; c = c + 1) begin : col
+            {leaf} tile
+            (
+{connections}
+            );
+         end
+      end
+   endgenerate
 
 endmodule
 '''
@@ -0,0 +1,183 @@
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.class_memory import Memory
+from utils.class_port import PORT_TYPES, WRITE_MASKS
+from utils.class_tiled_memory import TiledMemory, tile_shape, candidate_tilings, meets_limits
+
+################################################################################
+# MEMORY MAPPER
+#
+# Map a list of logical memories onto physical macros. Every logical memory is
+# built from a grid of identical leaf macros (the same composition as a tiled
+# SRAM, see TiledMemory): its whole shape or any tiling with at most max_tiles
+# leaf macros. Every candidate leaf macro is modeled with Cacti once (leaf
+# macros with the same shape, ports, write mask and read latency are shared by
+# all of the logical memories) and the best mapping for the objective is
+# picked for each memory:
+#
+#   area    - smallest total macro area (then the fastest)
+#   latency - fastest clk->rd_out, including the row mux (then the smallest)
+#
+# The leaf macros are then merged into fewer macro types: a memory moves to a
+# leaf macro that more (or as many) memories already use when that costs at
+# most reuse_tolerance more than its own pick, which keeps the generated set of
+# macros small. A memory can also use a leaf macro wider than itself (the
+# wrapper pads the write data and drops the extra read data bits). The leaf
+# macros also have to meet the "tiling" limits of the process when it has them.
+################################################################################
+
+OBJECTIVES = ('area', 'latency')
+
+class Requirement:
+
+  def __init__( self, data ):
+    self.data         = data
+    self.name         = str(data['name'])
+    self.width        = int(data['width'])
+    self.depth        = int(data['depth'])
+    self.ports        = str(data['ports']) if 'ports' in data else '1rw'
+    self.write_mask   = str(data['write_mask']) if 'write_mask' in data else 'bit'
+    self.read_latency = int(data['read_latency']) if 'read_latency' in data else 1
+    if self.ports not in PORT_TYPES:
+      print(f'ERROR: unknown ports "{self.ports}" for {self.name} (expected one of {", ".join(PORT_TYPES)})')
+      sys.exit(1)
+    if self.write_mask not in WRITE_MASKS:
+      print(f'ERROR: unknown write_mask "{self.write_mask}" for {self.name} (expected one of {", ".join(WRITE_MASKS)})')
+      sys.exit(1)
+    if self.width < 1 or self.depth < 2:
+      print(f'ERROR: {self.name} must be at least 1 bit wide and 2 words deep')
+      sys.exit(1)
+
+  # kind: what a leaf macro has to match besides its shape
+  def kind( self ):
+    return (self.ports, self.write_mask, self.read_latency)
+
+  def align( self ):
+    return 8 if self.write_mask == 'byte' else 1
+
+class Mapping:
+
+  def __init__( self, req, tiled, objective ):
+    self.req    = req
+    self.tiled  = tiled
+    self.leaf   = tiled.leaf
+    self.rollup = tiled.rollup()
+    area, latency = self.rollup.area_um2, self.rollup.t_clk_to_q_ns
+    self.cost   = (area, latency) if objective == 'area' else (latency, area)
+
+# padded_shape: like tile_shape but a leaf macro wider than the memory is
+# used as a single column
+def padded_shape( req, width, depth ):
+  shape = tile_shape(req.width, req.depth, min(width, req.width), depth, req.align())
+  if shape and width > req.width:
+    shape = (shape[0], 1, width, depth)
+  return shape
+
+def macro_name( prefix, width, depth, kind ):
+  ports, write_mask, read_latency = kind
+  name = '%s_%dx%d_%s' % (prefix, width, depth, ports)
+  if write_mask != 'bit':
+    name += '_' + ('bytemask' if write_mask == 'byte' else 'nomask')
+  if read_latency != 1:
+    name += '_rl%d' % read_latency
+  return name
+
+# map_memories: the Mapping of every requirement. The candidate leaf macros
+# are modeled in <output_dir>/candidates and the wrappers go to wrapper_dir.
+def map_memories( process, reqs, output_dir, wrapper_dir, objective='area', max_tiles=16,
+                  reuse_tolerance=0.1, prefix='fakeram', jobs=1, cacti_dir=None ):
+
+  if objective not in OBJECTIVES:
+    print(f'ERROR: unknown objective "{objective}" (expected one of {", ".join(OBJECTIVES)})')
+    sys.exit(1)
+  names = [req.name for req in reqs]
+  if len(set(names)) != len(names):
+    print(f'ERROR: memory names must be unique ({", ".join(names)})')
+    sys.exit(1)
+
+  # Candidate shapes of every memory: (rows, cols, leaf width, leaf depth)
+  shapes = {}
+  for req in reqs:
+    whole = tile_shape(req.width, req.depth, req.width, req.depth)
+    shapes[req.name] = [whole] + candidate_tilings(req.width, req.depth, max_tiles, req.align())
+
+  # Model every distinct leaf macro once
+  leaf_keys = sorted(set((req.kind(), s[2], s[3]) for req in reqs for s in shapes[req.name]))
+  candidate_dir = os.sep.join([output_dir, 'candidates'])
+
+  def model( key ):
+    kind, width, depth = key
+    leaf_data = { 'name'         : macro_name(prefix, width, depth, kind)
+                , 'width'        : width
+                , 'depth'        : depth
+                , 'banks'        : 1
+                , 'ports'        : kind[0]
+                , 'write_mask'   : kind[1]
+                , 'read_latency' : kind[2]
+                }
+    return Memory(process, leaf_data, candidate_dir, cacti_dir)
+
+  pool = ThreadPoolExecutor(max_workers=max(1, jobs))
+  try:
+    leaves = dict(zip(leaf_keys, pool.map(model, leaf_keys)))
+  except SystemExit:
+    pool.shutdown(wait=True, cancel_futures=True)
+    raise
+  pool.shutdown()
+
+  limits = process.tiling if isinstance(process.tiling, dict) else {}
+  for leaf in leaves.values():
+    if leaf.name in names:
+      print(f'ERROR: macro name {leaf.name} is also the name of a memory (pick another prefix)')
+      sys.exit(1)
+
+  def mapping( req, key ):
+    leaf = leaves[key] if key in leaves else None
+    if leaf is None or (limits and not meets_limits(leaf, limits)):
+      return None
+    shape = padded_shape(req, key[1], key[2])
+    if shape is None or shape[0] * shape[1] > max_tiles:
+      return None
+    return Mapping(req, TiledMemory(process, req.data, leaf, shape[0], shape[1], wrapper_dir), objective)
+
+  # Best mapping of every memory on its own
+  chosen = {}
+  for req in reqs:
+    options = [m for m in (mapping(req, (req.kind(), s[2], s[3])) for s in shapes[req.name]) if m]
+    if not options:
+      print(f'ERROR: no mapping of {req.name} meets the tiling limits with at most {max_tiles} macros')
+      sys.exit(1)
+    chosen[req.name] = min(options, key=lambda m: m.cost)
+  best = {name: m.cost[0] for name, m in chosen.items()}
+
+  # Merge into the more popular macro types (every move makes a type used by
+  # at least as many memories more popular, so this ends). A move is measured
+  # against the memory's own best pick, so moves never add up beyond the
+  # tolerance.
+  def users():
+    count = {}
+    for m in chosen.values():
+      count[m.leaf.name] = count.get(m.leaf.name, 0) + 1
+    return count
+
+  moved = True
+  while moved:
+    moved = False
+    count = users()
+    types = {m.leaf.name: (m.req.kind(), m.leaf.width_in_bits, m.leaf.depth) for m in chosen.values()}
+    for leaf_name in sorted(types, key=lambda n: (-count[n], n)):
+      key = types[leaf_name]
+      for req in reqs:
+        current = chosen[req.name]
+        if current.leaf.name == leaf_name or key[0] != req.kind() or count[current.leaf.name] > count[leaf_name]:
+          continue
+        m = mapping(req, key)
+        if m and m.cost[0] <= best[req.name] * (1 + reuse_tolerance):
+          chosen[req.name] = m
+          moved = True
+      if moved:
+        break
+
+  return [chosen[req.name] for req in reqs]
@@ -0,0 +1,135 @@
+import sys
+
+try:
+  import numpy as np
+except ImportError:
+  np = None
+
+################################################################################
+# NLDM TABLES
+#
+# Compute the index vectors and value grids of the Liberty (NLDM) tables of a
+# memory. The size of the tables and the model used to fill them come from the
+# process "nldm" option:
+#
+#   "nldm": {
+#     "size": [7, 7],   # number of input slew and output load points
+#     "model": "fo4"    # fo4 (default) | flat (one value for the whole table)
+#   }
+#
+# Without the option the tables are 2x2 and flat. Input slews span 1 to 25
+# FO4 and output loads span 1 to 100 minimum input caps (both geometrically
+# spaced). The "fo4" model spreads the single Cacti numbers over the table:
+#
+#   clk->Q     += DELAY_PER_SLEW * (clk slew - min slew)
+#               + (FO4 / 5) * (load - min load) / (OUT_DRIVER_SIZE * min input cap)
+#   setup      += SETUP_PER_DATA_SLEW * (data slew - min slew) - SETUP_PER_CLK_SLEW * (clk slew - min slew)
+#   hold       += HOLD_PER_CLK_SLEW * (clk slew - min slew) - HOLD_PER_DATA_SLEW * (data slew - min slew)
+#
+# The output transition goes from the min to the max slew over the load range
+# in both models. NumPy builds all of the grids when it is installed, otherwise
+# the same grids are built with plain python. Every table is formatted once
+# here and the text is shared by all of the pins that use it.
+################################################################################
+
+NLDM_MODELS = ('fo4', 'flat')
+
+DELAY_PER_SLEW      = 0.25  ;# arbitrary
+OUT_DRIVER_SIZE     = 32    ;# output driver is a 32x inverter (see max_capacitance)
+SETUP_PER_DATA_SLEW = 0.50  ;# arbitrary
+SETUP_PER_CLK_SLEW  = 0.25  ;# arbitrary
+HOLD_PER_CLK_SLEW   = 0.25  ;# arbitrary
+HOLD_PER_DATA_SLEW  = 0.10  ;# arbitrary
+
+class NldmTables:
+
+  def __init__( self, mem, tcq, tsetup, thold ):
+
+    nldm = mem.process.nldm if isinstance(mem.process.nldm, dict) else {}
+    size  = [int(v) for v in nldm['size']] if 'size' in nldm else [2, 2]
+    model = str(nldm['model']) if 'model' in nldm else ('fo4' if nldm else 'flat')
+    if model not in NLDM_MODELS:
+      print(f'ERROR: unknown nldm model "{model}" (expected one of {", ".join(NLDM_MODELS)})')
+      sys.exit(1)
+    if len(size) != 2 or min(size) < 2:
+      print(f'ERROR: nldm size must be two numbers of at least 2 (got {size})')
+      sys.exit(1)
+    n, m = size
+
+    fo4     = float(mem.fo4_ps)/1e3
+    min_cap = float(mem.cap_input_pf)
+
+    self.min_slew = 1   * fo4      ;# arbitrary (1x fo4, fear that 0 would cause issues)
+    self.max_slew = 25  * fo4      ;# arbitrary (25x fo4 as ~100x fanout ... i know that is not really how it works)
+    self.min_load = 1   * min_cap  ;# arbitrary (1x driver, fear that 0 would cause issues)
+    self.max_load = 100 * min_cap  ;# arbitrary (100x driver)
+
+    slews = geometric(self.min_slew, self.max_slew, n)
+    loads = geometric(self.min_load, self.max_load, m)
+    ds = [s - self.min_slew for s in slews]
+    dl = [l - self.min_load for l in loads]
+
+    flat = model == 'flat'
+    k_delay = 0.0 if flat else DELAY_PER_SLEW
+    k_load  = 0.0 if flat else (fo4 / 5.0) / (OUT_DRIVER_SIZE * min_cap)
+    k_sd    = 0.0 if flat else SETUP_PER_DATA_SLEW
+    k_sc    = 0.0 if flat else SETUP_PER_CLK_SLEW
+    k_hc    = 0.0 if flat else HOLD_PER_CLK_SLEW
+    k_hd    = 0.0 if flat else HOLD_PER_DATA_SLEW
+
+    # Rows follow index_1 and columns follow index_2
+    delay      = grid(tcq,    k_delay, ds, k_load, dl)
+    setup      = grid(tsetup, -k_sc,   ds, k_sd,   ds)
+    hold       = grid(thold,  k_hc,    ds, -k_hd,  ds)
+    transition = [self.min_slew + (self.max_slew - self.min_slew) * (l - self.min_load) / (self.max_load - self.min_load) for l in loads]
+
+    self.slew_points = n
+    self.load_points = m
+    self.__flat      = {}
+
+    # Formatted tables
+    self.slew_indicies = format_vector(slews)
+    self.load_indicies = format_vector(loads)
+    self.delay         = format_table(delay)
+    self.setup         = format_table(setup)
+    self.hold          = format_table(hold)
+    self.transition    = format_vector(transition)
+
+  # template_indicies: placeholder index for the lu_table_templates
+  @staticmethod
+  def template_indicies( points ):
+    return ', '.join(str(1000 + i) for i in range(points))
+
+  # flat_vector: the same value for every slew point (power tables)
+  def flat_vector( self, value ):
+    if value not in self.__flat:
+      self.__flat[value] = format_vector([value] * self.slew_points)
+    return self.__flat[value]
+
+  # flat_table: the same value for every point of a slew x slew table
+  # (constraints that don't depend on the slews)
+  def flat_table( self, value ):
+    return format_table([[value] * self.slew_points] * self.slew_points)
+
+#
+# Helper functions for the grids
+#
+def geometric( lo, hi, points ):
+  if np is not None:
+    return np.geomspace(lo, hi, points).tolist()
+  ratio = (hi / lo) ** (1.0 / (points - 1))
+  return [lo * ratio**i for i in range(points - 1)] + [hi]
+
+# grid: value[i][j] = base + kx*dx[i] + ky*dy[j]
+def grid( base, kx, dx, ky, dy ):
+  if np is not None:
+    return np.add.outer(base + kx*np.asarray(dx), ky*np.asarray(dy)).tolist()
+  return [[base + kx*x + ky*y for y in dy] for x in dx]
+
+def format_vector( values ):
+  return ', '.join('%.3f' % v for v in values)
+
+# format_table: the rows of a 2D table as they go inside 'values ( ... )'
+def format_table( rows ):
+  lines = ['                  "%s"' % format_vector(row) for row in rows]
+  return ', \\\n'.join(lines) + ' \\\n'
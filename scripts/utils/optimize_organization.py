@@ -0,0 +1,121 @@
+import os
+import sys
+import math
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.run_cacti import write_cacti_config, run_cacti, read_cacti_results
+
+################################################################################
+# OPTIMIZE ORGANIZATION
+#
+# Search over bank counts and internal array organizations for a memory. Every
+# candidate organization is evaluated with its own Cacti run (in parallel, each
+# in its own directory under <results_dir>/org) and the best candidate for the
+# requested target is picked. The "optimize" section of the configuration (set
+# for the process and/or per SRAM) looks like:
+#
+#   "optimize": {
+#     "target": "cycle_time",       # cycle_time | area | aspect_ratio (squarest)
+#     "max_cycle_time_ns": 1.5,     # optional cap on the cycle time
+#     "aspect_ratio": [0.5, 2.0],   # optional width/height bounds
+#     "banks": [1, 2, 4],           # bank counts to try
+#     "Ndwl": [1, 2, 4],            # optional forced organizations to try, if
+#     "Ndbl": [1, 2, 4],            # not given Cacti picks the organization
+#     "Nspd": [1, 2],               # itself for each bank count
+#     "jobs": 8                     # number of Cacti runs in flight
+#   }
+#
+# All candidates and the chosen one are written to <results_dir>/org.csv.
+################################################################################
+
+TARGETS = ('cycle_time', 'area', 'aspect_ratio')
+
+# Cacti design objectives used for the organizations Cacti picks itself
+DESIGN_OBJECTIVE = { 'cycle_time'   : '0:0:0:100:0'
+                   , 'area'         : '0:0:0:0:100'
+                   , 'aspect_ratio' : '0:0:0:50:50'
+                   }
+
+def optimize_organization( mem ):
+
+  opt    = mem.optimize if isinstance(mem.optimize, dict) else {}
+  target = str(opt['target']) if 'target' in opt else 'cycle_time'
+  if target not in TARGETS:
+    print(f'ERROR: unknown optimize target "{target}" for {mem.name} (expected one of {", ".join(TARGETS)})')
+    sys.exit(1)
+  max_cycle = float(opt['max_cycle_time_ns']) if 'max_cycle_time_ns' in opt else None
+  ar_bounds = [float(v) for v in opt['aspect_ratio']] if 'aspect_ratio' in opt else None
+  jobs      = int(opt['jobs']) if 'jobs' in opt else os.cpu_count()
+
+  candidates = candidate_organizations( opt, target, mem.num_banks )
+
+  org_dir = os.sep.join([mem.results_dir, 'org'])
+  os.makedirs(org_dir, exist_ok=True)
+
+  def evaluate( org ):
+    tag = org_tag(org)
+    run_dir = os.sep.join([org_dir, tag])
+    os.makedirs(run_dir, exist_ok=True)
+    cfg_path = os.sep.join([run_dir, 'cacti.cfg'])
+    write_cacti_config(mem, cfg_path, org)
+    run_cacti(cfg_path, mem.cacti_dir, log=os.sep.join([run_dir, 'cacti.log']))
+    return read_cacti_results(cfg_path, mem)
+
+  with ThreadPoolExecutor(max_workers=jobs) as pool:
+    results = list(pool.map(evaluate, candidates))
+
+  # Pick the best candidate that meets the constraints
+  evaluated = []
+  for org, data in zip(candidates, results):
+    if data is None:
+      continue
+    cycle = data.cycle_time_ns
+    area  = data.area_mm2
+    ar    = data.width_um / data.height_um
+    ok    = (max_cycle is None or cycle <= max_cycle) and (ar_bounds is None or ar_bounds[0] <= ar <= ar_bounds[1])
+    evaluated.append((org, data, cycle, area, ar, ok))
+
+  feasible = [e for e in evaluated if e[5]]
+  if target == 'cycle_time':
+    key = lambda e: (e[2], e[3])
+  elif target == 'area':
+    key = lambda e: (e[3], e[2])
+  else:
+    key = lambda e: (abs(math.log2(e[4])), e[3])
+  best = min(feasible, key=key) if feasible else None
+
+  with open(os.sep.join([mem.results_dir, 'org.csv']), 'w') as fid:
+    fid.write('chosen, banks, force, Ndwl, Ndbl, Nspd, cycle_time_ns, area_mm2, aspect_ratio, meets_constraints\n')
+    for e in evaluated:
+      org = e[0]
+      fid.write('%d, %d, %s, %d, %d, %d, %.4f, %.6f, %.3f, %d\n' % (e is best, org['banks'], org['force'], org['Ndwl'], org['Ndbl'], org['Nspd'], e[2], e[3], e[4], e[5]))
+
+  if best is None:
+    print(f'ERROR: no organization of {mem.name} meets the optimize constraints ({len(evaluated)} of {len(candidates)} candidates evaluated)')
+    sys.exit(1)
+
+  print(f'Chose {mem.name} organization {org_tag(best[0])} (cycle time {best[2]:.3f}ns, area {best[3]:.6f}mm2, aspect ratio {best[4]:.2f})')
+  return best[0], best[1]
+
+#
+# Helper function that lists the organizations to try
+#
+def candidate_organizations( opt, target, default_banks ):
+  banks = [int(b) for b in opt['banks']] if 'banks' in opt else [default_banks]
+  forced = [k in opt for k in ('Ndwl', 'Ndbl', 'Nspd')]
+  candidates = []
+  for b in banks:
+    candidates.append({'banks': b, 'design_objective': DESIGN_OBJECTIVE[target], 'force': False, 'Ndwl': 1, 'Ndbl': 1, 'Nspd': 0})
+    if any(forced):
+      ndwl = [int(v) for v in opt['Ndwl']] if 'Ndwl' in opt else [1]
+      ndbl = [int(v) for v in opt['Ndbl']] if 'Ndbl' in opt else [1]
+      nspd = [int(v) for v in opt['Nspd']] if 'Nspd' in opt else [1]
+      for w, d, s in itertools.product(ndwl, ndbl, nspd):
+        candidates.append({'banks': b, 'design_objective': DESIGN_OBJECTIVE[target], 'force': True, 'Ndwl': w, 'Ndbl': d, 'Nspd': s})
+  return candidates
+
+def org_tag( org ):
+  if org['force']:
+    return 'b%d_dwl%d_dbl%d_spd%d' % (org['banks'], org['Ndwl'], org['Ndbl'], org['Nspd'])
+  return 'b%d_auto' % org['banks']
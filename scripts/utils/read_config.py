@@ -0,0 +1,55 @@
+import sys
+import json
+
+################################################################################
+# READ CONFIG
+#
+# Read in a JSON configuration file. The configuration files are plain JSON
+# except that any line starting with a '#' is treated as a comment.
+################################################################################
+
+def read_config( path ):
+  with open(path, 'r') as fid:
+    raw = [line.strip() for line in fid if not line.strip().startswith('#')]
+  return json.loads('\n'.join(raw))
+
+#
+# Helper function that splits a configuration file into its processes. A
+# configuration either is a single process (the original form) or lists
+# several processes:
+#
+#   {
+#     "srams": [ ... ],                   # optional list shared by all processes
+#     "processes": [
+#       {"name": "freepdk45", "tech_nm": 45, ... },
+#       {"name": "sky130", "tech_nm": 130, ..., "srams": [ ... ]}
+#     ]
+#   }
+#
+# Every other top level key is a default for all of the processes. Each
+# process uses its own "srams" list if it has one and the shared list
+# otherwise. Returns a list of (output subdirectory, process json data), the
+# subdirectory being the process name (None for a single process config).
+#
+def split_processes( json_data ):
+  if 'processes' not in json_data:
+    return [(None, json_data)]
+
+  shared = {k: v for k, v in json_data.items() if k != 'processes'}
+  processes = []
+  for process_data in json_data['processes']:
+    if 'name' not in process_data:
+      print('ERROR: every entry of "processes" needs a name')
+      sys.exit(1)
+    data = dict(shared)
+    data.update(process_data)
+    if 'srams' not in data:
+      print(f'ERROR: process {process_data["name"]} has no srams (and there is no shared srams list)')
+      sys.exit(1)
+    processes.append((str(process_data['name']), data))
+
+  names = [name for name, _ in processes]
+  if len(set(names)) != len(names):
+    print(f'ERROR: process names must be unique ({", ".join(names)})')
+    sys.exit(1)
+  return processes
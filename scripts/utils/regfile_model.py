@@ -0,0 +1,120 @@
+import math
+import sys
+
+from utils.run_cacti import CactiResults
+
+################################################################################
+# REGISTER FILE MODEL
+#
+# Analytic model of small memories built as latch or flop arrays (register
+# files) instead of SRAM arrays. Cacti takes as long for a 32x32 macro as for
+# a large one and its bitline/sense amp organization does not fit such small
+# arrays, so memories under the "regfile" thresholds are modeled here from the
+# process node and the FO4 delay without running Cacti. The option is set for
+# the process and/or per SRAM ("regfile": true or false forces the model on or
+# off for an SRAM, an object overrides the process option):
+#
+#   "regfile": {
+#     "max_depth": 64,     # words (default 64)
+#     "max_bits": 4096,    # width x depth (default 4096)
+#     "cell": "latch"      # latch (default) | flop
+#   }
+#
+# The results have the same fields as a Cacti run (see CactiResults), so the
+# Memory and all of its views use them as they are:
+#
+#   area     = storage cells + read mux tree + write word decode (in F^2)
+#   access   = address flop + decode/mux tree + output driver (in FO4) + wire
+#   cycle    = word decode + latch write + clock pulse (in FO4)
+#   energy   = switched gate capacitance * V^2 (read mux tree, write word)
+#   leakage  = per stored bit
+#
+# A PVT corner scales the FO4 delay with its process factor and voltage and
+# the leakage with its voltage and temperature (the dynamic energy is scaled to the corner
+# voltage by Memory.at_corner like the Cacti results).
+################################################################################
+
+REGFILE_CELLS = ('latch', 'flop')
+
+CELL_F2        = {'latch': 1200, 'flop': 2000}  ;# arbitrary (flop as the output register stage in Memory)
+PORT_F2        = 0.5    ;# arbitrary extra cell area per extra port (as a fraction of a cell)
+MUX_F2         = 150    ;# arbitrary (mux tree area per bit per word per read port)
+DECODE_F2      = 500    ;# arbitrary (word decode and clock gate per word per write port)
+FO4_PS_PER_NM  = 0.36   ;# FO4 ~ 360ps per um of drawn gate length
+WIRE_PS_PER_UM = 0.05   ;# arbitrary (repeated wire across the array)
+GATE_CAP_FF    = 2.0    ;# arbitrary (switched cap of one FO4 stage at 45nm, scales with the node)
+LEAK_NW_BIT    = 20.0   ;# arbitrary (leakage per stored bit at 45nm and 25C, scales with the node)
+LEAK_DOUBLE_C  = 25.0   ;# arbitrary (leakage doubles every 25C)
+
+# regfile_selected: True if the memory is modeled as a register file
+def regfile_selected( process, sram_data, width, depth ):
+  opt = sram_data['regfile'] if 'regfile' in sram_data else process.regfile
+  if isinstance(opt, bool):
+    return opt
+  if not isinstance(opt, dict):
+    return False
+  max_depth = int(opt['max_depth']) if 'max_depth' in opt else 64
+  max_bits  = int(opt['max_bits']) if 'max_bits' in opt else 4096
+  return depth <= max_depth and width * depth <= max_bits
+
+# regfile_cell: the storage cell of a register file memory
+def regfile_cell( process, sram_data ):
+  opt = sram_data['regfile'] if 'regfile' in sram_data and isinstance(sram_data['regfile'], dict) else process.regfile
+  cell = str(opt['cell']) if isinstance(opt, dict) and 'cell' in opt else 'latch'
+  if cell not in REGFILE_CELLS:
+    print(f'ERROR: unknown regfile cell "{cell}" for {sram_data["name"]} (expected one of {", ".join(REGFILE_CELLS)})')
+    sys.exit(1)
+  return cell
+
+# regfile_results: the CactiResults of the memory (at the given corner)
+def regfile_results( mem, corner=None ):
+  tech_nm    = mem.process.tech_nm
+  f2_um2     = (tech_nm / 1000.0)**2
+  bits       = mem.width_in_bits
+  depth      = mem.depth
+  levels     = math.ceil(math.log2(depth))
+  read_ports = mem.rw_ports + mem.r_ports
+  wr_ports   = mem.rw_ports + mem.w_ports
+  ports      = read_ports + mem.w_ports
+  voltage    = float(mem.process.voltage)
+
+  # Area and footprint (words stacked along the height, the aspect ratio
+  # follows the shape of the array)
+  area_um2 = ( bits * depth * CELL_F2[mem.regfile_cell] * (1 + PORT_F2 * (ports - 1))
+             + bits * depth * read_ports * MUX_F2
+             + depth * wr_ports * DECODE_F2 ) * f2_um2
+  ratio     = min(4.0, max(0.25, bits / depth))
+  width_um  = math.sqrt(area_um2 * ratio)
+  height_um = area_um2 / width_um
+
+  # Timing
+  fo4_ps = FO4_PS_PER_NM * tech_nm
+  leak_scale = 1.0
+  if corner:
+    fo4_ps *= corner.process_factor * voltage / corner.voltage
+    leak_scale = (corner.voltage / voltage) * 2**((corner.temperature_C - 25.0) / LEAK_DOUBLE_C)
+  wire_ns   = (width_um + height_um) * WIRE_PS_PER_UM / 1e3
+  access_ns = (3 + 2 * levels + 4) * fo4_ps / 1e3 + wire_ns
+  cycle_ns  = (2 * levels + 8) * fo4_ps / 1e3 + wire_ns
+
+  # Energy and leakage
+  cap_pf   = GATE_CAP_FF * (tech_nm / 45.0) / 1e3
+  read_nj  = 0.5 * (bits * (levels + 2) + depth) * cap_pf * voltage**2 / 1e3
+  write_nj = 0.5 * (bits * (4 + depth / 8.0) + depth) * cap_pf * voltage**2 / 1e3
+  leakage_mW = bits * depth * LEAK_NW_BIT * (tech_nm / 45.0) * leak_scale / 1e6
+
+  return CactiResults( tech_node_nm                = tech_nm
+                     , capacity_bytes              = mem.total_size
+                     , associativity               = 1
+                     , output_width_bits           = mem.width_in_bytes * 8
+                     , access_time_ns              = access_ns
+                     , cycle_time_ns               = cycle_ns
+                     , dyn_search_energy_nj        = 0.0
+                     , dyn_read_energy_nj          = read_nj
+                     , dyn_write_energy_nj         = write_nj
+                     , standby_leakage_per_bank_mW = leakage_mW / mem.num_banks
+                     , area_mm2                    = area_um2 / 1e6
+                     , fo4_ps                      = fo4_ps
+                     , width_um                    = width_um
+                     , height_um                   = height_um
+                     )
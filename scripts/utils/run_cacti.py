@@ -0,0 +1,146 @@
+import os
+import sys
+import subprocess
+from typing import NamedTuple
+
+from utils.cacti_config import cacti_config
+
+################################################################################
+# RUN CACTI
+#
+# Helpers to write out a Cacti configuration file for a memory and to shell out
+# to Cacti. Cacti is run from its build directory (it loads its technology
+# files from there) using the 'cwd' of the child process, so several Cacti runs
+# can safely be in flight at the same time.
+#
+# Cacti appends a row to '<cfg_path>.out' on every run, so the old file is
+# removed before each run and the results are read back by column name into a
+# CactiResults record (checked against the memory the run was for).
+################################################################################
+
+# Organization used when nothing else is asked for: let Cacti pick the
+# internal array partitioning itself while optimizing for cycle time.
+DEFAULT_ORGANIZATION = { 'banks'            : 1
+                       , 'design_objective' : '0:0:0:100:0'
+                       , 'force'            : False
+                       , 'Ndwl'             : 1
+                       , 'Ndbl'             : 1
+                       , 'Nspd'             : 0
+                       }
+
+# write_cacti_config: write the Cacti configuration file of a memory for the
+# given organization. Without a corner the devices of the memory's Cacti knobs
+# and the nominal temperature are used.
+def write_cacti_config( mem, cfg_path, organization, corner=None ):
+  org = dict(DEFAULT_ORGANIZATION)
+  org.update(organization)
+  knobs = mem.cacti_knobs
+  if 'design_objective' in mem.cacti_overrides:
+    org['design_objective'] = knobs['design_objective']
+  with open(cfg_path, 'w') as fid:
+    fid.write( cacti_config.format( size             = mem.total_size
+                                  , block_size       = mem.width_in_bytes
+                                  , rw_ports         = mem.rw_ports
+                                  , r_ports          = mem.r_ports
+                                  , w_ports          = mem.w_ports
+                                  , tech_um          = mem.process.tech_um
+                                  , bus_width        = mem.width_in_bytes*8
+                                  , banks            = org['banks']
+                                  , cache_type       = mem.cache_type
+                                  , design_objective = org['design_objective']
+                                  , force            = 'true' if org['force'] else 'false'
+                                  , Ndwl             = org['Ndwl']
+                                  , Ndbl             = org['Ndbl']
+                                  , Nspd             = org['Nspd']
+                                  , cell_type        = corner.cell_type if corner and corner.cell_type else knobs['cell_type']
+                                  , peripheral_type  = corner.peripheral_type if corner and corner.peripheral_type else knobs['peripheral_type']
+                                  , temperature_K    = corner.cacti_temperature_K if corner else 300
+                                  , access_mode      = knobs['access_mode']
+                                  , deviate          = knobs['deviate']
+                                  , optimize_ed      = knobs['optimize_ed']
+                                  , wire_signaling   = knobs['wire_signaling']
+                                  , wire_inside_mat  = knobs['wire_inside_mat']
+                                  , wire_outside_mat = knobs['wire_outside_mat']
+                                  , interconnect_projection = knobs['interconnect_projection']
+                                  , ecc              = knobs['ecc']
+                                  , power_gating     = 'true' if mem.power_gating else 'false'
+                                  ))
+
+# run_cacti: run Cacti on the given configuration file. Cacti writes its
+# results to '<cfg_path>.out' (results of earlier runs are removed first). If
+# 'log' is given the Cacti output goes to that file rather than stdout.
+def run_cacti( cfg_path, cacti_dir, log=None ):
+  if os.path.exists(cfg_path + '.out'):
+    os.remove(cfg_path + '.out')
+  cmd = [os.sep.join(['.', 'cacti']), '-infile', cfg_path]
+  if log:
+    with open(log, 'w') as fid:
+      subprocess.run(cmd, cwd=cacti_dir, stdout=fid, stderr=subprocess.STDOUT)
+  else:
+    subprocess.run(cmd, cwd=cacti_dir)
+
+# Results of a single Cacti run
+class CactiResults(NamedTuple):
+  tech_node_nm                : int
+  capacity_bytes              : int
+  associativity               : int
+  output_width_bits           : int
+  access_time_ns              : float
+  cycle_time_ns               : float
+  dyn_search_energy_nj        : float
+  dyn_read_energy_nj          : float
+  dyn_write_energy_nj         : float
+  standby_leakage_per_bank_mW : float
+  area_mm2                    : float
+  fo4_ps                      : float
+  width_um                    : float
+  height_um                   : float
+
+# Cacti csv column (see patches/cacti.patch) of every CactiResults field
+CACTI_COLUMNS = { 'tech_node_nm'                : 'Tech node (nm)'
+                , 'capacity_bytes'              : 'Capacity (bytes)'
+                , 'associativity'               : 'Associativity'
+                , 'output_width_bits'           : 'Output width (bits)'
+                , 'access_time_ns'              : 'Access time (ns)'
+                , 'cycle_time_ns'               : 'Random cycle time (ns)'
+                , 'dyn_search_energy_nj'        : 'Dynamic search energy (nJ)'
+                , 'dyn_read_energy_nj'          : 'Dynamic read energy (nJ)'
+                , 'dyn_write_energy_nj'         : 'Dynamic write energy (nJ)'
+                , 'standby_leakage_per_bank_mW' : 'Standby leakage per bank(mW)'
+                , 'area_mm2'                    : 'Area (mm2)'
+                , 'fo4_ps'                      : 'FO4 delay (ps)'
+                , 'width_um'                    : 'Width (um)'
+                , 'height_um'                   : 'Height (um)'
+                }
+
+# read_cacti_results: the results of the last Cacti run for the given
+# configuration file, or None if Cacti didn't write any. Results that are
+# missing a column, can't be parsed or don't match the memory are an error.
+def read_cacti_results( cfg_path, mem=None ):
+  out_path = cfg_path + '.out'
+  if not os.path.exists(out_path):
+    return None
+  with open(out_path, 'r') as fid:
+    lines = [line for line in fid if line.strip()]
+  if len(lines) < 2:
+    return None
+
+  header = [h.strip() for h in lines[0].split(',')]
+  row    = [v.strip() for v in lines[-1].split(',')]
+  values = {}
+  for field, column in CACTI_COLUMNS.items():
+    if column not in header:
+      print(f'ERROR: column "{column}" is missing from {out_path} (is Cacti patched with patches/cacti.patch?)')
+      sys.exit(1)
+    try:
+      values[field] = CactiResults.__annotations__[field](float(row[header.index(column)]))
+    except (IndexError, ValueError):
+      print(f'ERROR: bad value for "{column}" in {out_path}')
+      sys.exit(1)
+  results = CactiResults(**values)
+
+  # Make sure the results are for this memory
+  if mem is not None and results.capacity_bytes != mem.total_size:
+    print(f'ERROR: stale Cacti results in {out_path} ({results.capacity_bytes} bytes, expected {mem.total_size} bytes)')
+    sys.exit(1)
+  return results
@@ -0,0 +1,121 @@
+import os
+import sys
+import importlib
+import importlib.util
+
+from utils.generate_lib import generate_lib
+from utils.generate_lef import generate_lef
+from utils.generate_verilog import generate_verilog
+from utils.generate_verilog import generate_verilog_bb
+from utils.generate_verilog import generate_verilog_wrapper
+from utils.generate_gds import generate_gds
+from utils.generate_testbench import generate_testbench
+from utils.generate_sdf import generate_sdf
+
+################################################################################
+# VIEW REGISTRY
+#
+# The views run.py can generate for each SRAM, by name. A view is a function
+# that writes the view of a memory into its results directory and, optionally,
+# a second function for the logical memory of a tiled SRAM (see TiledMemory;
+# the leaf macro of a tiled SRAM gets the regular views). Views without a tiled
+# function are only generated for the leaf macro.
+#
+# run.py generates the views given with --views (DEFAULT_VIEWS otherwise), so
+# data that only some views need is only computed when one of them asks for
+# it: the Cacti runs of the PVT corners (.lib and .sdf) and the pin/strap
+# geometry (.lef and .gds) are both computed on first use. A view also
+# declares whether it needs the nominal Cacti results (timing, power and the
+# macro size, see Memory.model) at all. When none of the selected views do,
+# the SRAMs are not modeled (the views only use their pins) and they are left
+# out of the catalog and summary.csv.
+#
+# Other view formats can be added without touching run.py by a plugin module
+# (given with --view_plugins) that calls register_view() when imported:
+#
+#   from utils.views import register_view
+#
+#   def generate_csv( mem ):
+#     with open(os.sep.join([mem.results_dir, mem.name + '.csv']), 'w') as fid:
+#       fid.write('%s, %.3f, %.3f\n' % (mem.name, mem.width_um, mem.height_um))
+#
+#   register_view('csv', generate_csv)
+#
+# Plugin views are assumed to need the Cacti results unless they are
+# registered with needs_model=False.
+################################################################################
+
+DEFAULT_VIEWS = ('lib', 'lef', 'v', 'bb')
+
+class View:
+
+  def __init__( self, name, generate, generate_tiled=None, needs_model=True ):
+    self.name           = name
+    self.generate       = generate
+    self.generate_tiled = generate_tiled
+    self.needs_model    = needs_model
+
+VIEWS = {}
+
+# register_view: add (or replace) a view generator
+def register_view( name, generate, generate_tiled=None, needs_model=True ):
+  VIEWS[name] = View(name, generate, generate_tiled, needs_model)
+
+# select_views: the View objects for a comma separated list of view names
+def select_views( names ):
+  names = [n.strip() for n in names.split(',') if n.strip()] if isinstance(names, str) else list(names)
+  for name in names:
+    if name not in VIEWS:
+      print(f'ERROR: unknown view "{name}" (expected one of {", ".join(VIEWS)})')
+      sys.exit(1)
+  return [VIEWS[name] for name in dict.fromkeys(names)]
+
+# load_view_plugins: import every plugin (a module name or a path to a python
+# file) so that it can register its views
+def load_view_plugins( plugins ):
+  for plugin in plugins:
+    if plugin.endswith('.py') or os.sep in plugin:
+      path = os.path.abspath(os.path.expanduser(plugin))
+      if not os.path.isfile(path):
+        print(f'ERROR: view plugin {plugin} not found')
+        sys.exit(1)
+      spec = importlib.util.spec_from_file_location(os.path.splitext(os.path.basename(path))[0], path)
+      spec.loader.exec_module(importlib.util.module_from_spec(spec))
+    else:
+      importlib.import_module(plugin)
+
+#
+# Built-in views
+#
+def view_lib( mem ):
+  generate_lib(mem)
+  for corner in mem.process.corners:
+    generate_lib(mem.at_corner(corner))
+
+def view_lib_tiled( tiled ):
+  generate_lib(tiled.rollup())
+  for corner in tiled.process.corners:
+    generate_lib(tiled.rollup(corner))
+
+def view_sdf( mem ):
+  generate_sdf(mem)
+  for corner in mem.process.corners:
+    generate_sdf(mem.at_corner(corner))
+
+def view_verilog( mem ):
+  generate_verilog(mem, tmChkExpand=mem.process.vlogTimingCheckSignalExpansion)
+
+def view_activity( mem ):
+  generate_verilog(mem, tmChkExpand=mem.process.vlogTimingCheckSignalExpansion, activity=True)
+
+def view_testbench_tiled( tiled ):
+  generate_testbench(tiled, tiled=True)
+
+register_view('lib', view_lib, view_lib_tiled)
+register_view('lef', generate_lef)
+register_view('v',   view_verilog, generate_verilog_wrapper, needs_model=False)
+register_view('bb',  generate_verilog_bb, generate_verilog_bb, needs_model=False)
+register_view('gds', generate_gds)
+register_view('tb',  generate_testbench, view_testbench_tiled, needs_model=False)
+register_view('act', view_activity, needs_model=False)  # SystemVerilog (final block)
+register_view('sdf', view_sdf)